@@ -1,38 +1,1354 @@
 import sys
 from PyQt5.QtCore import *
 from PyQt5.QtCore import QSettings
-from PyQt5.QtGui import QIcon, QDesktopServices
+from PyQt5.QtGui import QIcon, QIconEngine, QDesktopServices, QKeySequence, QPixmap
 from PyQt5.QtWidgets import *
 from PyQt5.QtWebEngineWidgets import *
-from PyQt5.QtNetwork import QNetworkProxy
+from PyQt5.QtNetwork import QNetworkProxy, QHostAddress, QAbstractSocket
 from PyQt5.QtWebEngineCore import *
 from PyQt5.QtWebChannel import QWebChannel  # Add this import
+from PyQt5 import sip
 import os
 import logging
+import argparse
+import json
+import threading
+import time
+import itertools
+import re
+import queue
+import subprocess
+import tempfile
+import functools
+import http.server
+import http.client
+import hashlib
+import concurrent.futures
+import gzip
+import zipfile
+import io
+import sqlite3
+import html
+import asyncio
+import email.utils
+import urllib.parse
+import random
+import statistics
+import base64
+import heapq
+from collections import deque, OrderedDict, defaultdict
+
+# Readable names for QWebEngineUrlRequestInfo resource types
+RESOURCE_TYPE_NAMES = {
+    getattr(QWebEngineUrlRequestInfo, attr): name
+    for attr, name in (
+        ('ResourceTypeMainFrame', 'main_frame'),
+        ('ResourceTypeSubFrame', 'sub_frame'),
+        ('ResourceTypeStylesheet', 'stylesheet'),
+        ('ResourceTypeScript', 'script'),
+        ('ResourceTypeImage', 'image'),
+        ('ResourceTypeFontResource', 'font'),
+        ('ResourceTypeSubResource', 'sub_resource'),
+        ('ResourceTypeObject', 'object'),
+        ('ResourceTypeMedia', 'media'),
+        ('ResourceTypeWorker', 'worker'),
+        ('ResourceTypeSharedWorker', 'shared_worker'),
+        ('ResourceTypePrefetch', 'prefetch'),
+        ('ResourceTypeFavicon', 'favicon'),
+        ('ResourceTypeXhr', 'xhr'),
+        ('ResourceTypePing', 'ping'),
+        ('ResourceTypeServiceWorker', 'service_worker'),
+        ('ResourceTypeCspReport', 'csp_report'),
+        ('ResourceTypePluginResource', 'plugin'),
+        ('ResourceTypeNavigationPreloadMainFrame', 'preload_main_frame'),
+        ('ResourceTypeNavigationPreloadSubFrame', 'preload_sub_frame'),
+    )
+    if hasattr(QWebEngineUrlRequestInfo, attr)
+}
 
-class AdBlocker(QWebEngineUrlRequestInterceptor):
+# Trace thread ids for events that do not belong to a tab
+TRACE_TID_BROWSER = 0
+TRACE_TID_NETWORK = 1
+
+class TraceRecorder:
+    """Records browser events into a preallocated ring buffer.
+
+    Events are kept as tuples and only converted to Chrome Trace Event
+    dictionaries when dumped, so recording stays cheap enough for the
+    request interceptor, which runs on the network thread.
+    """
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.events = [None] * capacity
+        self.position = 0
+        self.recorded = 0
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.thread_names = {
+            TRACE_TID_BROWSER: 'Browser',
+            TRACE_TID_NETWORK: 'Request Interceptor',
+        }
+
+    def start(self):
+        with self.lock:
+            self.events = [None] * self.capacity
+            self.position = 0
+            self.recorded = 0
+            self.origin = time.perf_counter()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def now(self):
+        """Current trace timestamp in microseconds"""
+        return int((time.perf_counter() - self.origin) * 1000000)
+
+    def record(self, name, cat, ph, tid=TRACE_TID_BROWSER, args=None, ts=None, dur=None):
+        if not self.enabled:
+            return
+        event = (name, cat, ph, self.now() if ts is None else ts, dur, tid, args)
+        with self.lock:
+            self.events[self.position] = event
+            self.position = (self.position + 1) % self.capacity
+            self.recorded += 1
+
+    def instant(self, name, cat, tid=TRACE_TID_BROWSER, **args):
+        self.record(name, cat, 'i', tid, args)
+
+    def begin(self, name, cat, tid=TRACE_TID_BROWSER, **args):
+        self.record(name, cat, 'B', tid, args)
+
+    def end(self, name, cat, tid=TRACE_TID_BROWSER, **args):
+        self.record(name, cat, 'E', tid, args)
+
+    def complete(self, name, cat, start, tid=TRACE_TID_BROWSER, **args):
+        """Record an event spanning from start (a now() value) until now"""
+        self.record(name, cat, 'X', tid, args, ts=start, dur=self.now() - start)
+
+    def set_thread_name(self, tid, name):
+        self.thread_names[tid] = name
+
+    def snapshot(self):
+        """Return recorded events, oldest first"""
+        with self.lock:
+            if self.recorded < self.capacity:
+                return self.events[:self.position]
+            return self.events[self.position:] + self.events[:self.position]
+
+    def to_chrome_trace(self):
+        pid = os.getpid()
+        trace_events = [
+            {'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': 'ZiBrowser'}}
+        ]
+        for tid, name in self.thread_names.items():
+            trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+
+        for name, cat, ph, ts, dur, tid, args in self.snapshot():
+            event = {'name': name, 'cat': cat, 'ph': ph, 'ts': ts, 'pid': pid, 'tid': tid}
+            if ph == 'i':
+                event['s'] = 't'
+            if dur is not None:
+                event['dur'] = dur
+            if args:
+                event['args'] = args
+            trace_events.append(event)
+
+        return {
+            'traceEvents': trace_events,
+            'displayTimeUnit': 'ms',
+            'otherData': {
+                'recorded': self.recorded,
+                'dropped': max(0, self.recorded - self.capacity),
+            },
+        }
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+# Shared by every window and by the request interceptor thread
+TRACER = TraceRecorder()
+
+def tab_trace_tid(browser):
+    """Trace thread id used for events belonging to a tab"""
+    return 1000 + getattr(browser, 'tab_id', 0)
+
+def registrable_domain(host):
+    """Approximate eTLD+1 of a host, e.g. cdn.example.co.uk -> example.co.uk"""
+    labels = host.lower().rstrip('.').split('.')
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in ('co', 'com', 'org', 'net', 'gov', 'ac', 'edu'):
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+def host_matches(host, hosts):
+    """True if host or any parent domain of it is in hosts"""
+    labels = host.lower().split('.')
+    return any('.'.join(labels[i:]) in hosts for i in range(len(labels) - 1))
+
+# Resource types the request policy can act on. Qt reports both <a ping>
+# and navigator.sendBeacon() as pings.
+POLICY_RESOURCE_TYPES = ['image', 'media', 'font', 'sub_frame', 'ping', 'prefetch']
+POLICY_ACTIONS = {'allow': 'Allow', 'third_party': 'Block third-party', 'block': 'Block'}
+# For a site, 'inherit' leaves the type to the global rules; 'allow' overrides them
+POLICY_INHERIT = 'inherit'
+
+REQUEST_POLICY_PRESETS = {
+    'data_saver': {'font': 'third_party', 'media': 'third_party', 'prefetch': 'block', 'ping': 'block'},
+    'text_only': {'image': 'block', 'media': 'block', 'font': 'block', 'sub_frame': 'third_party'},
+    'no_tracking': {'ping': 'block', 'sub_frame': 'third_party'},
+}
+
+class RequestPolicy:
+    """Allows or blocks requests by resource type, per first-party site.
+
+    Rules for a site override the global rules type by type, an explicit
+    allow included. When the connection is marked as metered the data saver
+    preset applies on top of the global rules. One policy serves the whole
+    process. Rules are replaced as a whole, never mutated, because requests
+    are intercepted on another thread.
+    """
     def __init__(self):
+        self.global_rules = {}
+        self.site_rules = {}
+        self.metered = False
+        self.counts = {}  # (scope, resource type, action) -> blocked requests
+        self.load()
+
+    def load(self):
+        saved = get_settings().get('request_policy')
+        self.global_rules = saved.get('global', {})
+        self.site_rules = saved.get('sites', {})
+        self.metered = saved.get('metered', False)
+
+    def save(self):
+        get_settings().set('request_policy', {
+            'global': self.global_rules, 'sites': self.site_rules, 'metered': self.metered,
+        })
+
+    def set_rules(self, site, rules):
+        """Replace the rules for a site, or the global rules when site is None"""
+        # Allow is the global default, but for a site it overrides a global block
+        dropped = (POLICY_INHERIT, 'allow') if site is None else (POLICY_INHERIT,)
+        rules = {name: action for name, action in rules.items() if action not in dropped}
+        if site is None:
+            self.global_rules = rules
+        else:
+            site_rules = dict(self.site_rules)
+            if rules:
+                site_rules[site] = rules
+            else:
+                site_rules.pop(site, None)
+            self.site_rules = site_rules
+        self.save()
+
+    def set_metered(self, metered):
+        self.metered = metered
+        self.save()
+
+    def rules_for(self, site):
+        return self.global_rules if site is None else self.site_rules.get(site, {})
+
+    def decide(self, resource_type, request_host, first_party_host):
+        """True if the request should be blocked"""
+        name = RESOURCE_TYPE_NAMES.get(resource_type)
+        if name not in POLICY_RESOURCE_TYPES:
+            return False
+        site = registrable_domain(first_party_host) if first_party_host else ''
+        site_rules = self.site_rules.get(site)
+        if site_rules and name in site_rules:
+            scope, action = site, site_rules[name]
+        elif name in self.global_rules:
+            scope, action = '*', self.global_rules[name]
+        elif self.metered and name in REQUEST_POLICY_PRESETS['data_saver']:
+            scope, action = 'metered', REQUEST_POLICY_PRESETS['data_saver'][name]
+        else:
+            return False
+
+        if action == 'third_party':
+            blocked = bool(site) and registrable_domain(request_host) != site
+        else:
+            blocked = action == 'block'
+        if blocked:
+            key = (scope, name, action)
+            self.counts[key] = self.counts.get(key, 0) + 1
+        return blocked
+
+    def report(self):
+        return sorted(
+            ({'scope': scope, 'type': name, 'action': action, 'blocked': count}
+             for (scope, name, action), count in list(self.counts.items())),
+            key=lambda row: row['blocked'], reverse=True
+        )
+
+REQUEST_POLICY = None
+
+def get_request_policy():
+    """Process-wide request policy, so edits in one window reach every window"""
+    global REQUEST_POLICY
+    if REQUEST_POLICY is None:
+        REQUEST_POLICY = RequestPolicy()
+    return REQUEST_POLICY
+
+# Sites known to serve HTTPS, subdomains included; extended by what the
+# browser sees redirect from HTTP to HTTPS.
+HTTPS_PRELOAD_HOSTS = frozenset([
+    'google.com', 'youtube.com', 'gstatic.com', 'googleapis.com', 'bing.com', 'duckduckgo.com',
+    'yahoo.com', 'ecosia.org', 'wikipedia.org', 'wikimedia.org', 'github.com', 'githubusercontent.com',
+    'stackoverflow.com', 'stackexchange.com', 'reddit.com', 'twitter.com', 'x.com', 'facebook.com',
+    'instagram.com', 'linkedin.com', 'amazon.com', 'microsoft.com', 'apple.com', 'mozilla.org',
+    'python.org', 'pypi.org', 'qt.io', 'cloudflare.com', 'netflix.com', 'twitch.tv', 'vimeo.com',
+])
+
+class HttpsUpgrader:
+    """Rewrites http:// requests to https:// for hosts known to support it.
+
+    A known host would answer plain HTTP with a redirect, so each upgrade
+    saves a round trip. Hosts are learned from HTTP main-frame loads that
+    end up on HTTPS at the same host, and the redirect cost measured there
+    estimates the time saved. Hosts whose upgraded load fails are
+    excluded from then on. One upgrader serves the whole process; private
+    profiles use what it knows but teach it nothing. Called on the
+    interceptor thread, so the host sets are replaced, never mutated.
+    """
+    def __init__(self, learn_window=10.0):
+        settings = get_settings()
+        self.learned = frozenset(settings.get('https_hosts'))
+        self.failed = frozenset(settings.get('https_failed'))
+        self.learn_window = learn_window
+        self.pending = {}  # host -> time an HTTP main-frame request was seen
+        self.upgraded = {}  # host -> time of the last upgrade
+        self.redirect_ms = deque(maxlen=100)
+        self.counters = {'upgrades': 0, 'learned': 0, 'fallbacks': 0}
+
+    def save(self):
+        settings = get_settings()
+        settings.set('https_hosts', sorted(self.learned))
+        settings.set('https_failed', sorted(self.failed))
+
+    @staticmethod
+    def eligible(url):
+        host = url.host()
+        if url.port() not in (-1, 80) or not host or '.' not in host:
+            return False
+        return not QHostAddress(host).protocol() in (QAbstractSocket.IPv4Protocol, QAbstractSocket.IPv6Protocol)
+
+    def known(self, host):
+        return host not in self.failed and (host in self.learned or host_matches(host, HTTPS_PRELOAD_HOSTS))
+
+    def upgrade(self, info, learn=True, excluded=frozenset()):
+        """Redirect the request to HTTPS if worthwhile; True if it was rewritten.
+
+        learn is False for private profiles, which also keep their own
+        excluded hosts instead of adding to the saved ones.
+        """
+        url = info.requestUrl()
+        main_frame = info.resourceType() == QWebEngineUrlRequestInfo.ResourceTypeMainFrame
+        if url.scheme() == 'https':
+            if main_frame and learn:
+                self.observe_https(url.host())
+            return False
+        if url.scheme() != 'http' or not self.eligible(url):
+            return False
+        host = url.host()
+        if host in excluded or not self.known(host):
+            if main_frame and learn:
+                self.pending[host] = time.perf_counter()
+            return False
+
+        secure = QUrl(url)
+        secure.setScheme('https')
+        secure.setPort(-1)
+        info.redirect(secure)
+        self.upgraded[host] = time.perf_counter()
+        self.counters['upgrades'] += 1
+        return True
+
+    def observe_https(self, host):
+        """An HTTPS main-frame load right after an HTTP one to the same host was a redirect"""
+        started = self.pending.pop(host, None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < self.learn_window and host not in self.learned:
+            self.learned = self.learned | {host}
+            self.redirect_ms.append(elapsed * 1000)
+            self.counters['learned'] += 1
+
+    def was_upgraded(self, host):
+        started = self.upgraded.get(host)
+        return started is not None and time.perf_counter() - started < 60
+
+    def fall_back(self, host):
+        self.failed = self.failed | {host}
+        self.learned = self.learned - {host}
+        self.upgraded.pop(host, None)
+        self.counters['fallbacks'] += 1
+        self.save()
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['known_hosts'] = len(self.learned) + len(HTTPS_PRELOAD_HOSTS)
+        if self.redirect_ms:
+            redirect_ms = statistics.median(self.redirect_ms)
+            stats['median_redirect_ms'] = round(redirect_ms, 1)
+            stats['estimated_saved_ms'] = round(redirect_ms * self.counters['upgrades'])
+        return stats
+
+# Network error codes on Chromium's error page that plain HTTP might get past
+HTTPS_FALLBACK_ERRORS = re.compile(
+    r'\bERR_(?:SSL_\w+|CERT_\w+|BAD_SSL_CLIENT_AUTH_CERT|CONNECTION_(?:REFUSED|RESET|CLOSED|TIMED_OUT|FAILED)'
+    r'|TIMED_OUT|EMPTY_RESPONSE)\b'
+)
+
+HTTPS_UPGRADER = None
+
+def get_https_upgrader():
+    """Process-wide HTTPS upgrader, loaded on first use and saved on quit"""
+    global HTTPS_UPGRADER
+    if HTTPS_UPGRADER is None:
+        HTTPS_UPGRADER = HttpsUpgrader()
+        QApplication.instance().aboutToQuit.connect(HTTPS_UPGRADER.save)
+    return HTTPS_UPGRADER
+
+# Query parameters that only identify a campaign or click. Names ending in
+# '*' are prefixes. Per-site entries add to the '*' entry.
+DEFAULT_TRACKING_PARAMS = {
+    '*': ['utm_*', 'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'twclid',
+          'mc_cid', 'mc_eid', 'igshid', '_hsenc', '_hsmi', 'mkt_tok', 'oly_anon_id', 'oly_enc_id'],
+    'youtube.com': ['si', 'feature'],
+    'amazon.com': ['pd_rd_*', 'pf_rd_*', 'ref_'],
+    'twitter.com': ['s', 't'],
+    'x.com': ['s', 't'],
+}
+
+# Static subresources whose servers do not care about query key order
+REORDERABLE_RESOURCE_TYPES = frozenset(
+    getattr(QWebEngineUrlRequestInfo, attr) for attr in (
+        'ResourceTypeImage', 'ResourceTypeFontResource', 'ResourceTypeStylesheet', 'ResourceTypeMedia',
+    )
+)
+
+# Requests whose URLs are API calls; rewriting those could break pages
+UNTOUCHED_RESOURCE_TYPES = frozenset(
+    getattr(QWebEngineUrlRequestInfo, attr) for attr in (
+        'ResourceTypeXhr', 'ResourceTypeSubResource', 'ResourceTypePing', 'ResourceTypeCspReport',
+    )
+)
+
+class UrlNormalizer:
+    """Strips tracking parameters so equal resources share one cache entry.
+
+    Rules are compiled once into exact names and prefixes per site, and the
+    merged rules for each host are memoised. Query keys of static
+    subresources are also sorted. Called on the interceptor thread.
+    """
+    def __init__(self, rules=None, enabled=True, max_hosts=4096):
+        if rules is None:
+            settings = get_settings()
+            rules = settings.get('tracking_params')
+            enabled = settings.get('strip_tracking_params')
+        self.enabled = enabled
+        self.max_hosts = max_hosts
+        self.compiled = {site: self.compile(names) for site, names in (rules or DEFAULT_TRACKING_PARAMS).items()}
+        self.host_rules = {}
+        self.counters = {'rewritten': 0, 'params_removed': 0, 'reordered': 0}
+        self.sites = {}  # registrable domain -> rewritten requests
+
+    @staticmethod
+    def compile(names):
+        exact = frozenset(name.lower() for name in names if not name.endswith('*'))
+        prefixes = tuple(name[:-1].lower() for name in names if name.endswith('*'))
+        return exact, prefixes
+
+    def rules_for(self, host):
+        rules = self.host_rules.get(host)
+        if rules is None:
+            exact, prefixes = self.compiled.get('*', (frozenset(), ()))
+            labels = host.lower().split('.')
+            for i in range(len(labels) - 1):
+                site_exact, site_prefixes = self.compiled.get('.'.join(labels[i:]), (frozenset(), ()))
+                exact, prefixes = exact | site_exact, prefixes + site_prefixes
+            if len(self.host_rules) >= self.max_hosts:
+                self.host_rules = {}
+            rules = self.host_rules[host] = (exact, prefixes)
+        return rules
+
+    def normalize(self, url, resource_type):
+        """The URL without tracking parameters, or None if it is already clean"""
+        query = url.query(QUrl.FullyEncoded)
+        if not query or not self.enabled or resource_type in UNTOUCHED_RESOURCE_TYPES:
+            return None
+        exact, prefixes = self.rules_for(url.host())
+        pairs = query.split('&')
+        kept = []
+        for pair in pairs:
+            key = pair.split('=', 1)[0].lower()
+            if key not in exact and not (prefixes and key.startswith(prefixes)):
+                kept.append(pair)
+        removed = len(pairs) - len(kept)
+        if resource_type in REORDERABLE_RESOURCE_TYPES:
+            kept.sort(key=lambda pair: pair.split('=', 1)[0])
+        if kept == pairs:
+            return None
+
+        if kept:
+            clean = QUrl(url)
+            clean.setQuery('&'.join(kept))
+        else:
+            clean = url.adjusted(QUrl.RemoveQuery)
+        self.counters['rewritten'] += 1
+        self.counters['params_removed'] += removed
+        if not removed:
+            self.counters['reordered'] += 1
+        site = registrable_domain(url.host())
+        self.sites[site] = self.sites.get(site, 0) + 1
+        return clean
+
+    def stats(self):
+        stats = dict(self.counters)
+        top = sorted(list(self.sites.items()), key=lambda item: item[1], reverse=True)[:5]
+        if top:
+            stats['top_sites'] = ', '.join(f"{site} ({count})" for site, count in top)
+        return stats
+
+HOP_BY_HOP_HEADERS = frozenset([
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'proxy-connection',
+    'te', 'trailer', 'transfer-encoding', 'upgrade',
+])
+CACHE_NAMESPACE_HEADER = 'X-ZiBrowser-Cache-Namespace'
+CACHEABLE_STATUSES = frozenset([200, 203, 204, 300, 301, 404, 410])
+
+def get_header(headers, name):
+    """First value of a header in a list of (name, value) pairs"""
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+def parse_cache_control(value):
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"')
+    return directives
+
+def http_date(value):
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def freshness_lifetime(headers, now):
+    """Seconds a response may be served without revalidation, or None if it must not be stored"""
+    directives = parse_cache_control(get_header(headers, 'cache-control'))
+    has_validator = get_header(headers, 'etag') or get_header(headers, 'last-modified')
+    if 'no-store' in directives or 'private' in directives or get_header(headers, 'set-cookie'):
+        return None
+    if 'no-cache' in directives:
+        return 0 if has_validator else None
+    for directive in ('s-maxage', 'max-age'):
+        if directives.get(directive, '').isdigit():
+            return int(directives[directive])
+    date = http_date(get_header(headers, 'date')) or now
+    expires = get_header(headers, 'expires')
+    if expires is not None:
+        expires_at = http_date(expires)
+        return max(0, int(expires_at - date)) if expires_at else 0
+    last_modified = http_date(get_header(headers, 'last-modified'))
+    if last_modified:
+        # The usual heuristic: a tenth of the time since the last change, at most a day
+        return int(min(max(0, date - last_modified) / 10, 86400))
+    return 0 if has_validator else None
+
+class ProxyCacheStore:
+    """Cached responses, with bodies stored once per content hash.
+
+    Metadata is kept per namespace and URL, least recently used first.
+    Private namespaces live in memory only and are never written to disk.
+    """
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> metadata dict
+        self.refs = {}  # (private, digest) -> entries using the body
+        self.memory_bodies = {}  # digest -> body, for private namespaces
+        self.disk_total = 0
+        # write_body runs on an executor while eviction may release the same digest on the proxy thread
+        self.file_lock = threading.Lock()
+        self.pinned = {}  # digest -> bodies written but not yet put, whose files must stay
+        self.blob_directory = os.path.join(directory, 'blobs')
+        if not os.path.exists(self.blob_directory):
+            os.makedirs(self.blob_directory)
+        self.load_index()
+
+    @staticmethod
+    def key(namespace, url):
+        return hashlib.sha1(f"{namespace} {url}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_private(namespace):
+        return namespace.startswith('private')
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_directory, digest)
+
+    def load_index(self):
+        try:
+            with open(os.path.join(self.directory, 'index.json'), encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, meta in saved:
+            if os.path.exists(self.blob_path(meta['digest'])):
+                self.entries[key] = meta
+                self.add_ref(meta)
+
+    def save_index(self):
+        saved = [[key, meta] for key, meta in self.entries.items() if not self.is_private(meta['namespace'])]
+        path = os.path.join(self.directory, 'index.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(saved, f)
+        os.replace(path + '.tmp', path)
+
+    def add_ref(self, meta):
+        ref = (self.is_private(meta['namespace']), meta['digest'])
+        self.refs[ref] = self.refs.get(ref, 0) + 1
+        if self.refs[ref] == 1 and not ref[0]:
+            self.disk_total += meta['size']
+
+    def release(self, meta):
+        ref = (self.is_private(meta['namespace']), meta['digest'])
+        self.refs[ref] -= 1
+        if self.refs[ref]:
+            return
+        del self.refs[ref]
+        if ref[0]:
+            self.memory_bodies.pop(meta['digest'], None)
+        else:
+            self.disk_total -= meta['size']
+            with self.file_lock:
+                if meta['digest'] in self.pinned:
+                    return
+                try:
+                    os.remove(self.blob_path(meta['digest']))
+                except OSError:
+                    pass
+
+    def get(self, namespace, url):
+        key = self.key(namespace, url)
+        meta = self.entries.get(key)
+        if meta is not None:
+            self.entries.move_to_end(key)
+        return meta
+
+    def read_body(self, meta):
+        if self.is_private(meta['namespace']):
+            return self.memory_bodies.get(meta['digest'])
+        try:
+            with open(self.blob_path(meta['digest']), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def write_body(self, body):
+        """Write a body to disk unless already there; safe to call off the proxy thread.
+
+        The file is pinned until put() stores an entry for it, so a release
+        of the same digest in between cannot delete it.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(digest)
+        with self.file_lock:
+            self.pinned[digest] = self.pinned.get(digest, 0) + 1
+            if not os.path.exists(path):
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(body)
+                os.replace(path + '.tmp', path)
+        return digest
+
+    def put(self, meta, body, digest=None):
+        """Store an entry; the body must already be on disk (digest given) unless the namespace is private"""
+        meta['size'] = len(body)
+        written = digest is not None
+        if not written:
+            digest = hashlib.sha256(body).hexdigest()
+            self.memory_bodies[digest] = body
+        meta['digest'] = digest
+
+        key = self.key(meta['namespace'], meta['url'])
+        old = self.entries.pop(key, None)
+        self.entries[key] = meta
+        self.add_ref(meta)
+        if written:
+            with self.file_lock:
+                self.pinned[digest] -= 1
+                if not self.pinned[digest]:
+                    del self.pinned[digest]
+        if old is not None:
+            self.release(old)
+        while self.disk_total > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.release(evicted)
+
+    def remove(self, namespace, url):
+        meta = self.entries.pop(self.key(namespace, url), None)
+        if meta is not None:
+            self.release(meta)
+
+    def drop_namespace(self, namespace):
+        for key in [key for key, meta in self.entries.items() if meta['namespace'] == namespace]:
+            self.release(self.entries.pop(key))
+
+class UpstreamResponse:
+    """Status and headers of an upstream response, with its body still on the wire"""
+    def __init__(self, reader, method, status, reason, headers):
+        self.reader = reader
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.no_body = method == 'HEAD' or status in (204, 304) or 100 <= status < 200
+        self.chunked = 'chunked' in (get_header(headers, 'transfer-encoding') or '').lower()
+        length = get_header(headers, 'content-length')
+        self.length = int(length) if length and length.isdigit() and not self.chunked else None
+        self.until_close = not self.no_body and not self.chunked and self.length is None
+        self.prefix = b''  # body buffered so far
+        self.received = 0
+        self.done = self.no_body
+
+    async def read_chunk(self):
+        """Next piece of the body, or b'' once it is complete"""
+        if self.done:
+            return b''
+        if self.chunked:
+            size = int((await self.reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if size == 0:
+                # Trailers, up to the blank line
+                while (await self.reader.readline()).strip():
+                    pass
+                self.done = True
+                return b''
+            data = await self.reader.readexactly(size)
+            await self.reader.readexactly(2)
+            return data
+        if self.length is not None:
+            remaining = self.length - self.received
+            if remaining <= 0:
+                self.done = True
+                return b''
+            data = await self.reader.read(min(remaining, 65536))
+            if not data:
+                raise asyncio.IncompleteReadError(b'', remaining)
+            self.received += len(data)
+            return data
+        data = await self.reader.read(65536)
+        if not data:
+            self.done = True
+        return data
+
+    async def buffer(self, limit):
+        """Read the whole body if it fits in limit bytes; True if it did"""
+        if self.length is not None and self.length > limit:
+            return False
+        while True:
+            data = await self.read_chunk()
+            if not data:
+                return True
+            self.prefix += data
+            if self.length is not None:
+                continue
+            if len(self.prefix) > limit:
+                return False
+
+class CachingProxy:
+    """Caching HTTP forward proxy for every window and profile of the process.
+
+    Runs an asyncio server on a background thread. Plain HTTP GET and HEAD
+    responses are cached by namespace and URL, honoring Cache-Control,
+    Expires and validators; stale entries are revalidated with
+    If-None-Match / If-Modified-Since. Upstream connections are kept alive
+    and reused. HTTPS goes through CONNECT tunnels and is not cached.
+    Requests from private profiles carry a namespace header that keeps
+    their entries apart, in memory only.
+    """
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, port=0, max_object=16 * 1024 * 1024,
+                 max_idle_per_host=8, timeout=30):
+        self.store = ProxyCacheStore(directory, max_bytes)
+        self.port = port
+        self.max_object = max_object
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self.in_use = False
+        self.loop = None
+        self.thread = None
+        self.idle = {}  # (host, port) -> [(reader, writer), ...]
+        self.latencies = {'hit': deque(maxlen=512), 'miss': deque(maxlen=512), 'revalidated': deque(maxlen=512)}
+        self.counters = {
+            'requests': 0, 'hits': 0, 'revalidated': 0, 'misses': 0, 'uncacheable': 0, 'tunnels': 0,
+            'errors': 0, 'bytes_from_cache': 0, 'connections_opened': 0, 'connections_reused': 0,
+        }
+
+    def start(self):
+        """Start serving; returns the port"""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            try:
+                server = self.loop.run_until_complete(
+                    asyncio.start_server(self.handle_client, '127.0.0.1', self.port)
+                )
+                self.port = server.sockets[0].getsockname()[1]
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                return
+            started.set()
+            try:
+                self.loop.run_forever()
+            finally:
+                server.close()
+                tasks = asyncio.all_tasks(self.loop)
+                for task in tasks:
+                    task.cancel()
+                self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+                for connections in self.idle.values():
+                    for _, writer in connections:
+                        writer.close()
+                self.loop.close()
+
+        self.thread = threading.Thread(target=run, name='CachingProxy', daemon=True)
+        self.thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self.port
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.thread = None
+        self.store.save_index()
+
+    def drop_namespace(self, namespace):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.store.drop_namespace, namespace)
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                method, target, version = lines[0].split(' ', 2)
+                headers = [tuple(part.strip() for part in line.split(':', 1)) for line in lines[1:] if ':' in line]
+                length = get_header(headers, 'content-length')
+                body = await reader.readexactly(int(length)) if length and length.isdigit() else b''
+
+                self.counters['requests'] += 1
+                if method == 'CONNECT':
+                    self.counters['tunnels'] += 1
+                    await self.tunnel(target, reader, writer)
+                    break
+                connection = (get_header(headers, 'proxy-connection') or get_header(headers, 'connection') or '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                if not await self.handle_request(writer, method, target, headers, body) or not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError) as e:
+            self.counters['errors'] += 1
+            logging.getLogger('ZiBrowser').warning(f"Caching proxy client error: {e}")
+        except asyncio.CancelledError:
+            # Shutting down; end quietly
+            pass
+        finally:
+            writer.close()
+
+    async def tunnel(self, target, reader, writer):
+        host, _, port = target.rpartition(':')
+        try:
+            upstream_reader, upstream_writer = await asyncio.wait_for(
+                asyncio.open_connection(host.strip('[]'), int(port)), self.timeout
+            )
+        except (OSError, ValueError, asyncio.TimeoutError):
+            writer.write(b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n')
+            await writer.drain()
+            return
+        writer.write(b'HTTP/1.1 200 Connection Established\r\n\r\n')
+        await writer.drain()
+
+        async def pipe(source, destination):
+            try:
+                while True:
+                    data = await source.read(65536)
+                    if not data:
+                        break
+                    destination.write(data)
+                    await destination.drain()
+            except ConnectionError:
+                pass
+            finally:
+                destination.close()
+
+        await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+
+    async def handle_request(self, writer, method, target, headers, body):
+        """Answer one request; False if the client connection cannot be reused"""
+        started = time.perf_counter()
+        url = urllib.parse.urlsplit(target)
+        if url.scheme != 'http' or not url.hostname:
+            await self.send(writer, 400, 'Bad Request', [], b'')
+            return False
+
+        namespace = get_header(headers, CACHE_NAMESPACE_HEADER) or 'default'
+        headers = [(name, value) for name, value in headers
+                   if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != CACHE_NAMESPACE_HEADER.lower()]
+        request_directives = parse_cache_control(get_header(headers, 'cache-control'))
+        conditional = get_header(headers, 'if-none-match') or get_header(headers, 'if-modified-since')
+        cacheable = (method in ('GET', 'HEAD') and not conditional and 'no-store' not in request_directives
+                     and not get_header(headers, 'authorization') and not get_header(headers, 'range'))
+
+        meta = self.store.get(namespace, target) if cacheable else None
+        if meta is not None and any(get_header(headers, name) != value for name, value in meta['vary'].items()):
+            meta = None
+        if meta is not None:
+            age = time.time() - meta['stored']
+            revalidate = 'no-cache' in request_directives or request_directives.get('max-age') == '0'
+            if age < meta['fresh_for'] and not revalidate:
+                body_bytes = await self.loop.run_in_executor(None, self.store.read_body, meta)
+                if body_bytes is not None:
+                    self.counters['hits'] += 1
+                    self.counters['bytes_from_cache'] += len(body_bytes)
+                    await self.send_cached(writer, method, meta, body_bytes, age)
+                    self.latencies['hit'].append((time.perf_counter() - started) * 1000)
+                    return True
+
+        validators = []
+        if meta is not None:
+            if meta['etag']:
+                validators = [('If-None-Match', meta['etag'])]
+            elif meta['last_modified']:
+                validators = [('If-Modified-Since', meta['last_modified'])]
+            else:
+                meta = None
+
+        while True:
+            try:
+                response, release = await self.fetch(url, method, headers + validators, body)
+            except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                self.counters['errors'] += 1
+                await self.send(writer, 502, 'Bad Gateway', [], str(e).encode('utf-8', 'replace'))
+                return False
+            if meta is None or response.status != 304:
+                break
+            release(True)
+            # Still valid: refresh the stored headers and freshness, serve the stored body
+            updated = {name.lower() for name, _ in response.headers if name.lower() not in HOP_BY_HOP_HEADERS}
+            meta['headers'] = [[name, value] for name, value in meta['headers'] if name.lower() not in updated] + [
+                [name, value] for name, value in response.headers
+                if name.lower() in updated and name.lower() != 'content-length'
+            ]
+            now = time.time()
+            meta['stored'] = now
+            meta['fresh_for'] = freshness_lifetime(meta['headers'], now) or 0
+            body_bytes = await self.loop.run_in_executor(None, self.store.read_body, meta)
+            if body_bytes is not None:
+                self.counters['revalidated'] += 1
+                self.counters['bytes_from_cache'] += len(body_bytes)
+                await self.send_cached(writer, method, meta, body_bytes, 0)
+                self.latencies['revalidated'].append((time.perf_counter() - started) * 1000)
+                return True
+            # The stored body is gone: drop the entry and fetch it again without validators
+            self.store.remove(namespace, target)
+            meta, validators = None, []
+
+        fits = await response.buffer(self.max_object)
+        response_headers = [(name, value) for name, value in response.headers if name.lower() not in HOP_BY_HOP_HEADERS]
+        if fits:
+            release(not response.until_close)
+            now = time.time()
+            fresh_for = freshness_lifetime(response.headers, now) if cacheable and method == 'GET' else None
+            vary = get_header(response.headers, 'vary')
+            if fresh_for is not None and response.status in CACHEABLE_STATUSES and vary != '*':
+                meta = {
+                    'namespace': namespace, 'url': target, 'status': response.status, 'reason': response.reason,
+                    'headers': [[name, value] for name, value in response_headers if name.lower() != 'content-length'],
+                    'stored': now, 'fresh_for': fresh_for,
+                    'etag': get_header(response.headers, 'etag'),
+                    'last_modified': get_header(response.headers, 'last-modified'),
+                    'vary': {name.strip().lower(): get_header(headers, name.strip())
+                             for name in (vary or '').split(',') if name.strip()},
+                }
+                digest = None
+                if not self.store.is_private(namespace):
+                    digest = await self.loop.run_in_executor(None, self.store.write_body, response.prefix)
+                self.store.put(meta, response.prefix, digest)
+                self.counters['misses'] += 1
+            else:
+                self.counters['uncacheable'] += 1
+            await self.send(writer, response.status, response.reason, response_headers, response.prefix,
+                            head_only=response.no_body)
+            self.latencies['miss'].append((time.perf_counter() - started) * 1000)
+            return True
+
+        # Too big to cache: stream the rest through
+        self.counters['uncacheable'] += 1
+        if response.length is not None:
+            response_headers.append(('Content-Length', str(response.length)))
+        elif response.chunked:
+            response_headers.append(('Transfer-Encoding', 'chunked'))
+        else:
+            response_headers.append(('Connection', 'close'))
+        writer.write(self.head(response.status, response.reason, response_headers))
+        data = response.prefix
+        while True:
+            if data:
+                writer.write(b'%x\r\n%s\r\n' % (len(data), data) if response.chunked else data)
+                await writer.drain()
+            data = await response.read_chunk()
+            if not data:
+                break
+        if response.chunked:
+            writer.write(b'0\r\n\r\n')
+        await writer.drain()
+        release(not response.until_close)
+        return not response.until_close
+
+    async def connect(self, host, port):
+        connections = self.idle.get((host, port))
+        while connections:
+            reader, writer = connections.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.counters['connections_reused'] += 1
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        self.counters['connections_opened'] += 1
+        return reader, writer, False
+
+    async def fetch(self, url, method, headers, body):
+        """Send a request upstream on a pooled connection.
+
+        Returns the response and a function to call with True once its body
+        has been read and the connection can go back to the pool.
+        """
+        host, port = url.hostname, url.port or 80
+        path = url.path or '/'
+        if url.query:
+            path += '?' + url.query
+        request_headers = [(name, value) for name, value in headers if name.lower() != 'host']
+        request_headers = [('Host', url.netloc)] + request_headers + [('Connection', 'keep-alive')]
+        if body:
+            request_headers.append(('Content-Length', str(len(body))))
+        request = f"{method} {path} HTTP/1.1\r\n".encode('latin-1') + b''.join(
+            f"{name}: {value}\r\n".encode('latin-1') for name, value in request_headers
+        ) + b'\r\n' + body
+
+        for attempt in range(2):
+            reader, writer, reused = await self.connect(host, port)
+            try:
+                writer.write(request)
+                await writer.drain()
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.timeout)
+                break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                # A pooled connection may have been closed by the server meanwhile; retry once on a fresh one
+                if not reused or attempt:
+                    raise
+        lines = head.decode('latin-1').split('\r\n')
+        version, status, *reason = lines[0].split(' ', 2)
+        response_headers = [tuple(part.strip() for part in line.split(':', 1)) for line in lines[1:] if ':' in line]
+        response = UpstreamResponse(reader, method, int(status), reason[0] if reason else '', response_headers)
+
+        def release(reusable):
+            close = (get_header(response_headers, 'connection') or '').lower() == 'close'
+            idle = self.idle.setdefault((host, port), [])
+            if reusable and not close and version == 'HTTP/1.1' and len(idle) < self.max_idle_per_host:
+                idle.append((reader, writer))
+            else:
+                writer.close()
+
+        return response, release
+
+    @staticmethod
+    def head(status, reason, headers):
+        return f"HTTP/1.1 {status} {reason}\r\n".encode('latin-1') + b''.join(
+            f"{name}: {value}\r\n".encode('latin-1') for name, value in headers
+        ) + b'\r\n'
+
+    async def send(self, writer, status, reason, headers, body, head_only=False):
+        if not head_only:
+            headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+            headers.append(('Content-Length', str(len(body))))
+        writer.write(self.head(status, reason, headers) + (b'' if head_only else body))
+        await writer.drain()
+
+    async def send_cached(self, writer, method, meta, body, age):
+        headers = [(name, value) for name, value in meta['headers'] if name.lower() != 'age']
+        headers += [('Age', str(int(age))), ('Content-Length', str(len(body))), ('X-Cache', 'HIT')]
+        writer.write(self.head(meta['status'], meta['reason'], headers) + (b'' if method == 'HEAD' else body))
+        await writer.drain()
+
+    def stats(self):
+        stats = dict(self.counters)
+        cacheable = self.counters['hits'] + self.counters['revalidated'] + self.counters['misses']
+        stats['hit_rate'] = round((self.counters['hits'] + self.counters['revalidated']) / cacheable, 3) if cacheable else 0.0
+        for name, samples in list(self.latencies.items()):
+            if samples:
+                stats[f'{name}_p50_ms'] = round(statistics.median(list(samples)), 2)
+        stats['entries'] = len(self.store.entries)
+        stats['disk_mb'] = round(self.store.disk_total / (1024 * 1024), 1)
+        return stats
+
+CACHING_PROXY = None
+
+def get_caching_proxy():
+    """Process-wide caching proxy, started on first use and stopped on quit"""
+    global CACHING_PROXY
+    if CACHING_PROXY is None:
+        settings = get_settings()
+        CACHING_PROXY = CachingProxy(
+            os.path.join(DATA_PATH, 'proxy-cache'),
+            max_bytes=settings.get('caching_proxy_max_mb') * 1024 * 1024,
+            port=settings.get('caching_proxy_port'),
+        )
+        CACHING_PROXY.start()
+        QApplication.instance().aboutToQuit.connect(CACHING_PROXY.close)
+    return CACHING_PROXY
+
+class AdBlocker(QWebEngineUrlRequestInterceptor):
+    def __init__(self, cache_namespace=None):
         super().__init__()
+        # Keeps a private profile's entries apart in the caching proxy
+        self.cache_namespace = cache_namespace
         self.ad_domains = [
             "ads.", "doubleclick.", "advertising.", "banners.",
             "analytics.", "trackers.", "pixel."
         ]
+        # Hosts blocked by the user, e.g. from the main-thread blockers report.
+        # Replaced as a whole, never mutated, because requests are intercepted on another thread.
+        self.blocked_hosts = frozenset(get_settings().get('blocked_hosts'))
+        self.policy = get_request_policy()
+        self.https = get_https_upgrader()
+        # Private profiles learn nothing; their failed hosts are forgotten with them
+        self.learn_https = cache_namespace is None
+        self.https_failed = frozenset()
+        self.normalizer = UrlNormalizer()
+
+    def block_hosts(self, hosts):
+        self.blocked_hosts = self.blocked_hosts | frozenset(hosts)
+        get_settings().set('blocked_hosts', sorted(self.blocked_hosts))
+
+    def https_fall_back(self, host):
+        """Stop upgrading a host whose HTTPS load failed"""
+        if self.learn_https:
+            self.https.fall_back(host)
+        else:
+            self.https_failed = self.https_failed | {host}
 
     def interceptRequest(self, info):
         url = info.requestUrl().toString()
-        if any(ad in url.lower() for ad in self.ad_domains):
+        # Only plain HTTP passes through the proxy readably; HTTPS would carry the header to the site
+        if self.cache_namespace and CACHING_PROXY is not None and CACHING_PROXY.in_use \
+                and info.requestUrl().scheme() == 'http':
+            info.setHttpHeader(CACHE_NAMESPACE_HEADER.encode('latin-1'), self.cache_namespace.encode('latin-1'))
+        blocked = any(ad in url.lower() for ad in self.ad_domains)
+        if not blocked and self.blocked_hosts:
+            blocked = host_matches(info.requestUrl().host(), self.blocked_hosts)
+        if not blocked:
+            blocked = self.policy.decide(info.resourceType(), info.requestUrl().host(), info.firstPartyUrl().host())
+        if blocked:
             info.block(True)
+        upgraded = not blocked and self.https.upgrade(info, self.learn_https, self.https_failed)
+        normalized = None
+        if not blocked and not upgraded and info.requestMethod() == b'GET':
+            # A rewritten URL comes back through here, already clean
+            normalized = self.normalizer.normalize(info.requestUrl(), info.resourceType())
+            if normalized is not None:
+                info.redirect(normalized)
+
+        if TRACER.enabled:
+            action = 'block' if blocked else 'upgrade' if upgraded else 'normalize' if normalized is not None else 'allow'
+            TRACER.instant(
+                action, 'interceptor', TRACE_TID_NETWORK,
+                url=url,
+                resource_type=RESOURCE_TYPE_NAMES.get(info.resourceType(), 'unknown'),
+                first_party=info.firstPartyUrl().toString(),
+            )
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSET_BUNDLE_PATH = os.path.join(APP_DIR, 'assets.zip')
+ASSET_DIRECTORIES = ('images',)  # page scripts are inlined where they are injected
+
+# Standard style icons for names with no image of their own
+ICON_FALLBACKS = {
+    'about': QStyle.SP_MessageBoxInformation,
+    'back': QStyle.SP_ArrowBack,
+    'bookmark': QStyle.SP_FileLinkIcon,
+    'dark-mode': QStyle.SP_DesktopIcon,
+    'delete': QStyle.SP_TrashIcon,
+    'developer': QStyle.SP_FileDialogInfoView,
+    'download-video': QStyle.SP_MediaPlay,
+    'downloads': QStyle.SP_ArrowDown,
+    'forward': QStyle.SP_ArrowForward,
+    'history': QStyle.SP_FileDialogDetailedView,
+    'home': QStyle.SP_DirHomeIcon,
+    'https': QStyle.SP_VistaShield,
+    'icon': QStyle.SP_ComputerIcon,
+    'jank': QStyle.SP_MessageBoxWarning,
+    'jobs': QStyle.SP_FileDialogListView,
+    'memory': QStyle.SP_DriveHDIcon,
+    'mute': QStyle.SP_MediaVolumeMuted,
+    'newtab': QStyle.SP_FileIcon,
+    'offline': QStyle.SP_DirIcon,
+    'pin': QStyle.SP_DialogApplyButton,
+    'private': QStyle.SP_DialogNoButton,
+    'reload': QStyle.SP_BrowserReload,
+    'save': QStyle.SP_DialogSaveButton,
+    'search': QStyle.SP_FileDialogContentsView,
+    'speculation': QStyle.SP_MediaSeekForward,
+    'suspended': QStyle.SP_MediaPause,
+    'test': QStyle.SP_DialogHelpButton,
+    'trace': QStyle.SP_MediaSkipForward,
+    'volume-down': QStyle.SP_MediaVolume,
+    'volume-up': QStyle.SP_MediaVolume,
+}
+
+def build_asset_bundle(path=ASSET_BUNDLE_PATH, root=APP_DIR):
+    """Pack images/ into one zip; returns the number of files"""
+    count = 0
+    with zipfile.ZipFile(path + '.tmp', 'w') as bundle:
+        for directory in ASSET_DIRECTORIES:
+            for dirpath, _, filenames in os.walk(os.path.join(root, directory)):
+                for filename in sorted(filenames):
+                    full_path = os.path.join(dirpath, filename)
+                    # Images are compressed already
+                    compression = zipfile.ZIP_STORED if filename.endswith('.png') else zipfile.ZIP_DEFLATED
+                    bundle.write(full_path, os.path.relpath(full_path, root).replace(os.sep, '/'), compression)
+                    count += 1
+    os.replace(path + '.tmp', path)
+    return count
+
+class AssetBundle:
+    """Application assets, read from assets.zip in one go when it exists.
+
+    Members are decompressed on first use. Files missing from the bundle,
+    or every file when there is no bundle, are read relative to the
+    application directory rather than the working directory, and misses
+    are remembered so a missing asset costs one lookup per process.
+    """
+    def __init__(self, path=ASSET_BUNDLE_PATH, root=APP_DIR):
+        self.root = root
+        self.archive = None
+        self.names = frozenset()
+        self.cache = {}
+        self.missing = set()
+        self.lookups = 0  # file-system lookups made so far
+        try:
+            self.lookups += 1
+            with open(path, 'rb') as f:
+                self.archive = zipfile.ZipFile(io.BytesIO(f.read()))
+            self.names = frozenset(self.archive.namelist())
+        except (OSError, zipfile.BadZipFile):
+            self.archive = None
+
+    def read(self, name):
+        """Bytes of an asset given its path relative to the app directory, or None"""
+        data = self.cache.get(name)
+        if data is not None or name in self.missing:
+            return data
+        if name in self.names:
+            data = self.archive.read(name)
+        else:
+            self.lookups += 1
+            try:
+                with open(os.path.join(self.root, *name.split('/')), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                self.missing.add(name)
+                return None
+        self.cache[name] = data
+        return data
+
+class LazyIconEngine(QIconEngine):
+    """Icon that decodes its image data the first time it is drawn"""
+    def __init__(self, data):
+        super().__init__()
+        self.data = data
+        self.image = None
+
+    def source(self):
+        if self.image is None:
+            self.image = QPixmap()
+            self.image.loadFromData(self.data)
+        return self.image
+
+    def pixmap(self, size, mode, state):
+        source = self.source()
+        if source.isNull():
+            return QPixmap()
+        pixmap = source.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if mode == QIcon.Disabled:
+            pixmap = QApplication.style().generatedIconPixmap(QIcon.Disabled, pixmap, QStyleOption())
+        return pixmap
+
+    def paint(self, painter, rect, mode, state):
+        painter.drawPixmap(rect, self.pixmap(rect.size(), mode, state))
+
+    def clone(self):
+        engine = LazyIconEngine(self.data)
+        engine.image = self.image
+        return engine
+
+class IconRegistry:
+    """One QIcon per name, built on first request from the asset bundle"""
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self.icons = {}
+
+    def icon(self, name):
+        icon = self.icons.get(name)
+        if icon is None:
+            data = self.bundle.read(f'images/{name}.png')
+            if data:
+                icon = QIcon(LazyIconEngine(data))
+            elif name in ICON_FALLBACKS:
+                icon = QApplication.style().standardIcon(ICON_FALLBACKS[name])
+            else:
+                icon = QIcon()
+            self.icons[name] = icon
+        return icon
+
+ICON_REGISTRY = None
+
+def get_icon(name):
+    """Application icon by name, e.g. get_icon('back') for images/back.png"""
+    global ICON_REGISTRY
+    if ICON_REGISTRY is None:
+        ICON_REGISTRY = IconRegistry(AssetBundle())
+    return ICON_REGISTRY.icon(name)
 
 class BrowserLogger:
     def __init__(self):
         self.logger = logging.getLogger('ZiBrowser')
         self.logger.setLevel(logging.WARNING)
         
-        handler = logging.FileHandler('zibrowser.log')
-        handler.setFormatter(logging.Formatter(
-            '%(asctime)s - %(levelname)s - %(message)s'
-        ))
-        self.logger.addHandler(handler)
+        # The logger is process-wide, so only the first instance adds the handler
+        if not self.logger.handlers:
+            handler = logging.FileHandler('zibrowser.log')
+            handler.setFormatter(logging.Formatter(
+                '%(asctime)s - %(levelname)s - %(message)s'
+            ))
+            self.logger.addHandler(handler)
     
     def log_js_error(self, message):
         self.logger.warning(f"JavaScript Error: {message}")
@@ -49,21 +1365,1733 @@ DEFAULT_SEARCH_ENGINES = {
     'Ecosia': 'https://www.ecosia.org/search?q={}'
 }
 
+# Jobs that pages can run through window.pythonJobs.submit(name, payload).
+# They run off the GUI thread, possibly in another process, so they must be
+# plain module-level functions taking and returning JSON-compatible values.
+def job_uppercase(payload):
+    return str(payload).upper()
+
+def job_sha256(payload):
+    return hashlib.sha256(str(payload).encode('utf-8')).hexdigest()
+
+def job_word_frequencies(payload):
+    counts = {}
+    for word in re.findall(r"\w+", str(payload).lower()):
+        counts[word] = counts.get(word, 0) + 1
+    return sorted(counts.items(), key=lambda item: item[1], reverse=True)[:50]
+
+BRIDGE_JOBS = {
+    'uppercase': job_uppercase,
+    'sha256': job_sha256,
+    'word_frequencies': job_word_frequencies,
+}
+
+class JobStats:
+    """Latency figures for one job type"""
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=256)
+
+    def add(self, latency_ms, ok):
+        if ok:
+            self.completed += 1
+        else:
+            self.failed += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.recent.append(latency_ms)
+
+    def percentile(self, fraction):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def as_dict(self):
+        finished = self.completed + self.failed
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'rejected': self.rejected,
+            'mean_ms': round(self.total_ms / finished, 2) if finished else 0.0,
+            'p50_ms': round(self.percentile(0.5), 2),
+            'p95_ms': round(self.percentile(0.95), 2),
+            'max_ms': round(self.max_ms, 2),
+        }
+
+class BridgeJob:
+    def __init__(self, job_id, name, payload, origin, on_done):
+        self.job_id = job_id
+        self.name = name
+        self.payload = payload
+        self.origin = origin
+        self.on_done = on_done
+        self.submitted = time.perf_counter()
+        self.future = None
+        self.cancelled = False
+
+class BridgeJobRunner(QObject):
+    """Runs named bridge jobs on a bounded worker pool.
+
+    At most per_origin_limit jobs per origin run at once; further jobs wait
+    in a per-origin queue. Once max_pending jobs are queued or running, new
+    submissions are rejected with 'busy' so pages can back off.
+    """
+    completed = pyqtSignal(object)
+
+    def __init__(self, max_workers=4, max_pending=64, per_origin_limit=2, use_processes=False, jobs=None):
+        super().__init__()
+        executor_class = concurrent.futures.ProcessPoolExecutor if use_processes else concurrent.futures.ThreadPoolExecutor
+        self.executor = executor_class(max_workers=max_workers)
+        self.jobs = dict(BRIDGE_JOBS if jobs is None else jobs)
+        self.max_pending = max_pending
+        self.per_origin_limit = per_origin_limit
+        self.pending = {}  # job id -> BridgeJob, queued or running
+        self.waiting = {}  # origin -> deque of queued jobs
+        self.running = {}  # origin -> number of running jobs
+        self.stats = {}
+        # Futures complete on pool threads; hop back to the GUI thread
+        self.completed.connect(self.on_completed, Qt.QueuedConnection)
+
+    def stats_for(self, name):
+        if name not in self.stats:
+            self.stats[name] = JobStats()
+        return self.stats[name]
+
+    def submit(self, job_id, name, payload, origin, on_done):
+        """Queue a job; on_done(job_id, reply) is called on the GUI thread.
+
+        Returns 'queued', or the reason the job was rejected.
+        """
+        if name not in self.jobs:
+            return 'unknown job'
+        if job_id in self.pending:
+            return 'duplicate job id'
+        if len(self.pending) >= self.max_pending:
+            self.stats_for(name).rejected += 1
+            return 'busy'
+
+        job = BridgeJob(job_id, name, payload, origin, on_done)
+        self.pending[job_id] = job
+        self.waiting.setdefault(origin, deque()).append(job)
+        TRACER.instant('submit', 'job', TRACE_TID_BROWSER, job=name, origin=origin)
+        self.pump(origin)
+        return 'queued'
+
+    def pump(self, origin):
+        waiting = self.waiting.get(origin)
+        while waiting and self.running.get(origin, 0) < self.per_origin_limit:
+            job = waiting.popleft()
+            self.running[origin] = self.running.get(origin, 0) + 1
+            job.future = self.executor.submit(self.jobs[job.name], job.payload)
+            job.future.add_done_callback(lambda future, job=job: self.completed.emit(job))
+        if not waiting:
+            self.waiting.pop(origin, None)
+
+    def cancel(self, job_id):
+        job = self.pending.get(job_id)
+        if job is None:
+            return False
+        job.cancelled = True
+        waiting = self.waiting.get(job.origin)
+        if job.future is None and waiting and job in waiting:
+            waiting.remove(job)
+            self.finish(job, {'ok': False, 'error': 'cancelled'})
+        elif job.future is not None:
+            # A job that already started keeps running; its result is dropped
+            job.future.cancel()
+        return True
+
+    def on_completed(self, job):
+        self.running[job.origin] -= 1
+        if not self.running[job.origin]:
+            del self.running[job.origin]
+
+        if job.cancelled:
+            reply = {'ok': False, 'error': 'cancelled'}
+        else:
+            try:
+                reply = {'ok': True, 'result': job.future.result()}
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+        self.finish(job, reply)
+        self.pump(job.origin)
+
+    def finish(self, job, reply):
+        self.pending.pop(job.job_id, None)
+        latency_ms = (time.perf_counter() - job.submitted) * 1000
+        stats = self.stats_for(job.name)
+        if job.cancelled:
+            stats.cancelled += 1
+        else:
+            stats.add(latency_ms, reply['ok'])
+        reply['latency_ms'] = round(latency_ms, 2)
+        TRACER.instant('finish', 'job', TRACE_TID_BROWSER, job=job.name, origin=job.origin, ok=reply['ok'])
+        try:
+            job.on_done(job.job_id, json.dumps(reply))
+        except (TypeError, ValueError) as e:
+            job.on_done(job.job_id, json.dumps({'ok': False, 'error': f"unserializable result: {e}"}))
+
+    def metrics(self):
+        return {name: stats.as_dict() for name, stats in sorted(self.stats.items())}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def page_origin(page):
+    """scheme://host[:port] of the page's current URL"""
+    url = page.url()
+    origin = f"{url.scheme()}://{url.host()}"
+    if url.port() != -1:
+        origin += f":{url.port()}"
+    return origin
+
+DATA_PATH = os.path.join(os.path.expanduser("~"), "ZiBrowserData")
+
+SETTINGS_VERSION = 1
+
+# Every persisted setting: key -> (type, default). Values read from disk
+# are coerced to the type here, so callers never pass type= or defaults.
+SETTINGS_SCHEMA = {
+    'search_engine': (str, 'Google'),
+    'search_engines': (dict, DEFAULT_SEARCH_ENGINES),
+    'bookmarks': (dict, {}),
+    'blocked_hosts': (list, []),
+    'request_policy': (dict, {}),
+    'https_hosts': (list, []),
+    'https_failed': (list, []),
+    'tracking_params': (dict, {}),  # empty means DEFAULT_TRACKING_PARAMS
+    'strip_tracking_params': (bool, True),
+    'origin_profiles': (dict, {}),
+    'performance_mode': (bool, False),
+    'load_images': (bool, True),
+    'prerender_enabled': (bool, True),
+    'watchdog_auto_reload': (bool, True),
+    'startup_warmup_enabled': (bool, True),
+    'caching_proxy_enabled': (bool, False),
+    'caching_proxy_max_mb': (int, 512),
+    'caching_proxy_port': (int, 0),
+    'capture_backend': (str, 'jsonl'),
+    'capture_compress': (bool, False),
+    'max_live_tabs': (int, 8),
+    'memory_monitor_enabled': (bool, True),
+    'memory_poll_seconds': (int, 5),
+    'max_background_loads': (int, 2),
+}
+
+def coerce_setting(kind, value, default):
+    """Value as the schema type, or a copy of the default if it cannot be read as one"""
+    if value is None:
+        value = default
+    elif kind is bool and isinstance(value, (str, int)):
+        # QSettings hands booleans back as 'true' / 'false'
+        value = value.lower() in ('true', '1', 'yes') if isinstance(value, str) else bool(value)
+    elif kind is int and not isinstance(value, bool):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = default
+    elif kind is list and isinstance(value, (str, tuple)):
+        # QSettings returns a one-element list as a plain string
+        value = [value] if isinstance(value, str) else list(value)
+    if not isinstance(value, kind):
+        value = default
+    return type(value)(value) if kind in (list, dict) else value
+
+def migrate_settings_v0(values):
+    """Version 0 -> 1: import what used to live in QSettings"""
+    for group in ('Settings', 'Bookmarks'):
+        qsettings = QSettings('ZiBrowser', group)
+        for key in qsettings.allKeys():
+            if key in SETTINGS_SCHEMA:
+                values[key] = qsettings.value(key)
+    # These two were stored as JSON text
+    for key in ('request_policy', 'tracking_params'):
+        if isinstance(values.get(key), str):
+            try:
+                values[key] = json.loads(values[key] or 'null')
+            except ValueError:
+                del values[key]
+    return values
+
+# version -> function upgrading the stored values from that version to the next
+SETTINGS_MIGRATIONS = {
+    0: migrate_settings_v0,
+}
+
+class SettingsStore(QObject):
+    """Typed application settings, read once and written behind.
+
+    The file is loaded at startup, so get() is a dictionary lookup. set()
+    checks the value against SETTINGS_SCHEMA, emits changed(key, value) so
+    open windows apply it live, and schedules a write; every change made
+    within write_delay ms goes to disk in one atomic replace of the file.
+    Values are shared: set() a new list or dict rather than mutating the
+    one get() returned.
+    """
+    changed = pyqtSignal(str, object)
+
+    def __init__(self, path, write_delay=500, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.dirty = False
+        self.quitting = False
+        self.counters = {'sets': 0, 'writes': 0, 'migrations': 0}
+        self.write_timer = QTimer(self)
+        self.write_timer.setSingleShot(True)
+        self.write_timer.setInterval(write_delay)
+        self.write_timer.timeout.connect(self.flush)
+        self.values = self.load()
+        if self.dirty:
+            # Write the migrated file straight away so the migration runs once
+            self.flush()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            saved = {'version': 0, 'values': {}}
+        except (OSError, ValueError) as e:
+            logging.getLogger('ZiBrowser').warning(f"Unreadable settings file, using defaults: {e}")
+            saved = {}
+        version = saved.get('version', SETTINGS_VERSION)
+        values = saved.get('values', {})
+        while version in SETTINGS_MIGRATIONS:
+            values = SETTINGS_MIGRATIONS[version](values)
+            version += 1
+            self.counters['migrations'] += 1
+            self.dirty = True
+        # Keys this version does not know are kept, so a downgrade loses nothing
+        loaded = dict(values)
+        for key, (kind, default) in SETTINGS_SCHEMA.items():
+            loaded[key] = coerce_setting(kind, values.get(key), default)
+        return loaded
+
+    def get(self, key):
+        return self.values[key]
+
+    def set(self, key, value):
+        kind, _ = SETTINGS_SCHEMA[key]
+        if kind is list and isinstance(value, (tuple, set, frozenset)):
+            value = list(value)
+        if not isinstance(value, kind):
+            raise TypeError(f"Setting {key} is {kind.__name__}, not {type(value).__name__}")
+        if self.values[key] == value:
+            return
+        self.values[key] = value
+        self.counters['sets'] += 1
+        self.dirty = True
+        if self.quitting:
+            # No event loop left to run the timer
+            self.flush()
+        elif not self.write_timer.isActive():
+            self.write_timer.start()
+        self.changed.emit(key, value)
+
+    def flush(self):
+        self.write_timer.stop()
+        if not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        try:
+            with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'version': SETTINGS_VERSION, 'values': self.values}, f, indent=1, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as e:
+            logging.getLogger('ZiBrowser').warning(f"Settings write failed: {e}")
+            return
+        self.dirty = False
+        self.counters['writes'] += 1
+
+    def close(self):
+        self.quitting = True
+        self.flush()
+
+SETTINGS = None
+
+def get_settings():
+    """Process-wide settings store, loaded on first use and flushed on quit"""
+    global SETTINGS
+    if SETTINGS is None:
+        SETTINGS = SettingsStore(os.path.join(DATA_PATH, 'settings.json'))
+        QApplication.instance().aboutToQuit.connect(SETTINGS.close)
+    return SETTINGS
+
+class CaptureSink:
+    """Buffers page-data records and writes them in batches from a writer thread.
+
+    put() only appends to an in-memory buffer. The writer flushes when
+    max_batch records are waiting or every flush_interval seconds, to
+    rotating JSONL files (optionally gzip-compressed) or to a SQLite table.
+    close() writes whatever is left and syncs it to disk; records put
+    after that are counted as dropped and logged once.
+    """
+    def __init__(self, directory, backend='jsonl', compress=False, max_batch=500,
+                 flush_interval=2.0, max_bytes=10 * 1024 * 1024, backups=5, max_buffer=100000):
+        self.directory = directory
+        self.backend = backend
+        self.compress = compress
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.max_buffer = max_buffer
+
+        self.buffer = deque()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.closing = False
+        self.written = 0
+        self.dropped = 0
+        self.late = 0  # records put after close()
+        self.batches = 0
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.writer = threading.Thread(target=self.run, name='CaptureSink', daemon=True)
+        self.writer.start()
+
+    def put(self, record):
+        with self.lock:
+            if self.closing:
+                # The writer has taken its last batch or is about to
+                self.dropped += 1
+                self.late += 1
+                if self.late == 1:
+                    logging.getLogger('ZiBrowser').warning("Capture record put after close was dropped")
+                return
+            if len(self.buffer) >= self.max_buffer:
+                self.buffer.popleft()
+                self.dropped += 1
+            self.buffer.append(record)
+            full = len(self.buffer) >= self.max_batch
+        if full:
+            self.wakeup.set()
+
+    def take_batch(self):
+        with self.lock:
+            batch = list(self.buffer)
+            self.buffer.clear()
+        return batch
+
+    def run(self):
+        self.open_backend()
+        try:
+            while True:
+                self.wakeup.wait(self.flush_interval)
+                self.wakeup.clear()
+                closing = self.closing
+                batch = self.take_batch()
+                if batch:
+                    self.write(batch)
+                if closing:
+                    break
+        finally:
+            self.close_backend()
+
+    def open_backend(self):
+        if self.backend == 'sqlite':
+            self.db = sqlite3.connect(os.path.join(self.directory, 'capture.sqlite3'))
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS captures ('
+                'id INTEGER PRIMARY KEY, ts REAL, origin TEXT, tab INTEGER, content TEXT)'
+            )
+            self.db.commit()
+        else:
+            self.path = os.path.join(self.directory, 'capture.jsonl' + ('.gz' if self.compress else ''))
+            self.file = self.open_file()
+
+    def open_file(self):
+        if self.compress:
+            return gzip.open(self.path, 'at', encoding='utf-8')
+        return open(self.path, 'a', encoding='utf-8')
+
+    def write(self, batch):
+        try:
+            if self.backend == 'sqlite':
+                with self.db:
+                    self.db.executemany(
+                        'INSERT INTO captures (ts, origin, tab, content) VALUES (?, ?, ?, ?)',
+                        [(r['ts'], r['origin'], r['tab'], r['content']) for r in batch]
+                    )
+            else:
+                self.file.write(''.join(json.dumps(r) + '\n' for r in batch))
+                self.file.flush()
+                if os.path.getsize(self.path) >= self.max_bytes:
+                    self.rotate()
+            self.written += len(batch)
+            self.batches += 1
+        except (OSError, sqlite3.Error) as e:
+            self.dropped += len(batch)
+            logging.getLogger('ZiBrowser').warning(f"Capture write failed: {e}")
+
+    def rotate(self):
+        """capture.jsonl -> capture.1.jsonl -> ... -> capture.N.jsonl (dropped)"""
+        self.file.close()
+        directory, name = os.path.split(self.path)
+        stem, extension = name.split('.', 1)
+        numbered = lambda n: os.path.join(directory, f"{stem}.{n}.{extension}")
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(numbered(n)):
+                os.replace(numbered(n), numbered(n + 1))
+        os.replace(self.path, numbered(1))
+        self.file = self.open_file()
+
+    def close_backend(self):
+        if self.backend == 'sqlite':
+            self.db.close()
+        else:
+            self.file.flush()
+            if self.compress:
+                self.file.close()
+                # The gzip trailer is only written by close(), so sync the file after it
+                with open(self.path, 'rb') as f:
+                    os.fsync(f.fileno())
+            else:
+                os.fsync(self.file.fileno())
+                self.file.close()
+
+    def close(self):
+        """Flush everything still buffered and stop the writer"""
+        with self.lock:
+            if self.closing:
+                return
+            self.closing = True
+        self.wakeup.set()
+        self.writer.join()
+
+CAPTURE_SINK = None
+
+def get_capture_sink():
+    """Process-wide capture sink, created on first use and closed on quit"""
+    global CAPTURE_SINK
+    if CAPTURE_SINK is None:
+        settings = get_settings()
+        CAPTURE_SINK = CaptureSink(
+            os.path.join(DATA_PATH, 'capture'),
+            backend=settings.get('capture_backend'),
+            compress=settings.get('capture_compress'),
+        )
+        QApplication.instance().aboutToQuit.connect(CAPTURE_SINK.close)
+    return CAPTURE_SINK
+
+class PageIndexer:
+    """Full-text index of visited pages, written by a background thread.
+
+    Pages are queued with submit(), which never blocks: when the bounded
+    queue is full the page is skipped. Text is stored once per content hash,
+    so revisits and mirrored pages only update the document row; text no
+    document points at any more is deleted.
+    """
+    def __init__(self, db_path, max_queue=256, batch_size=64):
+        self.db_path = db_path
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.indexed = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.reader = None
+
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.create_schema(sqlite3.connect(db_path))
+        self.writer = threading.Thread(target=self.run, name='PageIndexer', daemon=True)
+        self.writer.start()
+
+    def create_schema(self, db):
+        db.execute('PRAGMA journal_mode=WAL')
+        db.executescript(
+            'CREATE TABLE IF NOT EXISTS texts (id INTEGER PRIMARY KEY, hash TEXT UNIQUE);'
+            'CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(title, body);'
+            'CREATE TABLE IF NOT EXISTS documents ('
+            '  url TEXT PRIMARY KEY, title TEXT, text_id INTEGER, visited_at REAL);'
+            'CREATE INDEX IF NOT EXISTS documents_text ON documents (text_id);'
+        )
+        db.commit()
+        db.close()
+
+    def submit(self, url, title, text, block=False):
+        try:
+            self.queue.put((url, title, text, time.time()), block=block)
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        db = sqlite3.connect(self.db_path)
+        db.execute('PRAGMA synchronous=NORMAL')
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                with db:
+                    for url, title, text, visited_at in batch:
+                        self.index(db, url, title, text, visited_at)
+            except sqlite3.Error as e:
+                logging.getLogger('ZiBrowser').warning(f"Indexing failed: {e}")
+        db.close()
+
+    def index(self, db, url, title, text, visited_at):
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        row = db.execute('SELECT id FROM texts WHERE hash = ?', (digest,)).fetchone()
+        if row:
+            text_id = row[0]
+            self.deduplicated += 1
+        else:
+            text_id = db.execute('INSERT INTO texts (hash) VALUES (?)', (digest,)).lastrowid
+            db.execute('INSERT INTO page_text (rowid, title, body) VALUES (?, ?, ?)', (text_id, title, text))
+            self.indexed += 1
+        old = db.execute('SELECT text_id FROM documents WHERE url = ?', (url,)).fetchone()
+        db.execute(
+            'INSERT OR REPLACE INTO documents (url, title, text_id, visited_at) VALUES (?, ?, ?, ?)',
+            (url, title, text_id, visited_at)
+        )
+        if old and old[0] != text_id and not db.execute(
+                'SELECT 1 FROM documents WHERE text_id = ? LIMIT 1', (old[0],)).fetchone():
+            # The page changed and nothing else shows the old text
+            db.execute('DELETE FROM texts WHERE id = ?', (old[0],))
+            db.execute('DELETE FROM page_text WHERE rowid = ?', (old[0],))
+
+    def search(self, text, limit=50):
+        """Return (url, title, snippet) for pages matching every word, best first"""
+        words = re.findall(r"\w+", text)
+        if not words:
+            return []
+        match = ' '.join(f'"{word}"*' for word in words)
+        # Searches run on the calling thread with their own connection
+        if self.reader is None:
+            self.reader = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self.reader.execute(
+            'SELECT d.url, d.title, snippet(page_text, 1, \'[\', \']\', \'...\', 12) '
+            'FROM page_text JOIN documents d ON d.text_id = page_text.rowid '
+            'WHERE page_text MATCH ? ORDER BY bm25(page_text) LIMIT ?',
+            (match, limit)
+        ).fetchall()
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+
+PAGE_INDEXER = None
+
+def get_page_indexer():
+    """Process-wide page indexer, created on first use and closed on quit"""
+    global PAGE_INDEXER
+    if PAGE_INDEXER is None:
+        PAGE_INDEXER = PageIndexer(os.path.join(DATA_PATH, 'index.sqlite3'))
+        QApplication.instance().aboutToQuit.connect(PAGE_INDEXER.close)
+    return PAGE_INDEXER
+
+class HistoryStore:
+    """Visited pages, newest first, paged for zi://history"""
+    def __init__(self, db_path):
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS visits (id INTEGER PRIMARY KEY, url TEXT NOT NULL, title TEXT, visited_at REAL NOT NULL)'
+        )
+        self.db.commit()
+        # Kept up to date here so an unfiltered page never has to count the table
+        self.count = self.db.execute('SELECT count(*) FROM visits').fetchone()[0]
+
+    def add(self, url, title):
+        with self.db:
+            self.db.execute('INSERT INTO visits (url, title, visited_at) VALUES (?, ?, ?)', (url, title, time.time()))
+        self.count += 1
+
+    def page(self, offset=0, limit=100, query=''):
+        limit = max(1, min(int(limit), 500))
+        offset = max(0, int(offset))
+        if query:
+            pattern = f"%{query}%"
+            where, args = 'WHERE url LIKE ? OR title LIKE ?', (pattern, pattern)
+            total = self.db.execute(f'SELECT count(*) FROM visits {where}', args).fetchone()[0]
+        else:
+            where, args, total = '', (), self.count
+        rows = self.db.execute(
+            f'SELECT url, title, visited_at FROM visits {where} ORDER BY id DESC LIMIT ? OFFSET ?',
+            args + (limit, offset)
+        ).fetchall()
+        return {
+            'total': total,
+            'rows': [{'url': url, 'title': title, 'detail': time.strftime('%Y-%m-%d %H:%M', time.localtime(visited_at))}
+                     for url, title, visited_at in rows],
+        }
+
+    def clear(self):
+        with self.db:
+            self.db.execute('DELETE FROM visits')
+        self.count = 0
+
+    def close(self):
+        self.db.close()
+
+HISTORY_STORE = None
+
+def get_history_store():
+    """Process-wide history store, opened on first use and closed on quit"""
+    global HISTORY_STORE
+    if HISTORY_STORE is None:
+        HISTORY_STORE = HistoryStore(os.path.join(DATA_PATH, 'history.sqlite3'))
+        QApplication.instance().aboutToQuit.connect(HISTORY_STORE.close)
+    return HISTORY_STORE
+
+# Archived pages may not run scripts or reach the network
+OFFLINE_CSP = (b'<meta http-equiv="Content-Security-Policy" '
+               b'content="default-src zi: data: \'unsafe-inline\'; script-src \'none\'">')
+OFFLINE_REWRITE_TYPES = ('text/html', 'text/css', 'image/svg+xml')
+# Types served as themselves from zi://offline; anything else, SVG and scripts
+# included, is sent as application/octet-stream so it cannot run in that origin
+OFFLINE_SERVED_TYPES = frozenset([
+    'text/html', 'text/css', 'text/plain',
+    'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'image/avif', 'image/bmp',
+    'image/x-icon', 'image/vnd.microsoft.icon',
+    'font/woff', 'font/woff2', 'font/ttf', 'font/otf', 'application/font-woff', 'application/x-font-woff',
+    'application/vnd.ms-fontobject',
+    'audio/mpeg', 'audio/ogg', 'audio/wav', 'audio/webm', 'video/mp4', 'video/webm', 'video/ogg',
+])
+
+class OfflineArchive(QObject):
+    """Pages saved for offline reading, split into content-addressed parts.
+
+    An MHTML capture is split into its MIME parts. Each part is stored
+    once under the SHA-256 of its bytes, so stylesheets, scripts and images
+    shared by many saved pages take space once. References between parts
+    are rewritten to zi://offline/blob/<hash> before hashing, which keeps a
+    part's hash independent of the page it came from. XHTML is stored as
+    HTML so it gets the same script-blocking policy, and SVG is inlined as
+    data: URLs, where it runs in an opaque origin. Saving runs on a
+    background thread; saved and failed are emitted when it is done.
+    """
+    saved = pyqtSignal(int, str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        self.blob_directory = os.path.join(directory, 'blobs')
+        self.db_path = os.path.join(directory, 'archive.sqlite3')
+        self.writer = None  # connection of the save thread
+        self.saver = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.counters = {'saved': 0, 'failed': 0, 'parts_stored': 0, 'parts_deduplicated': 0,
+                         'bytes_stored': 0, 'bytes_deduplicated': 0}
+
+        if not os.path.exists(self.blob_directory):
+            os.makedirs(self.blob_directory)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(
+            'CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, mime TEXT NOT NULL, size INTEGER NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS pages ('
+            '  id INTEGER PRIMARY KEY, url TEXT NOT NULL, title TEXT, saved_at REAL NOT NULL,'
+            '  root TEXT NOT NULL, parts INTEGER NOT NULL, size INTEGER NOT NULL);'
+            'CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(title, url, body);'
+        )
+        self.db.commit()
+        self.count = self.db.execute('SELECT count(*) FROM pages').fetchone()[0]
+
+    def incoming_path(self):
+        """A fresh file name for QWebEnginePage.save() to write a capture to"""
+        return os.path.join(self.directory, f"incoming-{time.time_ns()}.mhtml")
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_directory, digest[:2], digest)
+
+    def add(self, mhtml_path, url, title, text='', discard=False):
+        """Archive an MHTML file in the background; discard deletes it afterwards"""
+        return self.saver.submit(self.save, mhtml_path, url, title, text, discard)
+
+    def save(self, mhtml_path, url, title, text, discard):
+        try:
+            page_id = self.ingest(mhtml_path, url, title, text)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            self.counters['failed'] += 1
+            logging.getLogger('ZiBrowser').warning(f"Could not archive {url}: {e}")
+            self.failed.emit(url, str(e))
+            return None
+        finally:
+            if discard:
+                try:
+                    os.remove(mhtml_path)
+                except OSError:
+                    pass
+        self.counters['saved'] += 1
+        self.saved.emit(page_id, title)
+        return page_id
+
+    def ingest(self, mhtml_path, url, title, text=''):
+        """Split an MHTML file into stored parts and index it; returns the page id"""
+        with open(mhtml_path, 'rb') as f:
+            message = email.message_from_binary_file(f)
+        parts = [part for part in message.walk() if not part.is_multipart()]
+        if not parts:
+            raise ValueError('no MIME parts in capture')
+
+        # How other parts refer to each part: its URL as written in HTML and CSS, or its Content-ID
+        refs = {}
+        for index, part in enumerate(parts):
+            location = part.get('Content-Location')
+            if location:
+                refs.setdefault(location.encode('utf-8'), index)
+                refs.setdefault(location.replace('&', '&amp;').encode('utf-8'), index)
+            content_id = part.get('Content-ID')
+            if content_id:
+                refs.setdefault(b'cid:' + content_id.strip('<>').encode('utf-8'), index)
+        # Longest first, and only whole URLs, so a.css never matches inside a.css?v=2
+        pattern = re.compile(
+            b'(' + b'|'.join(re.escape(ref) for ref in sorted(refs, key=len, reverse=True)) + b')'
+            + rb'(?![^\s"\'()<>,&])'
+        ) if refs else None
+
+        if self.writer is None:
+            self.writer = sqlite3.connect(self.db_path, check_same_thread=False)
+            self.writer.execute('PRAGMA synchronous=NORMAL')
+        stored = {}  # part index -> (hash, mime, body)
+        visiting = set()
+        total = 0
+
+        def store(index):
+            nonlocal total
+            if index in stored:
+                return stored[index]
+            part = parts[index]
+            body = part.get_payload(decode=True) or b''
+            mime = part.get_content_type()
+            if mime == 'application/xhtml+xml':
+                mime = 'text/html'
+            if mime in OFFLINE_REWRITE_TYPES and pattern is not None:
+                visiting.add(index)
+
+                def link(match):
+                    target = refs[match.group(1)]
+                    # A page linking to itself keeps its original URL
+                    if target in visiting:
+                        return match.group(0)
+                    digest, target_mime, target_body = store(target)
+                    if target_mime == 'image/svg+xml':
+                        return b'data:image/svg+xml;base64,' + base64.b64encode(target_body)
+                    return b'zi://offline/blob/' + digest.encode('ascii')
+
+                body = pattern.sub(link, body)
+                visiting.discard(index)
+            if mime == 'text/html':
+                doctype = re.match(rb'\s*<!doctype[^>]*>', body, re.I)
+                at = doctype.end() if doctype else 0
+                body = body[:at] + OFFLINE_CSP + body[at:]
+            digest = hashlib.sha256(body).hexdigest()
+            total += len(body)
+            if self.writer.execute('SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone():
+                self.counters['parts_deduplicated'] += 1
+                self.counters['bytes_deduplicated'] += len(body)
+            else:
+                path = self.blob_path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(body)
+                os.replace(path + '.tmp', path)
+                self.writer.execute('INSERT INTO blobs (hash, mime, size) VALUES (?, ?, ?)', (digest, mime, len(body)))
+                self.counters['parts_stored'] += 1
+                self.counters['bytes_stored'] += len(body)
+            # Only SVG bodies are needed again, to be inlined
+            stored[index] = (digest, mime, body if mime == 'image/svg+xml' else None)
+            return stored[index]
+
+        with self.writer:
+            root = store(0)[0]
+            for index in range(1, len(parts)):
+                store(index)
+            page_id = self.writer.execute(
+                'INSERT INTO pages (url, title, saved_at, root, parts, size) VALUES (?, ?, ?, ?, ?, ?)',
+                (url, title, time.time(), root, len(parts), total)
+            ).lastrowid
+            self.writer.execute('INSERT INTO page_text (rowid, title, url, body) VALUES (?, ?, ?, ?)',
+                                (page_id, title, url, text))
+        self.count += 1
+        return page_id
+
+    def open(self, path):
+        """(mime type, file path) for a zi://offline URL path, or None"""
+        kind, _, name = path.strip('/').partition('/')
+        if kind == 'page' and name.isdigit():
+            row = self.db.execute(
+                'SELECT b.hash, b.mime FROM pages p JOIN blobs b ON b.hash = p.root WHERE p.id = ?', (int(name),)
+            ).fetchone()
+        elif kind == 'blob' and re.fullmatch(r'[0-9a-f]{64}', name):
+            row = self.db.execute('SELECT hash, mime FROM blobs WHERE hash = ?', (name,)).fetchone()
+        else:
+            row = None
+        if row is None:
+            return None
+        mime = row[1] if row[1] in OFFLINE_SERVED_TYPES else 'application/octet-stream'
+        return mime, self.blob_path(row[0])
+
+    def page(self, offset=0, limit=100, query=''):
+        """Saved pages, newest first, in the shape zi:// list pages expect"""
+        limit = max(1, min(int(limit), 500))
+        offset = max(0, int(offset))
+        words = re.findall(r"\w+", query)
+        if words:
+            match = ' '.join(f'"{word}"*' for word in words)
+            total = self.db.execute('SELECT count(*) FROM page_text WHERE page_text MATCH ?', (match,)).fetchone()[0]
+            rows = self.db.execute(
+                'SELECT p.id, p.url, p.title, p.saved_at, p.size FROM page_text JOIN pages p ON p.id = page_text.rowid '
+                'WHERE page_text MATCH ? ORDER BY bm25(page_text) LIMIT ? OFFSET ?', (match, limit, offset)
+            ).fetchall()
+        else:
+            total = self.count
+            rows = self.db.execute(
+                'SELECT id, url, title, saved_at, size FROM pages ORDER BY id DESC LIMIT ? OFFSET ?', (limit, offset)
+            ).fetchall()
+        return {
+            'total': total,
+            'rows': [{'url': f'zi://offline/page/{page_id}', 'title': title or url,
+                      'detail': f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(saved_at))} · "
+                                f"{size // 1024} KiB · {url}"}
+                     for page_id, url, title, saved_at, size in rows],
+        }
+
+    def stats(self):
+        pages, logical = self.db.execute('SELECT count(*), coalesce(sum(size), 0) FROM pages').fetchone()
+        blobs, stored = self.db.execute('SELECT count(*), coalesce(sum(size), 0) FROM blobs').fetchone()
+        stats = {'pages': pages, 'parts': blobs, 'page_bytes': logical, 'stored_bytes': stored,
+                 'deduplication': f"{logical / stored:.2f}x" if stored else 'n/a'}
+        stats.update(self.counters)
+        return stats
+
+    def close(self):
+        self.saver.shutdown(wait=True)
+        if self.writer is not None:
+            self.writer.close()
+        self.db.close()
+
+OFFLINE_ARCHIVE = None
+
+def get_offline_archive():
+    """Process-wide offline archive, opened on first use and closed on quit"""
+    global OFFLINE_ARCHIVE
+    if OFFLINE_ARCHIVE is None:
+        OFFLINE_ARCHIVE = OfflineArchive(os.path.join(DATA_PATH, 'offline'))
+        QApplication.instance().aboutToQuit.connect(OFFLINE_ARCHIVE.close)
+    return OFFLINE_ARCHIVE
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def one_edit_apart(a, b):
+    """True if a and b differ by at most one inserted, deleted, replaced or swapped letter"""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < len(a) and i < len(b) and a[i] == b[i]:
+        i += 1
+    if len(a) > len(b):
+        return a[i + 1:] == b[i:]
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 1:i + 2] + a[i:i + 1] == b[i:i + 2] and a[i + 2:] == b[i + 2:])
+
+def fuzzy_contains(text, term):
+    """True if some part of text is at most one edit away from term.
+
+    Each trigram of term found in text pins where term would sit; the
+    letters on one side of it must then match exactly and the other side
+    may hold the one edit.
+    """
+    for i in range(len(term) - 2):
+        gram, before, after = term[i:i + 3], term[:i], term[i + 3:]
+        at = text.find(gram)
+        while at != -1:
+            end = at + 3
+            if text.endswith(before, 0, at):
+                if any(one_edit_apart(after, text[end:end + max(0, len(after) + d)]) for d in (-1, 0, 1)):
+                    return True
+            elif text.startswith(after, end):
+                if any(one_edit_apart(before, text[max(0, at - len(before) - d):at]) for d in (-1, 0, 1)):
+                    return True
+            at = text.find(gram, at + 1)
+    return False
+
+class SwitcherIndex:
+    """Trigram index over titles and URLs of tabs or history, for the quick switcher.
+
+    Entries are updated in place: a changed title or URL only appends the
+    trigrams the new text adds, and stale postings are ignored because
+    every candidate is checked against its current text. Removed entries
+    are left as holes until they outnumber the live ones, then the index
+    is rebuilt. A query term is looked up through its rarest trigrams.
+    Terms of seven letters or more also match text one typo away: a
+    replaced or swapped letter breaks up to four neighbouring trigrams, so
+    such terms are seeded from two trigrams at least four apart, and a
+    candidate missing a few trigrams is confirmed by an edit check.
+    """
+    MAX_CANDIDATES = 2500
+    SHORT_QUERY_SCAN = 500  # a one- or two-letter query matches nearly everything; look at the newest only
+    FUZZY_LENGTH = 7  # shorter terms must match exactly; a typo would leave too few trigrams to seed from
+    KIND_BONUS = {'tab': 1.0, 'unloaded': 0.75, 'history': 0.0}
+
+    def __init__(self):
+        self.postings = defaultdict(list)  # trigram -> entries, oldest first
+        self.texts = []  # entry -> lowercase searchable text, None once removed
+        self.items = []  # entry -> (kind, ref, title, url)
+        self.ranks = []  # entry -> tick of its last update, for recency
+        self.entries = {}  # ref -> entry
+        self.tick = 0
+        self.size = 0  # postings appended
+        self.stale = 0  # postings whose entry no longer has the trigram
+        self.holes = 0  # removed entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def searchable(title, url):
+        url = re.sub(r'^[a-z]+://(www\.)?', '', url, flags=re.I)
+        return f"{title[:100]} {url[:100]}".lower()
+
+    def set(self, ref, kind, title, url):
+        """Add an entry, or update the one with this ref"""
+        text = self.searchable(title, url)
+        self.tick += 1
+        entry = self.entries.get(ref)
+        if entry is None:
+            entry = len(self.texts)
+            self.entries[ref] = entry
+            self.texts.append(text)
+            self.items.append((kind, ref, title, url))
+            self.ranks.append(self.tick)
+            added = trigrams(text)
+        else:
+            old_text = self.texts[entry]
+            self.texts[entry] = text
+            self.items[entry] = (kind, ref, title, url)
+            self.ranks[entry] = self.tick
+            if old_text == text:
+                return
+            old, new = trigrams(old_text), trigrams(text)
+            added = new - old
+            self.stale += len(old - new)
+        for gram in added:
+            self.postings[gram].append(entry)
+        self.size += len(added)
+        if self.stale > self.size // 2 + 4096:
+            self.rebuild()
+
+    def remove(self, ref):
+        entry = self.entries.pop(ref, None)
+        if entry is None:
+            return
+        self.texts[entry] = None
+        self.items[entry] = None
+        self.holes += 1
+        if self.holes > len(self.entries) + 256:
+            self.rebuild()
+
+    def rebuild(self):
+        live = sorted((self.ranks[entry], self.items[entry]) for entry in self.entries.values())
+        self.__init__()
+        for _, (kind, ref, title, url) in live:
+            self.set(ref, kind, title, url)
+
+    def candidates(self, terms):
+        """Entries worth checking: those with the rarest trigrams of the most selective term"""
+        best = None
+        for term in terms:
+            grams = [term[i:i + 3] for i in range(len(term) - 2)]
+            if not grams:
+                continue
+            sizes = [len(self.postings.get(gram, ())) for gram in grams]
+            if len(term) < self.FUZZY_LENGTH:
+                first = min(range(len(grams)), key=sizes.__getitem__)
+                seeds = [grams[first]]
+            else:
+                # One typo breaks at most four trigrams in a row, never both seeds
+                first, second = min(((i, j) for i in range(len(grams)) for j in range(i + 4, len(grams))),
+                                    key=lambda pair: sizes[pair[0]] + sizes[pair[1]])
+                seeds = [grams[first], grams[second]]
+            size = sum(len(self.postings.get(gram, ())) for gram in seeds)
+            if best is None or size < best[0]:
+                best = (size, seeds)
+        if best is None:
+            # Only one- and two-letter terms: check the newest entries
+            return range(len(self.texts) - 1, max(-1, len(self.texts) - 1 - self.SHORT_QUERY_SCAN), -1)
+        found = set()
+        for gram in best[1]:
+            found.update(self.postings.get(gram, ())[-self.MAX_CANDIDATES:])
+        return found
+
+    def search(self, query, limit=20):
+        """Best matches as (score, kind, ref, title, url), best first"""
+        terms = query.lower().split()
+        if not terms:
+            return []
+        checks = []
+        for term in terms:
+            grams = trigrams(term)
+            allowed = 4 if len(term) >= self.FUZZY_LENGTH else 0
+            checks.append((term, ' ' + term, grams, allowed))
+        tick = self.tick or 1
+        scored = []
+        for entry in self.candidates(terms):
+            text = self.texts[entry]
+            if text is None:
+                continue
+            score = 0.0
+            for term, word_start, grams, allowed in checks:
+                if term in text:
+                    score += 1.5 if text.startswith(term) or word_start in text else 1.0
+                elif allowed and sum(1 for gram in grams if gram not in text) <= allowed \
+                        and fuzzy_contains(text, term):
+                    score += 0.5
+                else:
+                    break
+            else:
+                kind = self.items[entry][0]
+                scored.append((score + self.KIND_BONUS[kind] + 0.5 * self.ranks[entry] / tick, entry))
+        return [(score,) + self.items[entry] for score, entry in heapq.nlargest(limit, scored)]
+
+def search_switcher(indexes, query, limit=20):
+    """Merged matches from several switcher indexes, one per URL, best first"""
+    results = []
+    for index in indexes:
+        results.extend(index.search(query, limit))
+    results.sort(key=lambda result: result[0], reverse=True)
+    merged, seen = [], set()
+    for result in results:
+        if result[4] not in seen:
+            seen.add(result[4])
+            merged.append(result)
+    return merged[:limit]
+
+class HistoryIndexLoader:
+    """Switcher index over the history store, built once on a background thread.
+
+    Visits recorded while it builds are queued and applied on the GUI
+    thread when the index is first used, so one thread at a time touches it.
+    """
+    def __init__(self, db_path, limit=100000):
+        self.index = SwitcherIndex()
+        self.pending = []
+        self.cleared = False
+        self.thread = threading.Thread(target=self.build, args=(db_path, limit), name='history-index', daemon=True)
+        self.thread.start()
+
+    def build(self, db_path, limit):
+        try:
+            db = sqlite3.connect(db_path)
+            try:
+                rows = db.execute(
+                    'SELECT url, title FROM visits WHERE id IN (SELECT max(id) FROM visits GROUP BY url) '
+                    'ORDER BY id DESC LIMIT ?', (limit,)
+                ).fetchall()
+            finally:
+                db.close()
+        except sqlite3.Error as e:
+            logging.getLogger('ZiBrowser').warning(f"Could not index history: {e}")
+            return
+        # Oldest first, so recent visits rank higher
+        for url, title in reversed(rows):
+            self.index.set(url, 'history', title or '', url)
+
+    def ready(self):
+        """The index, or None while it is still building"""
+        if self.thread.is_alive():
+            return None
+        if self.cleared:
+            self.index = SwitcherIndex()
+            self.cleared = False
+        for url, title in self.pending:
+            self.index.set(url, 'history', title, url)
+        self.pending = []
+        return self.index
+
+    def add(self, url, title):
+        self.pending.append((url, title))
+        self.ready()
+
+    def clear(self):
+        self.pending = []
+        self.cleared = True
+        self.ready()
+
+HISTORY_INDEX = None
+
+def get_history_index():
+    """Process-wide switcher index over history, started on first use"""
+    global HISTORY_INDEX
+    if HISTORY_INDEX is None:
+        get_history_store()  # creates the table the loader reads
+        HISTORY_INDEX = HistoryIndexLoader(os.path.join(DATA_PATH, 'history.sqlite3'))
+    return HISTORY_INDEX
+
+def page_rows(items, params):
+    """One page of an in-memory list, in the shape zi:// list pages expect"""
+    query = str(params.get('q', '')).lower()
+    if query:
+        items = [item for item in items if query in item['title'].lower() or query in item['url'].lower()]
+    offset = max(0, int(params.get('offset', 0)))
+    limit = max(1, min(int(params.get('limit', 100)), 500))
+    return {'total': len(items), 'rows': items[offset:offset + limit]}
+
+INTERNAL_SCHEME = b'zi'
+
+# zi:// pages that list rows: title and how often the page refreshes itself (0: never)
+INTERNAL_LIST_PAGES = {
+    'history': ('History', 0),
+    'bookmarks': ('Bookmarks', 0),
+    'downloads': ('Downloads', 1000),
+    'offline': ('Offline Pages', 0),
+}
+
+def register_internal_scheme():
+    """Declare zi:// to QtWebEngine; must run before the QApplication is created"""
+    scheme = QWebEngineUrlScheme(INTERNAL_SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    # Local, so web pages cannot load zi:// resources; without LocalAccessAllowed, so zi:// pages cannot read files
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.LocalScheme)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+def internal_list_page_html(source, title, refresh_ms):
+    """A virtually scrolled list that fetches its rows a page at a time over the bridge"""
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title><style>
+body {{ font-family: sans-serif; background: #f4f4f6; margin: 0; }}
+header {{ position: sticky; top: 0; z-index: 1; display: flex; align-items: center; gap: 16px;
+          background: white; padding: 12px 24px; box-shadow: 0 1px 3px rgba(0,0,0,.2); }}
+header h1 {{ font-size: 20px; margin: 0; }}
+header input {{ flex: 1; max-width: 400px; padding: 6px 12px; border: 1px solid #ccc; border-radius: 16px; }}
+#count {{ color: #666; font-size: 13px; }}
+#viewport {{ position: relative; margin: 8px 0; }}
+.row {{ position: absolute; left: 24px; right: 24px; height: 44px; box-sizing: border-box; padding: 4px 8px;
+        border-bottom: 1px solid #e4e4e8; overflow: hidden; }}
+.row a, .row small {{ display: block; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }}
+.row a {{ color: #1a0dab; text-decoration: none; }}
+.row small {{ color: #666; }}
+</style></head><body>
+<header><h1>{html.escape(title)}</h1><input id="filter" placeholder="Filter" autofocus><span id="count"></span></header>
+<div id="viewport"></div>
+<script>
+(function() {{
+    const SOURCE = {json.dumps(source)};
+    const REFRESH_MS = {int(refresh_ms)};
+    const ROW_HEIGHT = 44;
+    const PAGE_SIZE = 100;
+    const OVERSCAN = 10;
+    const viewport = document.getElementById('viewport');
+    const count = document.getElementById('count');
+    let pages = new Map();  // page number -> rows, or null while loading
+    let total = 0;
+    let filter = '';
+    let generation = 0;
+
+    function load(number) {{
+        if (pages.has(number)) {{
+            return;
+        }}
+        const requested = generation;
+        pages.set(number, null);
+        window.ziBridge.query(SOURCE, {{ offset: number * PAGE_SIZE, limit: PAGE_SIZE, q: filter }}).then(result => {{
+            if (requested !== generation) {{
+                return;
+            }}
+            pages.set(number, result.rows);
+            total = result.total;
+            viewport.style.height = (total * ROW_HEIGHT) + 'px';
+            count.textContent = total + (total === 1 ? ' item' : ' items');
+            render();
+        }}).catch(error => {{
+            pages.delete(number);
+            console.error(error);
+        }});
+    }}
+
+    function row(index, data) {{
+        const element = document.createElement('div');
+        element.className = 'row';
+        element.style.top = (index * ROW_HEIGHT) + 'px';
+        const link = document.createElement('a');
+        link.href = data.url;
+        link.textContent = data.title || data.url;
+        const detail = document.createElement('small');
+        detail.textContent = data.detail ? data.detail + ' \\u00b7 ' + data.url : data.url;
+        element.append(link, detail);
+        return element;
+    }}
+
+    // Only the rows in view (plus a margin) exist in the DOM
+    function render() {{
+        const top = Math.max(0, window.scrollY - viewport.offsetTop);
+        const first = Math.max(0, Math.floor(top / ROW_HEIGHT) - OVERSCAN);
+        const last = Math.min(Math.max(total, PAGE_SIZE), Math.ceil((top + window.innerHeight) / ROW_HEIGHT) + OVERSCAN);
+        const rows = document.createDocumentFragment();
+        for (let number = Math.floor(first / PAGE_SIZE); number * PAGE_SIZE < last; number++) {{
+            load(number);
+            const data = pages.get(number);
+            if (!data) {{
+                continue;
+            }}
+            for (let i = 0; i < data.length; i++) {{
+                const index = number * PAGE_SIZE + i;
+                if (index >= first && index < last) {{
+                    rows.appendChild(row(index, data[i]));
+                }}
+            }}
+        }}
+        viewport.replaceChildren(rows);
+    }}
+
+    function reset() {{
+        generation++;
+        pages = new Map();
+        render();
+    }}
+
+    let scheduled = false;
+    window.addEventListener('scroll', () => {{
+        if (!scheduled) {{
+            scheduled = true;
+            requestAnimationFrame(() => {{ scheduled = false; render(); }});
+        }}
+    }}, {{ passive: true }});
+    window.addEventListener('resize', render);
+
+    let debounce = null;
+    document.getElementById('filter').addEventListener('input', event => {{
+        clearTimeout(debounce);
+        debounce = setTimeout(() => {{
+            filter = event.target.value;
+            window.scrollTo(0, 0);
+            reset();
+        }}, 150);
+    }});
+
+    if (REFRESH_MS) {{
+        setInterval(() => document.hidden || reset(), REFRESH_MS);
+    }}
+    render();
+}})();
+</script>
+</body></html>"""
+
+class InternalSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Serves zi:// pages, the new-tab page's thumbnails at zi://thumbnails/ and archived pages under zi://offline/"""
+    def target_window(self):
+        window = QApplication.activeWindow()
+        if isinstance(window, Browser):
+            return window
+        for widget in QApplication.topLevelWidgets():
+            if isinstance(widget, Browser):
+                return widget
+        return None
+
+    @staticmethod
+    def allowed(job, navigable=False):
+        """True if a zi:// page asked for this, or for a page the browser itself opened.
+
+        The initiator is empty only for navigations the browser starts, such
+        as setUrl() or the address bar; a sandboxed page shows up as "null".
+        Thumbnails prove which URLs were visited, so web pages get nothing.
+        """
+        initiator = job.initiator()
+        if initiator.isEmpty():
+            return navigable
+        return initiator.scheme() == INTERNAL_SCHEME.decode()
+
+    def requestStarted(self, job):
+        url = job.requestUrl()
+        name = url.host()
+        try:
+            if name == 'thumbnails':
+                if not self.allowed(job):
+                    job.fail(QWebEngineUrlRequestJob.RequestDenied)
+                    return
+                path = os.path.join(get_thumbnail_cache().directory, os.path.basename(url.path()))
+                with open(path, 'rb') as f:
+                    body, mime_type = f.read(), b'image/jpeg'
+            elif name == 'offline' and url.path().strip('/'):
+                self.reply_archived(job, url.path())
+                return
+            else:
+                if not self.allowed(job, navigable=True):
+                    # A web page may neither open nor frame history, bookmarks or downloads
+                    job.fail(QWebEngineUrlRequestJob.RequestDenied)
+                    return
+                window = self.target_window()
+                if window is None or (name != 'newtab' and name not in INTERNAL_LIST_PAGES):
+                    job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+                    return
+                body, mime_type = window.internal_page_html(name).encode('utf-8'), b'text/html'
+        except OSError:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        buffer = QBuffer(job)
+        buffer.setData(body)
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(mime_type, buffer)
+
+    def reply_archived(self, job, path):
+        # Only a saved page itself can be opened by the browser; its parts are for zi:// pages alone
+        if not self.allowed(job, navigable=path.strip('/').startswith('page/')):
+            job.fail(QWebEngineUrlRequestJob.RequestDenied)
+            return
+        # The part is streamed from its file as the page reads it, not loaded up front
+        found = get_offline_archive().open(path)
+        part = QFile(found[1], job) if found else None
+        if part is None or not part.open(QIODevice.ReadOnly):
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        job.reply(found[0].encode('ascii'), part)
+
+class ThumbnailCache:
+    """Two-level LRU cache of downscaled page snapshots, keyed by URL.
+
+    Decoded pixmaps for the most recently used pages stay in memory; every
+    snapshot is also written as a JPEG on a background thread, and the
+    oldest files are evicted once the directory exceeds disk_bytes. Keying
+    by URL lets suspended or discarded tabs show a preview without
+    reloading their page.
+    """
+    def __init__(self, directory, memory_items=48, disk_bytes=64 * 1024 * 1024, size=QSize(320, 200)):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.disk_bytes = disk_bytes
+        self.size = size
+        self.memory = OrderedDict()  # key -> QPixmap, least recently used first
+        self.entries = OrderedDict()  # key -> [url, title, bytes], oldest first
+        self.disk_total = 0
+        self.lock = threading.Lock()
+        self.saver = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.load_index()
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def file_name(self, key):
+        return key + '.jpg'
+
+    def file_path(self, key):
+        return os.path.join(self.directory, self.file_name(key))
+
+    def load_index(self):
+        try:
+            with open(os.path.join(self.directory, 'index.json'), encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, url, title in saved:
+            path = self.file_path(key)
+            if os.path.exists(path):
+                size = os.path.getsize(path)
+                self.entries[key] = [url, title, size]
+                self.disk_total += size
+
+    def save_index(self):
+        with self.lock:
+            saved = [[key, url, title] for key, (url, title, _) in self.entries.items()]
+        path = os.path.join(self.directory, 'index.json')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(saved, f)
+        os.replace(path + '.tmp', path)
+
+    def store(self, url, title, pixmap):
+        thumbnail = pixmap.scaled(self.size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+        thumbnail = thumbnail.copy(0, 0, self.size.width(), self.size.height())
+        key = self.key(url)
+        self.remember(key, thumbnail)
+        # QImage, unlike QPixmap, may be used off the GUI thread
+        self.saver.submit(self.write, key, url, title, thumbnail.toImage())
+
+    def remember(self, key, pixmap):
+        self.memory[key] = pixmap
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def write(self, key, url, title, image):
+        path = self.file_path(key)
+        if not image.save(path, 'JPG', 70):
+            return
+        size = os.path.getsize(path)
+        with self.lock:
+            if key in self.entries:
+                self.disk_total -= self.entries.pop(key)[2]
+            self.entries[key] = [url, title, size]
+            self.disk_total += size
+            evicted = []
+            while self.disk_total > self.disk_bytes and len(self.entries) > 1:
+                old_key, (_, _, old_size) = self.entries.popitem(last=False)
+                self.disk_total -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self.file_path(old_key))
+            except OSError:
+                pass
+
+    def get(self, url):
+        """Cached thumbnail for url as a QPixmap, or None"""
+        key = self.key(url)
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        with self.lock:
+            on_disk = key in self.entries
+        if on_disk:
+            pixmap = QPixmap(self.file_path(key))
+            if not pixmap.isNull():
+                self.remember(key, pixmap)
+                return pixmap
+        return None
+
+    def has(self, url):
+        key = self.key(url)
+        with self.lock:
+            return key in self.memory or key in self.entries
+
+    def recent(self, limit=24):
+        """(url, title, file name) of the most recently captured pages"""
+        with self.lock:
+            items = list(self.entries.items())[-limit:]
+        return [(url, title, self.file_name(key)) for key, (url, title, _) in reversed(items)]
+
+    def drop_memory(self):
+        """Release decoded pixmaps; thumbnails remain available from disk"""
+        released = len(self.memory)
+        self.memory.clear()
+        return released
+
+    def close(self):
+        self.saver.shutdown(wait=True)
+        self.save_index()
+
+THUMBNAIL_CACHE = None
+
+def get_thumbnail_cache():
+    """Process-wide thumbnail cache, created on first use and saved on quit"""
+    global THUMBNAIL_CACHE
+    if THUMBNAIL_CACHE is None:
+        THUMBNAIL_CACHE = ThumbnailCache(os.path.join(DATA_PATH, 'thumbnails'))
+        QApplication.instance().aboutToQuit.connect(THUMBNAIL_CACHE.close)
+    return THUMBNAIL_CACHE
+
+class TabRoute:
+    """Per-tab row of the bridge routing table"""
+    __slots__ = ('page', 'messages', 'batches', 'last_seen')
+
+    def __init__(self, page):
+        self.page = page
+        self.messages = 0
+        self.batches = 0
+        self.last_seen = 0.0
+
 # Add this class to handle JavaScript-Python bridge
 class JavaScriptBridge(QObject):
-    def __init__(self):
+    """Routes what pages send over their web channels.
+
+    Every page gets its own PageBridge, bound to its tab on the Python side,
+    so a page cannot speak for another tab. Pages queue small messages which
+    are delivered as one post() batch per animation frame and routed to
+    handlers by message type.
+    """
+    def __init__(self, job_runner=None, capture_sink=None):
         super().__init__()
         self.logger = BrowserLogger()
+        self.job_runner = job_runner
+        self.capture_sink = capture_sink
+        self.routes = {}  # tab id -> TabRoute
+        self.sources = {}  # name -> query(params), for zi:// pages
+        self.handlers = {
+            'log': self.handle_log,
+            'save': self.handle_save,
+        }
+
+    def register_tab(self, tab_id, page):
+        self.routes[tab_id] = TabRoute(page)
+
+    def unregister_tab(self, tab_id):
+        self.routes.pop(tab_id, None)
+
+    def add_handler(self, kind, handler):
+        """Route messages of one type to handler(tab_id, data)"""
+        self.handlers[kind] = handler
+
+    def add_source(self, name, query):
+        """Let zi:// pages page through data with ziBridge.query(name, params)"""
+        self.sources[name] = query
+
+    def answer_query(self, tab_id, page, name, params):
+        """Answer a query from the zi:// list page named after its source; anything else is refused"""
+        query = self.sources.get(name)
+        page_url = page.url()
+        # The page is the one the asking channel belongs to, so a web page cannot pose as another tab
+        if query is None or page_url.scheme() != INTERNAL_SCHEME.decode() or page_url.host() != name \
+                or page_url.path().strip('/'):
+            return json.dumps({'ok': False, 'error': 'query not allowed'})
+        try:
+            return json.dumps({'ok': True, 'result': query(json.loads(params))})
+        except Exception as e:
+            self.logger.logger.warning(f"Bridge query {name!r} from tab {tab_id} failed: {e}")
+            return json.dumps({'ok': False, 'error': str(e)})
+
+    def deliver(self, tab_id, page, batch):
+        """Route a batch of [type, data] messages from a tab's current page"""
+        route = self.routes.get(tab_id)
+        if route is None or route.page is not page:
+            return  # the tab was closed, or the page is not the one it shows
+        try:
+            messages = json.loads(batch)
+        except ValueError:
+            return
+        if not isinstance(messages, list):
+            return
+        # Anything but [type, data] pairs is dropped before it is counted or unpacked
+        messages = [message for message in messages
+                    if isinstance(message, list) and len(message) == 2 and isinstance(message[0], str)]
+        route.batches += 1
+        route.messages += len(messages)
+        route.last_seen = time.monotonic()
+        TRACER.instant('post', 'bridge', 1000 + tab_id, messages=len(messages))
+
+        for kind, data in messages:
+            handler = self.handlers.get(kind)
+            if handler is None:
+                continue
+            # Page-supplied data must never take the browser down
+            try:
+                handler(tab_id, data)
+            except Exception as e:
+                self.logger.logger.warning(f"Bridge message {kind!r} from tab {tab_id} failed: {e}")
+
+    def handle_log(self, tab_id, message):
+        print(f"JavaScript: {message}")
+        self.logger.log_js_error(message)
+
+    def handle_save(self, tab_id, content):
+        if self.capture_sink is None:
+            return
+        route = self.routes.get(tab_id)
+        self.capture_sink.put({
+            'ts': time.time(),
+            'origin': page_origin(route.page) if route else '',
+            'tab': tab_id,
+            'content': content if isinstance(content, str) else json.dumps(content),
+        })
+
+    def submit_job(self, tab_id, page, job_id, name, payload, on_done):
+        """Start a named job for a tab; on_done(job_id, reply) gets the page's own job id back"""
+        TRACER.instant('submitJob', 'bridge', 1000 + tab_id, job=name, length=len(payload))
+        if self.job_runner is None or tab_id not in self.routes:
+            return 'jobs unavailable'
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            return 'invalid payload'
+        # Job ids are only unique within a tab, and a tab may only cancel its own
+        prefix = f"{tab_id}:"
+        return self.job_runner.submit(
+            prefix + job_id, name, data, page_origin(page),
+            lambda job_id, reply: on_done(job_id[len(prefix):], reply)
+        )
+
+    def cancel_job(self, tab_id, job_id):
+        if self.job_runner is None:
+            return False
+        return self.job_runner.cancel(f"{tab_id}:{job_id}")
+
+class PageBridge(QObject):
+    """What one page sees as window.python, bound to its tab on the Python side"""
+    jobFinished = pyqtSignal(str, str)
+
+    def __init__(self, bridge, tab_id, page):
+        super().__init__(page)
+        self.bridge = bridge
+        self.tab_id = tab_id
+        self.page = page
+
+    def warn(self, slot, error):
+        """Log instead of raise: every site can call these slots, and an exception escaping one aborts the process"""
+        self.bridge.logger.logger.warning(f"Bridge {slot} from tab {self.tab_id} failed: {error}")
+
+    @pyqtSlot(str)
+    def post(self, batch):
+        """Receive a batch of [type, data] messages from the page"""
+        try:
+            self.bridge.deliver(self.tab_id, self.page, batch)
+        except Exception as e:
+            self.warn('post', e)
+
+    @pyqtSlot(str, str, result=str)
+    def query(self, name, params):
+        try:
+            return self.bridge.answer_query(self.tab_id, self.page, name, params)
+        except Exception as e:
+            self.warn('query', e)
+            return json.dumps({'ok': False, 'error': 'query failed'})
+
+    @pyqtSlot(str, str, str, result=str)
+    def submitJob(self, job_id, name, payload):
+        """Start a named job; the reply arrives later through jobFinished"""
+        origin = page_origin(self.page)
+
+        def done(job_id, reply):
+            # Replies go only to this page, and only while it shows the origin that asked
+            if not sip.isdeleted(self) and page_origin(self.page) == origin:
+                self.jobFinished.emit(job_id, reply)
+
+        try:
+            return self.bridge.submit_job(self.tab_id, self.page, job_id, name, payload, done)
+        except Exception as e:
+            self.warn('submitJob', e)
+            return 'job failed'
+
+    @pyqtSlot(str, result=bool)
+    def cancelJob(self, job_id):
+        try:
+            return self.bridge.cancel_job(self.tab_id, job_id)
+        except Exception as e:
+            self.warn('cancelJob', e)
+            return False
 
     @pyqtSlot(str)
     def log(self, message):
         """Log messages from JavaScript"""
-        print(f"JavaScript: {message}")
-        self.logger.log_js_error(message)
+        TRACER.instant('log', 'bridge', TRACE_TID_BROWSER, length=len(message))
+        self.bridge.handle_log(self.tab_id, message)
 
     @pyqtSlot(str, result=str)
     def processPythonData(self, data):
         """Process data from JavaScript"""
+        TRACER.instant('processPythonData', 'bridge', TRACE_TID_BROWSER, length=len(data))
         try:
             return f"Processed by Python: {data.upper()}"
         except Exception as e:
@@ -73,11 +3101,8 @@ class JavaScriptBridge(QObject):
     @pyqtSlot(str)
     def saveToFile(self, content):
         """Save data from JavaScript"""
-        try:
-            with open('browser_data.txt', 'a', encoding='utf-8') as f:
-                f.write(f"{content}\n")
-        except Exception as e:
-            self.log(f"Error saving data: {e}")
+        TRACER.instant('saveToFile', 'bridge', TRACE_TID_BROWSER, length=len(content))
+        self.bridge.handle_save(self.tab_id, content)
 
     @pyqtSlot(str)
     def onVideoDownloaded(self, url):
@@ -87,147 +3112,1616 @@ class JavaScriptBridge(QObject):
     def onVideoError(self, error):
         QMessageBox.warning(None, "Error", f"Video error: {error}")
 
-class Browser(QMainWindow):
+def load_qwebchannel_js():
+    """Source of Qt's qwebchannel.js, read once from the Qt resources"""
+    global QWEBCHANNEL_JS
+    if QWEBCHANNEL_JS is None:
+        qwebchannel = QFile(':/qtwebchannel/qwebchannel.js')
+        if qwebchannel.open(QIODevice.ReadOnly):
+            QWEBCHANNEL_JS = bytes(qwebchannel.readAll()).decode('utf-8')
+            qwebchannel.close()
+        else:
+            QWEBCHANNEL_JS = ''
+    return QWEBCHANNEL_JS
+
+QWEBCHANNEL_JS = None
+
+class ScriptCost:
+    __slots__ = ('count', 'duration_ms', 'blocking_ms', 'sites')
+
     def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.blocking_ms = 0.0
+        self.sites = set()
+
+class LongTaskAttribution:
+    """Aggregates long-task reports from pages by script URL and origin.
+
+    Pages batch their observations in JavaScript and send them every few
+    seconds, so this only merges already-summarised rows.
+    """
+    def __init__(self, block_threshold_ms=2000, profile_threshold_ms=1000):
+        self.block_threshold_ms = block_threshold_ms
+        self.profile_threshold_ms = profile_threshold_ms
+        self.scripts = {}  # script URL -> ScriptCost
+        self.page_blocking = {}  # first-party origin -> [reports, blocking ms]
+
+    def ingest(self, page_url, rows):
+        page = QUrl(page_url)
+        site = f"{page.scheme()}://{page.host()}"
+        page_total = 0.0
+        for script_url, count, duration_ms, blocking_ms in rows:
+            cost = self.scripts.get(script_url)
+            if cost is None:
+                cost = self.scripts[script_url] = ScriptCost()
+            cost.count += count
+            cost.duration_ms += duration_ms
+            cost.blocking_ms += blocking_ms
+            cost.sites.add(site)
+            page_total += blocking_ms
+        totals = self.page_blocking.setdefault(site, [0, 0.0])
+        totals[0] += 1
+        totals[1] += page_total
+
+    def by_origin(self):
+        """Rank script origins by total main-thread blocking time"""
+        origins = {}
+        for script_url, cost in self.scripts.items():
+            url = QUrl(script_url)
+            origin = f"{url.scheme()}://{url.host()}" if url.host() else (script_url or 'inline / unknown')
+            row = origins.setdefault(origin, {'origin': origin, 'host': url.host(), 'count': 0,
+                                              'blocking_ms': 0.0, 'sites': set()})
+            row['count'] += cost.count
+            row['blocking_ms'] += cost.blocking_ms
+            row['sites'] |= cost.sites
+        for row in origins.values():
+            row['third_party'] = bool(row['host']) and any(
+                registrable_domain(QUrl(site).host()) != registrable_domain(row['host']) for site in row['sites']
+            )
+        return sorted(origins.values(), key=lambda row: row['blocking_ms'], reverse=True)
+
+    def blocklist_candidates(self):
+        """Third-party hosts that block the main thread on more than one site"""
+        return [row['host'] for row in self.by_origin()
+                if row['third_party'] and len(row['sites']) > 1 and row['blocking_ms'] >= self.block_threshold_ms]
+
+    def heavy_sites(self):
+        """First-party origins whose pages average more blocking per report than the threshold"""
+        return [site for site, (reports, blocking_ms) in self.page_blocking.items()
+                if reports and blocking_ms / reports >= self.profile_threshold_ms]
+
+LONG_TASK_OBSERVER_JS = """
+(function() {
+    if (window.__ziLongTasks || !window.PerformanceObserver) {
+        return;
+    }
+    const supported = PerformanceObserver.supportedEntryTypes || [];
+    const costs = new Map();  // script URL -> [count, duration, blocking]
+    window.__ziLongTasks = costs;
+
+    function add(scriptUrl, duration, blocking) {
+        const cost = costs.get(scriptUrl) || [0, 0, 0];
+        cost[0] += 1;
+        cost[1] += duration;
+        cost[2] += blocking;
+        costs.set(scriptUrl, cost);
+    }
+
+    function flush() {
+        if (!costs.size || !window.ziBridge) {
+            return;
+        }
+        const rows = [];
+        costs.forEach((cost, scriptUrl) => rows.push([scriptUrl, cost[0], Math.round(cost[1]), Math.round(cost[2])]));
+        costs.clear();
+        window.ziBridge.post('longtasks', { url: location.href, rows: rows });
+    }
+
+    if (supported.includes('long-animation-frame')) {
+        // Long animation frames say which scripts ran during the frame
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                const blocking = entry.blockingDuration || Math.max(0, entry.duration - 50);
+                const scripts = entry.scripts || [];
+                if (!scripts.length) {
+                    add('', entry.duration, blocking);
+                    continue;
+                }
+                const total = scripts.reduce((sum, script) => sum + script.duration, 0) || 1;
+                for (const script of scripts) {
+                    const share = script.duration / total;
+                    add(script.sourceURL || script.sourceLocation || script.name || '', script.duration, blocking * share);
+                }
+            }
+        }).observe({ type: 'long-animation-frame', buffered: true });
+    } else if (supported.includes('longtask')) {
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                const attribution = (entry.attribution || [])[0];
+                const source = attribution && (attribution.containerSrc || attribution.containerName);
+                add(source || '', entry.duration, Math.max(0, entry.duration - 50));
+            }
+        }).observe({ type: 'longtask', buffered: true });
+    } else {
+        return;
+    }
+
+    setInterval(flush, 5000);
+    document.addEventListener('visibilitychange', () => document.hidden && flush());
+    window.addEventListener('pagehide', flush);
+})();
+"""
+
+class ErrorEntry:
+    __slots__ = ('kind', 'message', 'source', 'line', 'url', 'count', 'first_seen', 'last_seen')
+
+    def __init__(self, kind, message, source, line, url):
+        self.kind = kind
+        self.message = message
+        self.source = source
+        self.line = line
+        self.url = url
+        self.count = 0
+        self.first_seen = self.last_seen = time.time()
+
+class ErrorAggregator:
+    """Deduplicated JavaScript errors per tab.
+
+    Pages fingerprint errors by kind, message, source and line and only send
+    a fingerprint the first time it occurs, followed by periodic repeat
+    counts. Each tab keeps the most recent max_entries fingerprints; only
+    new fingerprints are written to the log.
+    """
+    def __init__(self, max_entries=200):
+        self.max_entries = max_entries
+        self.tabs = {}  # tab id -> OrderedDict of fingerprint -> ErrorEntry
+        self.logger = BrowserLogger()
+
+    def entries_for(self, tab_id):
+        if tab_id not in self.tabs:
+            self.tabs[tab_id] = OrderedDict()
+        return self.tabs[tab_id]
+
+    def add(self, tab_id, data):
+        entries = self.entries_for(tab_id)
+        fingerprint = data['fp']
+        entry = entries.get(fingerprint)
+        if entry is None:
+            entry = ErrorEntry(data.get('kind', 'error'), data.get('message', ''), data.get('source', ''),
+                               data.get('line', 0), data.get('url', ''))
+            entries[fingerprint] = entry
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self.logger.log_js_error(f"[tab {tab_id}] {entry.kind}: {entry.message} at {entry.source}:{entry.line}")
+        entry.count += data.get('count', 1)
+        entry.last_seen = time.time()
+
+    def add_counts(self, tab_id, rows):
+        entries = self.entries_for(tab_id)
+        for fingerprint, count in rows:
+            entry = entries.get(fingerprint)
+            if entry is not None:
+                entry.count += count
+                entry.last_seen = time.time()
+
+    def clear(self, tab_id):
+        self.tabs.pop(tab_id, None)
+
+    def entries(self, tab_id):
+        """Error entries of a tab, most recently seen first"""
+        return sorted(self.tabs.get(tab_id, {}).values(), key=lambda entry: entry.last_seen, reverse=True)
+
+ERROR_AGGREGATOR_JS = """
+(function() {
+    if (window.__ziErrors) {
+        return;
+    }
+    const MAX_FINGERPRINTS = 200;
+    const seen = new Map();  // fingerprint -> occurrences not yet reported
+    const pending = [];  // first reports made before ziBridge existed
+    window.__ziErrors = seen;
+
+    function flush() {
+        if (!window.ziBridge) {
+            return false;
+        }
+        while (pending.length) {
+            window.ziBridge.post('error', pending.shift());
+        }
+        return true;
+    }
+
+    function report(kind, message, source, line) {
+        message = String(message).slice(0, 500);
+        source = String(source || '');
+        const fp = [kind, message, source, line || 0].join('|');
+        if (seen.has(fp)) {
+            seen.set(fp, seen.get(fp) + 1);
+            return;
+        }
+        if (seen.size >= MAX_FINGERPRINTS) {
+            return;
+        }
+        seen.set(fp, 0);
+        pending.push({
+            fp: fp, kind: kind, message: message, source: source,
+            line: line || 0, url: location.href, count: 1
+        });
+        flush();
+    }
+
+    // Repeats are only sent as counts, every few seconds
+    setInterval(function() {
+        if (!flush()) {
+            return;
+        }
+        const rows = [];
+        seen.forEach((count, fp) => {
+            if (count) {
+                rows.push([fp, count]);
+                seen.set(fp, 0);
+            }
+        });
+        if (rows.length) {
+            window.ziBridge.post('error-counts', rows);
+        }
+    }, 5000);
+
+    window.addEventListener('error', function(event) {
+        report('error', event.message, event.filename, event.lineno);
+    });
+
+    window.addEventListener('unhandledrejection', function(event) {
+        const reason = event.reason;
+        report('rejection', reason && reason.message || reason, reason && reason.fileName, reason && reason.lineNumber);
+    });
+
+    const originalError = console.error;
+    console.error = function() {
+        report('console', Array.from(arguments).join(' '), '', 0);
+        originalError.apply(console, arguments);
+    };
+})();
+"""
+
+class BrowserPage(QWebEnginePage):
+    """Page that lets the browser veto navigations before they start"""
+    def __init__(self, profile, parent=None):
+        super().__init__(profile, parent)
+        self.navigation_hook = None
+
+    def acceptNavigationRequest(self, url, nav_type, is_main_frame):
+        if self.navigation_hook is not None:
+            try:
+                if not self.navigation_hook(url, nav_type, is_main_frame):
+                    return False
+            except Exception as e:
+                logging.getLogger('ZiBrowser').warning(f"Navigation hook failed: {e}")
+        return super().acceptNavigationRequest(url, nav_type, is_main_frame)
+
+class Speculation:
+    __slots__ = ('tab_id', 'url', 'page', 'started', 'loaded')
+
+    def __init__(self, tab_id, url, page):
+        self.tab_id = tab_id
+        self.url = url
+        self.page = page
+        self.started = time.monotonic()
+        self.loaded = None  # True / False once loadFinished arrives
+
+class SpeculationManager(QObject):
+    """Prerenders links the user is about to click into hidden pages.
+
+    Pages preconnect to hovered links themselves and report hovers here. A
+    high-confidence hover (long dwell or touchstart) on a link the page
+    lists for prerendering in its speculation rules loads the link in a
+    hidden page that is swapped into the tab if the link is clicked. Other
+    links are only preconnected, since a prerender performs the GET and
+    runs the target's scripts.
+    Budgets cap concurrent loads, hidden pages kept alive (memory) and
+    prerenders per window of time (data). Unused prerenders expire.
+    """
+    def __init__(self, create_page, parent=None, prerender=True, max_concurrent=2, max_pages=3,
+                 max_per_window=20, window=300, expire_after=60):
+        super().__init__(parent)
+        self.create_page = create_page
+        self.prerender = prerender
+        self.max_concurrent = max_concurrent
+        self.max_pages = max_pages
+        self.max_per_window = max_per_window
+        self.window = window
+        self.expire_after = expire_after
+        self.paused = False
+        self.speculations = OrderedDict()  # (tab id, url) -> Speculation, oldest first
+        self.recent_starts = deque()
+        self.counters = {'hovers': 0, 'preconnects': 0, 'prerenders': 0, 'hits': 0, 'wasted': 0, 'over_budget': 0}
+
+        self.expiry = QTimer(self)
+        self.expiry.timeout.connect(self.expire)
+        self.expiry.start(10000)
+
+    def on_hover(self, tab_id, data):
+        self.counters['hovers'] += 1
+        if data.get('preconnect'):
+            self.counters['preconnects'] += 1
+        if data.get('confidence') == 'high':
+            self.speculate(tab_id, data['url'])
+
+    def within_budget(self):
+        now = time.monotonic()
+        while self.recent_starts and now - self.recent_starts[0] > self.window:
+            self.recent_starts.popleft()
+        loading = sum(1 for speculation in self.speculations.values() if speculation.loaded is None)
+        return loading < self.max_concurrent and len(self.recent_starts) < self.max_per_window
+
+    def speculate(self, tab_id, url):
+        key = (tab_id, url)
+        if not self.prerender or self.paused or key in self.speculations:
+            return
+        if not url.startswith(('http://', 'https://')):
+            return
+        if not self.within_budget():
+            self.counters['over_budget'] += 1
+            return
+        page = self.create_page(tab_id)
+        if page is None:
+            return
+
+        speculation = Speculation(tab_id, url, page)
+        self.speculations[key] = speculation
+        self.recent_starts.append(time.monotonic())
+        self.counters['prerenders'] += 1
+        page.loadFinished.connect(lambda ok, speculation=speculation: setattr(speculation, 'loaded', ok))
+        page.load(QUrl(url))
+        TRACER.instant('prerender', 'speculation', 1000 + tab_id, url=url)
+
+        # Memory budget: drop the oldest hidden pages
+        while len(self.speculations) > self.max_pages:
+            self.drop(next(iter(self.speculations)))
+
+    def take(self, tab_id, url):
+        """Hand over the prerendered page for a clicked link, or None"""
+        speculation = self.speculations.pop((tab_id, url), None)
+        if speculation is None:
+            return None
+        if speculation.loaded is False:
+            self.counters['wasted'] += 1
+            speculation.page.deleteLater()
+            return None
+        self.counters['hits'] += 1
+        return speculation.page
+
+    def drop(self, key):
+        speculation = self.speculations.pop(key)
+        self.counters['wasted'] += 1
+        speculation.page.deleteLater()
+
+    def expire(self):
+        now = time.monotonic()
+        for key, speculation in list(self.speculations.items()):
+            if now - speculation.started > self.expire_after:
+                self.drop(key)
+
+    def discard_tab(self, tab_id):
+        for key in [key for key in self.speculations if key[0] == tab_id]:
+            self.drop(key)
+
+    def pause(self):
+        """Stop prerendering and release hidden pages"""
+        self.paused = True
+        for key in list(self.speculations):
+            self.drop(key)
+
+    def resume(self):
+        self.paused = False
+
+    def stats(self):
+        finished = self.counters['hits'] + self.counters['wasted']
+        stats = dict(self.counters)
+        stats['hit_rate'] = round(self.counters['hits'] / finished, 3) if finished else 0.0
+        stats['waste_rate'] = round(self.counters['wasted'] / finished, 3) if finished else 0.0
+        stats['active'] = len(self.speculations)
+        return stats
+
+SPECULATION_JS = """
+(function() {
+    if (window.__ziSpeculation) {
+        return;
+    }
+    window.__ziSpeculation = true;
+    const PRECONNECT_DWELL = 80;   // ms of hover before preconnecting
+    const PRERENDER_DWELL = 300;   // ms of hover before asking for a prerender
+    const preconnected = new Set();
+    let timers = [];
+
+    function target(event) {
+        const link = event.target.closest && event.target.closest('a[href]');
+        if (!link || link.target === '_blank' || !/^https?:/.test(link.href)) {
+            return null;
+        }
+        // Same-document fragment links do not need speculation
+        if (link.href.split('#')[0] === location.href.split('#')[0]) {
+            return null;
+        }
+        return link;
+    }
+
+    function preconnect(url) {
+        const origin = new URL(url).origin;
+        if (preconnected.has(origin) || origin === location.origin) {
+            return false;
+        }
+        preconnected.add(origin);
+        const hint = document.createElement('link');
+        hint.rel = 'preconnect';
+        hint.href = origin;
+        document.head && document.head.appendChild(hint);
+        return true;
+    }
+
+    function hrefMatches(pattern, url) {
+        if (window.URLPattern) {
+            try {
+                return new URLPattern(pattern, document.baseURI).test(url);
+            } catch (e) {
+                return false;
+            }
+        }
+        // Without URLPattern, treat the pattern as a glob on the resolved URL
+        let resolved;
+        try {
+            resolved = new URL(pattern, document.baseURI).href;
+        } catch (e) {
+            return false;
+        }
+        const parts = resolved.split('*').map(part => part.replace(/[.+?^${}()|[\]\\\\/]/g, '\\\\$&'));
+        return new RegExp('^' + parts.join('.*') + '$').test(url);
+    }
+
+    function matches(where, link) {
+        if (!where) {
+            return true;
+        }
+        if (where.and) {
+            return where.and.every(condition => matches(condition, link));
+        }
+        if (where.or) {
+            return where.or.some(condition => matches(condition, link));
+        }
+        if (where.not) {
+            return !matches(where.not, link);
+        }
+        if (where.href_matches) {
+            return [].concat(where.href_matches).some(pattern => hrefMatches(pattern, link.href));
+        }
+        if (where.selector_matches) {
+            return [].concat(where.selector_matches).some(selector => {
+                try {
+                    return link.matches(selector);
+                } catch (e) {
+                    return false;
+                }
+            });
+        }
+        return false;
+    }
+
+    // Only links the page lists under "prerender" in <script type="speculationrules">
+    function prerenderAllowed(link) {
+        for (const script of document.querySelectorAll('script[type="speculationrules"]')) {
+            let rules;
+            try {
+                rules = JSON.parse(script.textContent);
+            } catch (e) {
+                continue;
+            }
+            for (const rule of (rules && rules.prerender) || []) {
+                if (rule.urls) {
+                    const listed = rule.urls.some(url => {
+                        try {
+                            return new URL(url, document.baseURI).href === link.href;
+                        } catch (e) {
+                            return false;
+                        }
+                    });
+                    if (listed) {
+                        return true;
+                    }
+                } else if (matches(rule.where, link)) {
+                    return true;
+                }
+            }
+        }
+        return false;
+    }
+
+    function report(url, confidence, preconnectedNow) {
+        if (window.ziBridge) {
+            window.ziBridge.post('hover', { url: url, confidence: confidence, preconnect: preconnectedNow });
+        }
+    }
+
+    function cancel() {
+        timers.forEach(clearTimeout);
+        timers = [];
+    }
+
+    document.addEventListener('mouseover', function(event) {
+        const link = target(event);
+        if (!link) {
+            return;
+        }
+        cancel();
+        const url = link.href;
+        timers.push(setTimeout(() => report(url, 'low', preconnect(url)), PRECONNECT_DWELL));
+        timers.push(setTimeout(() => prerenderAllowed(link) && report(url, 'high', false), PRERENDER_DWELL));
+    }, { passive: true });
+
+    document.addEventListener('mouseout', function(event) {
+        if (target(event)) {
+            cancel();
+        }
+    }, { passive: true });
+
+    // A touch on a link is almost always followed by a click
+    document.addEventListener('touchstart', function(event) {
+        const link = target(event);
+        if (link) {
+            report(link.href, prerenderAllowed(link) ? 'high' : 'low', preconnect(link.href));
+        }
+    }, { passive: true });
+})();
+"""
+
+class StartupLearner:
+    """Learns which origins are visited soon after startup and warms them.
+
+    Each session records the origins first visited within a few minutes of
+    startup, along with the hour of day. At the next startup the top
+    origins, weighted towards recent sessions and the current time of day,
+    get DNS prefetch and preconnect hints from a hidden page. A random
+    fraction is held out so warm and cold time-to-first-byte can be
+    compared.
+    """
+    def __init__(self, path, top_k=5, learn_window=300, warm_window=60, holdout=0.2, max_sessions=30, max_samples=20):
+        self.path = path
+        self.top_k = top_k
+        self.learn_window = learn_window
+        self.warm_window = warm_window
+        self.holdout = holdout
+        self.max_sessions = max_sessions
+        self.max_samples = max_samples
+        self.started = time.monotonic()
+        self.session = {'hour': time.localtime().tm_hour, 'origins': []}
+        self.sessions = []
+        self.ttfb = {}  # origin -> {'warm': [ms, ...], 'cold': [ms, ...]}
+        self.warmed = {}  # origin -> monotonic time the hints were sent
+        self.held_out = {}  # origin -> monotonic time it would have been warmed
+        self.measured = set()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.sessions = saved.get('sessions', [])
+        self.ttfb = saved.get('ttfb', {})
+
+    def save(self):
+        if self.session['origins']:
+            self.sessions.append(self.session)
+            self.session = {'hour': self.session['hour'], 'origins': []}
+        self.sessions = self.sessions[-self.max_sessions:]
+        directory = os.path.dirname(self.path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'sessions': self.sessions, 'ttfb': self.ttfb}, f)
+        os.replace(self.path + '.tmp', self.path)
+
+    def top_origins(self, hour=None, exclude=()):
+        """Origins ranked by decayed visit count, favouring nearby hours of the day"""
+        if hour is None:
+            hour = time.localtime().tm_hour
+        scores = {}
+        for age, session in enumerate(reversed(self.sessions)):
+            distance = abs(session['hour'] - hour)
+            weight = 0.9 ** age * (2.0 if min(distance, 24 - distance) <= 2 else 1.0)
+            for origin in session['origins']:
+                scores[origin] = scores.get(origin, 0.0) + weight
+        ranked = sorted((origin for origin in scores if origin not in exclude), key=scores.get, reverse=True)
+        return ranked[:self.top_k]
+
+    def plan_warmup(self, exclude=()):
+        """Pick the origins to warm now; held-out origins serve as the cold baseline"""
+        now = time.monotonic()
+        warm = []
+        for origin in self.top_origins(exclude=exclude):
+            if random.random() < self.holdout:
+                self.held_out[origin] = now
+            else:
+                self.warmed[origin] = now
+                warm.append(origin)
+        return warm
+
+    def on_timing(self, tab_id, data):
+        origin = data.get('origin')
+        if not origin or not origin.startswith(('http://', 'https://')):
+            return
+        now = time.monotonic()
+        if now - self.started < self.learn_window and origin not in self.session['origins']:
+            self.session['origins'].append(origin)
+
+        # Only the first navigation to an origin says anything about warming
+        if origin in self.measured:
+            return
+        self.measured.add(origin)
+        for bucket, started in (('warm', self.warmed.get(origin)), ('cold', self.held_out.get(origin))):
+            if started is not None and now - started < self.warm_window:
+                samples = self.ttfb.setdefault(origin, {'warm': [], 'cold': []})[bucket]
+                samples.append(round(data['ttfb'], 1))
+                del samples[:-self.max_samples]
+                TRACER.instant('startup ttfb', 'speculation', 1000 + tab_id, origin=origin, bucket=bucket, ttfb=data['ttfb'])
+
+    def report(self):
+        def median(values):
+            return round(statistics.median(values), 1) if values else None
+
+        rows = []
+        for origin in self.top_origins():
+            samples = self.ttfb.get(origin, {'warm': [], 'cold': []})
+            warm, cold = median(samples['warm']), median(samples['cold'])
+            rows.append({
+                'origin': origin,
+                'warm_samples': len(samples['warm']),
+                'warm_ms': warm,
+                'cold_samples': len(samples['cold']),
+                'cold_ms': cold,
+                'saved_ms': round(cold - warm, 1) if warm is not None and cold is not None else None,
+            })
+        return rows
+
+STARTUP_LEARNER = None
+
+def get_startup_learner():
+    """Process-wide startup learner, loaded on first use and saved on quit"""
+    global STARTUP_LEARNER
+    if STARTUP_LEARNER is None:
+        STARTUP_LEARNER = StartupLearner(os.path.join(DATA_PATH, 'startup_origins.json'))
+        QApplication.instance().aboutToQuit.connect(STARTUP_LEARNER.save)
+    return STARTUP_LEARNER
+
+def warmup_html(origins):
+    """Document whose only job is to resolve and connect to the given origins"""
+    # No crossorigin attribute: navigations use the credentialed connection pool
+    hints = ''.join(
+        f'<link rel="dns-prefetch" href="{html.escape(origin)}"><link rel="preconnect" href="{html.escape(origin)}">'
+        for origin in origins
+    )
+    return f'<!DOCTYPE html><html><head>{hints}</head><body></body></html>'
+
+NAVIGATION_TIMING_JS = """
+(function() {
+    if (window !== window.top || window.__ziNavigationTiming) {
+        return;
+    }
+    window.__ziNavigationTiming = true;
+
+    function report() {
+        const nav = performance.getEntriesByType('navigation')[0];
+        if (!nav || !window.ziBridge || nav.responseStart <= 0) {
+            return;
+        }
+        window.ziBridge.post('navtiming', {
+            origin: location.origin,
+            ttfb: nav.responseStart - nav.startTime,
+            connect: nav.connectEnd - nav.domainLookupStart
+        });
+    }
+
+    // Prerendered pages report once they are actually shown
+    function reportWhenVisible() {
+        if (document.visibilityState === 'visible') {
+            report();
+        } else {
+            document.addEventListener('visibilitychange', function onVisible() {
+                if (document.visibilityState === 'visible') {
+                    document.removeEventListener('visibilitychange', onVisible);
+                    report();
+                }
+            });
+        }
+    }
+
+    if (document.readyState === 'complete') {
+        reportWhenVisible();
+    } else {
+        window.addEventListener('load', () => setTimeout(reportWhenVisible, 0), { once: true });
+    }
+})();
+"""
+
+class WatchState:
+    __slots__ = ('view', 'sent_at', 'sequence', 'status', 'failures', 'reload_pending')
+
+    def __init__(self, view):
+        self.view = view
+        self.sent_at = None
+        self.sequence = 0
+        self.status = 'ok'
+        self.failures = 0
+        self.reload_pending = False
+
+class OriginJank:
+    """Heartbeat latencies and failures seen for one origin"""
+    def __init__(self):
+        self.samples = deque(maxlen=200)
+        self.hangs = 0
+        self.crashes = 0
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class RendererWatchdog(QObject):
+    """Detects crashed renderers and pages whose main thread stops responding.
+
+    Visible tabs are pinged with a trivial runJavaScript call; the time to
+    the callback is the heartbeat latency. A ping unanswered for hang_after
+    seconds marks the tab hung. Crashed and hung tabs are reloaded after an
+    exponentially growing delay when auto_reload is on.
+    """
+    status_changed = pyqtSignal(object, str)  # view, 'ok' | 'hung' | 'crashed'
+
+    def __init__(self, parent=None, interval=2.0, hang_after=8.0, auto_reload=True, max_backoff=300, reloader=None):
+        super().__init__(parent)
+        self.hang_after = hang_after
+        self.auto_reload = auto_reload
+        self.reloader = reloader or (lambda view: view.reload())
+        self.max_backoff = max_backoff
+        self.states = {}  # tab id -> WatchState
+        self.origins = {}  # origin -> OriginJank
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(int(interval * 1000))
+
+    def watch(self, view):
+        self.states[view.tab_id] = WatchState(view)
+        view.page().renderProcessTerminated.connect(
+            lambda status, code, tab_id=view.tab_id: self.on_terminated(tab_id, status, code)
+        )
+
+    def unwatch(self, view):
+        self.states.pop(view.tab_id, None)
+
+    def jank_for(self, view):
+        origin = page_origin(view.page())
+        if origin not in self.origins:
+            self.origins[origin] = OriginJank()
+        return self.origins[origin]
+
+    def tick(self):
+        now = time.perf_counter()
+        for tab_id, state in list(self.states.items()):
+            view = state.view
+            if sip.isdeleted(view) or state.status == 'crashed':
+                continue
+            if not view.isVisible():
+                # Background tabs are not pinged; forget any ping still in flight
+                state.sent_at = None
+                state.sequence += 1
+                continue
+            if state.sent_at is not None:
+                if now - state.sent_at > self.hang_after and not state.reload_pending:
+                    if state.status == 'ok':
+                        self.jank_for(view).hangs += 1
+                        self.set_status(state, 'hung')
+                    self.schedule_reload(state)
+                continue
+            state.sent_at = now
+            state.sequence += 1
+            view.page().runJavaScript(
+                '1', lambda _, tab_id=tab_id, sequence=state.sequence: self.on_pong(tab_id, sequence)
+            )
+
+    def on_pong(self, tab_id, sequence):
+        state = self.states.get(tab_id)
+        if state is None or sequence != state.sequence or state.sent_at is None:
+            return
+        latency_ms = (time.perf_counter() - state.sent_at) * 1000
+        state.sent_at = None
+        self.jank_for(state.view).samples.append(latency_ms)
+        TRACER.instant('heartbeat', 'watchdog', 1000 + tab_id, latency_ms=round(latency_ms, 2))
+        if state.status != 'ok':
+            self.set_status(state, 'ok')
+        else:
+            state.failures = 0
+
+    def on_terminated(self, tab_id, status, exit_code):
+        state = self.states.get(tab_id)
+        if state is None or status == QWebEnginePage.NormalTerminationStatus:
+            return
+        self.jank_for(state.view).crashes += 1
+        TRACER.instant('renderer terminated', 'watchdog', 1000 + tab_id, status=int(status), exit_code=exit_code)
+        state.sent_at = None
+        self.set_status(state, 'crashed')
+        self.schedule_reload(state)
+
+    def set_status(self, state, status):
+        state.status = status
+        logging.getLogger('ZiBrowser').warning(f"Tab {state.view.tab_id} is {status}: {state.view.url().toString()}")
+        self.status_changed.emit(state.view, status)
+
+    def schedule_reload(self, state):
+        if not self.auto_reload or state.reload_pending:
+            return
+        delay = min(self.max_backoff, 2 ** state.failures)
+        state.failures += 1
+        state.reload_pending = True
+        QTimer.singleShot(int(delay * 1000), lambda tab_id=state.view.tab_id: self.reload(tab_id))
+
+    def reload(self, tab_id):
+        state = self.states.get(tab_id)
+        if state is None or sip.isdeleted(state.view):
+            return
+        state.reload_pending = False
+        if state.status == 'ok':
+            return
+        state.sent_at = None
+        state.sequence += 1  # ignore the answer to any ping sent before the reload
+        if state.status == 'crashed':
+            # Clears the tab's [Crashed] label; a new crash sets it again
+            self.set_status(state, 'ok')
+        self.reloader(state.view)
+
+    def report(self):
+        """Origins ordered by heartbeat p95, worst first"""
+        rows = []
+        for origin, jank in self.origins.items():
+            rows.append({
+                'origin': origin,
+                'samples': len(jank.samples),
+                'p50_ms': round(jank.percentile(0.5), 1),
+                'p95_ms': round(jank.percentile(0.95), 1),
+                'max_ms': round(max(jank.samples), 1) if jank.samples else 0.0,
+                'hangs': jank.hangs,
+                'crashes': jank.crashes,
+            })
+        return sorted(rows, key=lambda row: (row['hangs'] + row['crashes'], row['p95_ms']), reverse=True)
+
+LOAD_PRIORITIES = ('foreground', 'user', 'background', 'restore')
+
+class LoadJob:
+    def __init__(self, view, priority, url):
+        self.view = view
+        self.priority = priority
+        self.url = url  # None to reload
+        self.queued_at = time.monotonic()
+        self.cancelled = False
+
+class LoadScheduler(QObject):
+    """Starts the navigations of every window's tabs in priority order.
+
+    Loads in a visible tab start at once. Others wait in a queue ordered
+    by priority (user, then background, then restore) and by arrival, and
+    at most max_background of them run together across all windows, which
+    share the network and the renderers. Background and restore loads also
+    wait while any window's visible tab is loading. A newer request for a
+    tab replaces its queued one. A load that has not finished after
+    load_timeout seconds gives up its slot. Tab ids are only unique within
+    a window, so loads are tracked by view.
+    """
+    def __init__(self, parent=None, max_background=2, load_timeout=30.0):
+        super().__init__(parent)
+        self.max_background = max_background
+        self.load_timeout = load_timeout
+        self.queue = []  # heap of (priority rank, sequence, job)
+        self.queued = {}  # view -> waiting job
+        self.active = {}  # view -> (job, start time) for loads holding a background slot
+        self.loading = set()  # views between loadStarted and loadFinished
+        self.foregrounds = {}  # window -> its visible view
+        self.sequence = itertools.count()
+        self.waits = {priority: deque(maxlen=500) for priority in LOAD_PRIORITIES}
+        self.counters = {'started': 0, 'replaced': 0, 'timed_out': 0, 'max_queued': 0}
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.expire)
+        self.timer.start(1000)
+
+    def attach(self, view):
+        """Follow a view's loads; called once when the view is created"""
+        view.loadStarted.connect(lambda view=view: self.loading.add(view))
+        view.loadFinished.connect(lambda _, view=view: self.on_finished(view))
+
+    def forget(self, view):
+        """Drop everything about a view that is going away"""
+        job = self.queued.pop(view, None)
+        if job is not None:
+            job.cancelled = True
+        self.active.pop(view, None)
+        self.loading.discard(view)
+        for window, foreground in list(self.foregrounds.items()):
+            if foreground is view:
+                del self.foregrounds[window]
+        self.pump()
+
+    def set_foreground(self, window, view):
+        self.foregrounds[window] = view
+        job = self.queued.get(view)
+        if job is not None:
+            # Shown before its turn came: load it now
+            self.request(view, 'foreground', job.url)
+        self.pump()
+
+    def foreground_loading(self):
+        return any(view in self.loading for view in self.foregrounds.values())
+
+    def request(self, view, priority, url=None):
+        """Load url in view, or reload it if url is None, when its priority allows"""
+        previous = self.queued.pop(view, None)
+        if previous is not None:
+            previous.cancelled = True
+            self.counters['replaced'] += 1
+            priority = min(priority, previous.priority, key=LOAD_PRIORITIES.index)
+        if any(view is foreground for foreground in self.foregrounds.values()):
+            priority = 'foreground'
+        job = LoadJob(view, priority, url)
+        if priority == 'foreground':
+            self.start(job)
+            return
+        self.queued[view] = job
+        heapq.heappush(self.queue, (LOAD_PRIORITIES.index(priority), next(self.sequence), job))
+        self.counters['max_queued'] = max(self.counters['max_queued'], len(self.queued))
+        self.pump()
+
+    def pump(self):
+        while self.queue and len(self.active) < self.max_background:
+            _, _, job = self.queue[0]
+            if not job.cancelled and job.priority != 'user' and self.foreground_loading():
+                return
+            heapq.heappop(self.queue)
+            if job.cancelled or sip.isdeleted(job.view):
+                continue
+            del self.queued[job.view]
+            self.start(job)
+
+    def start(self, job):
+        now = time.monotonic()
+        wait = now - job.queued_at
+        self.waits[job.priority].append(wait)
+        self.counters['started'] += 1
+        if job.priority != 'foreground':
+            self.active[job.view] = (job, now)
+        TRACER.instant('load start', 'loads', tab_trace_tid(job.view), priority=job.priority, wait_ms=round(wait * 1000, 1))
+        if job.url is None:
+            job.view.reload()
+        else:
+            job.view.setUrl(job.url)
+
+    def on_finished(self, view):
+        self.loading.discard(view)
+        self.active.pop(view, None)
+        self.pump()
+
+    def expire(self):
+        now = time.monotonic()
+        for view, (job, started) in list(self.active.items()):
+            if now - started > self.load_timeout:
+                del self.active[view]
+                self.counters['timed_out'] += 1
+        self.pump()
+
+    def stats(self):
+        stats = {'queued': len(self.queued), 'active_background': len(self.active),
+                 'foreground_loading': self.foreground_loading()}
+        stats.update(self.counters)
+        for priority, waits in self.waits.items():
+            if waits:
+                ordered = sorted(waits)
+                stats[f'{priority}_wait_p50_ms'] = round(statistics.median(ordered) * 1000, 1)
+                stats[f'{priority}_wait_p95_ms'] = round(ordered[int(len(ordered) * 0.95)] * 1000, 1)
+        return stats
+
+LOAD_SCHEDULER = None
+
+def get_load_scheduler():
+    """Process-wide load scheduler, so a second window shares the background load cap"""
+    global LOAD_SCHEDULER
+    if LOAD_SCHEDULER is None:
+        LOAD_SCHEDULER = LoadScheduler(QApplication.instance(), max_background=get_settings().get('max_background_loads'))
+    return LOAD_SCHEDULER
+
+def read_memory_sample(proc_root='/proc', cgroup_root='/sys/fs/cgroup'):
+    """System memory state from /proc/meminfo, PSI and the cgroup v2 limit; missing sources are None"""
+    sample = {'time': time.time(), 'total_mb': None, 'available_mb': None, 'psi_some_avg10': None,
+              'psi_full_avg10': None, 'cgroup_current_mb': None, 'cgroup_max_mb': None}
+    try:
+        with open(os.path.join(proc_root, 'meminfo'), encoding='ascii') as f:
+            meminfo = dict(line.split(':', 1) for line in f if ':' in line)
+        sample['total_mb'] = int(meminfo['MemTotal'].split()[0]) / 1024
+        sample['available_mb'] = int(meminfo['MemAvailable'].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        with open(os.path.join(proc_root, 'pressure', 'memory'), encoding='ascii') as f:
+            for line in f:
+                kind, *fields = line.split()
+                values = dict(field.split('=') for field in fields)
+                sample[f'psi_{kind}_avg10'] = float(values['avg10'])
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        # The unified (v2) hierarchy is the "0::" line
+        with open(os.path.join(proc_root, 'self', 'cgroup'), encoding='ascii') as f:
+            path = next(line.split(':', 2)[2].strip() for line in f if line.startswith('0::'))
+        directory = os.path.join(cgroup_root, path.lstrip('/'))
+        with open(os.path.join(directory, 'memory.current'), encoding='ascii') as f:
+            sample['cgroup_current_mb'] = int(f.read()) / (1024 * 1024)
+        with open(os.path.join(directory, 'memory.max'), encoding='ascii') as f:
+            limit = f.read().strip()
+        sample['cgroup_max_mb'] = None if limit == 'max' else int(limit) / (1024 * 1024)
+    except (OSError, StopIteration, ValueError):
+        pass
+    return sample
+
+MEMORY_PRESSURE_LEVELS = ('normal', 'moderate', 'critical')
+
+# level -> limits; any one of them crossed puts the system at that level
+MEMORY_PRESSURE_THRESHOLDS = {
+    'critical': {'available_ratio': 0.05, 'psi_some_avg10': 40.0, 'psi_full_avg10': 10.0, 'cgroup_ratio': 0.95},
+    'moderate': {'available_ratio': 0.15, 'psi_some_avg10': 10.0, 'psi_full_avg10': 2.0, 'cgroup_ratio': 0.85},
+}
+
+def classify_memory_pressure(sample):
+    """'normal', 'moderate' or 'critical' for a memory sample"""
+    available_ratio = sample['available_mb'] / sample['total_mb'] if sample['total_mb'] else None
+    cgroup_ratio = sample['cgroup_current_mb'] / sample['cgroup_max_mb'] if sample['cgroup_max_mb'] else None
+    for level in ('critical', 'moderate'):
+        limits = MEMORY_PRESSURE_THRESHOLDS[level]
+        if available_ratio is not None and available_ratio < limits['available_ratio']:
+            return level
+        if cgroup_ratio is not None and cgroup_ratio >= limits['cgroup_ratio']:
+            return level
+        for name in ('psi_some_avg10', 'psi_full_avg10'):
+            if sample[name] is not None and sample[name] >= limits[name]:
+                return level
+    return 'normal'
+
+class MemoryPressureMonitor(QObject):
+    """Samples system memory on a timer and reports the pressure level.
+
+    A higher level is reported at once; a lower one only after calm_samples
+    samples in a row agree, so the browser does not flap between freeing
+    and restoring. Actions taken in response are logged with the memory
+    state before and, effect_delay seconds later, after them.
+    """
+    level_changed = pyqtSignal(str)
+
+    def __init__(self, parent=None, interval=5.0, calm_samples=3, effect_delay=10.0, reader=read_memory_sample):
+        super().__init__(parent)
+        self.reader = reader
+        self.calm_samples = calm_samples
+        self.effect_delay = effect_delay
+        self.level = 'normal'
+        self.calm = 0
+        self.sample = reader()
+        self.actions = deque(maxlen=200)
+        # The 'ZiBrowser' logger only passes warnings; this child writes every transition and action to the same file
+        self.log = logging.getLogger('ZiBrowser.memory')
+        self.log.setLevel(logging.INFO)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(int(interval * 1000))
+
+    def poll(self):
+        self.sample = self.reader()
+        level = classify_memory_pressure(self.sample)
+        rank = MEMORY_PRESSURE_LEVELS.index
+        if rank(level) > rank(self.level):
+            self.set_level(level)
+        elif rank(level) < rank(self.level):
+            self.calm += 1
+            if self.calm >= self.calm_samples:
+                self.set_level(level)
+        else:
+            self.calm = 0
+
+    def set_level(self, level):
+        self.calm = 0
+        self.log.info(
+            f"Memory pressure {self.level} -> {level}: available {self.sample['available_mb']} MB, "
+            f"PSI some {self.sample['psi_some_avg10']}, cgroup {self.sample['cgroup_current_mb']}/{self.sample['cgroup_max_mb']} MB"
+        )
+        self.level = level
+        self.level_changed.emit(level)
+
+    def log_action(self, action, detail=''):
+        """Record an action taken under pressure and measure memory again once it has had time to work"""
+        entry = {'time': time.time(), 'level': self.level, 'action': action, 'detail': detail,
+                 'before': self.reader(), 'after': None}
+        self.actions.append(entry)
+        self.log.info(f"Memory action at {self.level}: {action} {detail}")
+        QTimer.singleShot(int(self.effect_delay * 1000), lambda entry=entry: self.measure(entry))
+        return entry
+
+    def measure(self, entry):
+        entry['after'] = self.reader()
+        freed = self.freed_mb(entry)
+        if freed is not None:
+            self.log.info(f"Memory action {entry['action']}: {freed:+.1f} MB available after {self.effect_delay:.0f} s")
+
+    @staticmethod
+    def freed_mb(entry):
+        """Change in available memory since the action, or None until it is measured"""
+        before, after = entry['before'], entry['after']
+        if after is None:
+            return None
+        if before['cgroup_current_mb'] is not None and after['cgroup_current_mb'] is not None:
+            return before['cgroup_current_mb'] - after['cgroup_current_mb']
+        if before['available_mb'] is not None and after['available_mb'] is not None:
+            return after['available_mb'] - before['available_mb']
+        return None
+
+MEMORY_MONITOR = None
+
+def get_memory_monitor():
+    """Process-wide memory pressure monitor, started on first use"""
+    global MEMORY_MONITOR
+    if MEMORY_MONITOR is None:
+        MEMORY_MONITOR = MemoryPressureMonitor(QApplication.instance(), interval=get_settings().get('memory_poll_seconds'))
+    return MEMORY_MONITOR
+
+class Tab:
+    """A tab of a window. It outlives its view, which exists only while the tab is in use"""
+    def __init__(self, tab_id, url, title):
+        self.tab_id = tab_id
+        self.url = url
+        self.title = title
+        self.status = None  # 'hung' or 'crashed' while the watchdog says so
+        self.pinned = False
+        self.view = None
+        self.last_used = time.monotonic()
+
+    def label(self):
+        prefix = {'hung': '[Not Responding] ', 'crashed': '[Crashed] '}.get(self.status, '')
+        return prefix + (self.title or self.url.toString())
+
+TAB_MIME_TYPE = 'application/x-zibrowser-tab'
+
+class TabModel(QAbstractListModel):
+    """Tabs of a window in display order, addressed by stable tab id.
+
+    Views never go through the model, so a list view over it only asks
+    for the rows on screen and opening, closing or moving a tab creates
+    no widgets. What remains is a list insert, remove or index lookup,
+    linear in the tab count but cheap next to QTabWidget's per-tab
+    relayout. Drag and drop reorders.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.order = []
+        self.by_id = {}
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        return iter(list(self.order))
+
+    def get(self, tab_id):
+        return self.by_id.get(tab_id)
+
+    def row(self, tab):
+        return self.order.index(tab)
+
+    def tab_at(self, row):
+        return self.order[row] if 0 <= row < len(self.order) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.order)
+
+    def data(self, index, role=Qt.DisplayRole):
+        tab = self.tab_at(index.row())
+        if tab is None:
+            return None
+        if role == Qt.DisplayRole:
+            return tab.label()
+        if role == Qt.ToolTipRole:
+            return tab.url.toString()
+        if role == Qt.DecorationRole:
+            if tab.pinned:
+                return get_icon('pin')
+            return get_icon('suspended') if tab.view is None else None
+        if role == Qt.UserRole:
+            return tab.tab_id
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def mimeTypes(self):
+        return [TAB_MIME_TYPE]
+
+    def mimeData(self, indexes):
+        data = QMimeData()
+        data.setData(TAB_MIME_TYPE, str(self.order[indexes[0].row()].tab_id).encode())
+        return data
+
+    def dropMimeData(self, data, action, row, column, parent):
+        tab = self.get(int(bytes(data.data(TAB_MIME_TYPE)).decode() or 0))
+        if tab is None:
+            return False
+        if row == -1:
+            row = parent.row() if parent.isValid() else len(self.order)
+        source = self.row(tab)
+        self.move(tab, row - 1 if row > source else row)
+        # The tab has moved already; False keeps the view from deleting the source row
+        return False
+
+    def add(self, tab, row=None):
+        row = len(self.order) if row is None else row
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.order.insert(row, tab)
+        self.by_id[tab.tab_id] = tab
+        self.endInsertRows()
+
+    def remove(self, tab):
+        row = self.row(tab)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.order[row]
+        del self.by_id[tab.tab_id]
+        self.endRemoveRows()
+
+    def move(self, tab, row):
+        """Move a tab so that it ends up at row"""
+        source = self.row(tab)
+        row = max(0, min(row, len(self.order) - 1))
+        if row == source:
+            return
+        # beginMoveRows takes the destination in pre-move rows
+        self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), row + 1 if row > source else row)
+        del self.order[source]
+        self.order.insert(row, tab)
+        self.endMoveRows()
+
+    def tab_changed(self, tab):
+        index = self.index(self.row(tab))
+        self.dataChanged.emit(index, index)
+
+COOKIES_PATH = os.path.join(os.path.expanduser("~"), "ZiBrowserCookies")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+def configure_profile(profile, storage_path=None):
+    """Apply ZiBrowser's cookie, cache and user agent settings to a profile"""
+    if storage_path:
+        # Set up the profile for storing cookies
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.ForcePersistentCookies)
+        if not os.path.exists(storage_path):
+            os.makedirs(storage_path)
+        profile.setPersistentStoragePath(storage_path)
+
+    # Memory management settings
+    profile.setHttpCacheMaximumSize(100 * 1024 * 1024)  # 100MB cache limit
+    profile.setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
+    profile.clearHttpCache()
+
+    # Set modern user agent
+    profile.setHttpUserAgent(USER_AGENT)
+
+PRIVATE_NAMESPACES = itertools.count(1)
+
+class Browser(QMainWindow):
+    def __init__(self, profile=None):
         super().__init__()
         
         # Create toolbar before other UI elements
         self.toolbar = QToolBar()
         self.addToolBar(self.toolbar)
 
-        # Set up the profile for storing cookies
-        self.profile = QWebEngineProfile.defaultProfile()
-        self.profile.setPersistentCookiesPolicy(QWebEngineProfile.ForcePersistentCookies)
-        cookies_path = os.path.join(os.path.expanduser("~"), "ZiBrowserCookies")
-        if not os.path.exists(cookies_path):
-            os.makedirs(cookies_path)
-        self.profile.setPersistentStoragePath(cookies_path)
-
-        # Memory management settings
-        self.profile.setHttpCacheMaximumSize(100 * 1024 * 1024)  # 100MB cache limit
-        self.profile.setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
-        self.profile.clearHttpCache()
+        if profile is None:
+            self.profile = QWebEngineProfile.defaultProfile()
+            configure_profile(self.profile, COOKIES_PATH)
+        else:
+            self.profile = profile
 
-        # Configure web settings
-        self.settings = QWebEngineSettings.defaultSettings()
-        self.settings.setAttribute(QWebEngineSettings.PluginsEnabled, True)
-        self.settings.setAttribute(QWebEngineSettings.DnsPrefetchEnabled, True)
-        self.settings.setAttribute(QWebEngineSettings.PlaybackRequiresUserGesture, False)
-        self.settings.setAttribute(QWebEngineSettings.FullScreenSupportEnabled, True)
-        self.settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
-        self.settings.setAttribute(QWebEngineSettings.WebGLEnabled, True)
-        self.settings.setAttribute(QWebEngineSettings.LocalStorageEnabled, True)
-        self.settings.setAttribute(QWebEngineSettings.ShowScrollBars, True)
-        self.settings.setAttribute(QWebEngineSettings.WebGLEnabled, False)  # Disable by default
-        self.settings.setAttribute(QWebEngineSettings.AutoLoadImages, True)
-        self.settings.setAttribute(QWebEngineSettings.JavascriptCanOpenWindows, False)
-        
-        # Set modern user agent
-        self.profile.setHttpUserAgent("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36")
+        # One ad blocker shared by every tab of the profile
+        self.ad_blocker = AdBlocker(
+            f"private-{next(PRIVATE_NAMESPACES)}" if self.profile.isOffTheRecord() else None
+        )
+        self.profile.setUrlRequestInterceptor(self.ad_blocker)
+
+        # zi:// internal pages, served once per profile
+        if self.profile.urlSchemeHandler(INTERNAL_SCHEME) is None:
+            self.profile.installUrlSchemeHandler(INTERNAL_SCHEME, InternalSchemeHandler(self.profile))
 
-        self.tabs = QTabWidget()
-        self.tabs.setDocumentMode(True)
-        self.tabs.tabBarDoubleClicked.connect(self.tab_open_doubleclick)
-        self.tabs.currentChanged.connect(self.current_tab_changed)
-        self.tabs.setTabsClosable(True)
-        self.tabs.tabCloseRequested.connect(self.close_current_tab)
+        # Connect the downloadRequested signal once, not once per tab
+        self.profile.downloadRequested.connect(self.handle_download)
+        self.offline_saves = {}  # capture path -> (url, title, text) while QWebEnginePage.save() runs
+        self.offline_archive_connected = False
 
-        self.setCentralWidget(self.tabs)
+        # Configure web settings
+        self.web_settings = QWebEngineSettings.defaultSettings()
+        self.web_settings.setAttribute(QWebEngineSettings.PluginsEnabled, True)
+        self.web_settings.setAttribute(QWebEngineSettings.DnsPrefetchEnabled, True)
+        self.web_settings.setAttribute(QWebEngineSettings.PlaybackRequiresUserGesture, False)
+        self.web_settings.setAttribute(QWebEngineSettings.FullScreenSupportEnabled, True)
+        self.web_settings.setAttribute(QWebEngineSettings.JavascriptEnabled, True)
+        self.web_settings.setAttribute(QWebEngineSettings.WebGLEnabled, True)
+        self.web_settings.setAttribute(QWebEngineSettings.LocalStorageEnabled, True)
+        self.web_settings.setAttribute(QWebEngineSettings.ShowScrollBars, True)
+        self.web_settings.setAttribute(QWebEngineSettings.WebGLEnabled, False)  # Disable by default
+        self.web_settings.setAttribute(QWebEngineSettings.AutoLoadImages, True)
+        self.web_settings.setAttribute(QWebEngineSettings.JavascriptCanOpenWindows, False)
+
+        # Application settings, loaded once per process; changes apply to every window live
+        self.settings = get_settings()
+        self.settings.changed.connect(self.apply_setting)
+        if self.settings.get('performance_mode'):
+            self.apply_performance_mode(True)
+        self.web_settings.setAttribute(QWebEngineSettings.AutoLoadImages, self.settings.get('load_images'))
+
+        self.tab_ids = itertools.count(1)
+        self.tab_views = {}  # tab id -> view
+
+        # Worker pool for jobs submitted by pages through the bridge
+        self.job_runner = BridgeJobRunner()
+        QApplication.instance().aboutToQuit.connect(self.job_runner.shutdown)
+
+        # One bridge object serves every tab of this window
+        self.js_bridge = JavaScriptBridge(self.job_runner, get_capture_sink())
+
+        # Main-thread blocking time by script, reported by every tab
+        self.long_tasks = LongTaskAttribution()
+        self.origin_profiles = self.settings.get('origin_profiles')
+        self.js_bridge.add_handler('longtasks', self.handle_long_tasks)
+
+        # Deduplicated JavaScript errors, viewable per tab in the developer panel
+        self.errors = ErrorAggregator()
+        self.js_bridge.add_handler('error', self.errors.add)
+        self.js_bridge.add_handler('error-counts', self.errors.add_counts)
+
+        # Link-hover preconnect and prerendering into hidden pages
+        self.speculation = SpeculationManager(
+            self.create_speculative_page, self,
+            prerender=self.settings.get('prerender_enabled')
+        )
+        self.js_bridge.add_handler('hover', self.speculation.on_hover)
+
+        # Data behind the zi:// list pages
+        self.js_bridge.add_source('history', self.query_history)
+        self.js_bridge.add_source('bookmarks', self.query_bookmarks)
+        self.js_bridge.add_source('downloads', self.query_downloads)
+        self.js_bridge.add_source('offline', self.query_offline)
+
+        # Warm connections to the origins usually visited right after startup
+        self.startup_learner = get_startup_learner()
+        if not self.profile.isOffTheRecord():
+            self.js_bridge.add_handler('navtiming', self.startup_learner.on_timing)
+        self.warmup_page = None
+
+        # Every navigation starts through the scheduler shared by all windows: visible tabs first,
+        # background loads capped
+        self.loads = get_load_scheduler()
+
+        # Crash and hang detection for every tab
+        self.watchdog = RendererWatchdog(self, auto_reload=self.settings.get('watchdog_auto_reload'),
+                                         reloader=lambda view: self.loads.request(view, 'restore'))
+        self.watchdog.status_changed.connect(self.update_tab_health)
+
+        # Tabs live in a model; only the current and recently used tabs have a view
+        self.tab_model = TabModel(self)
+        self.tab_index = SwitcherIndex()  # titles and URLs of this window's tabs, for the quick switcher
+        self.current_tab = None
+        self.live_tabs = OrderedDict()  # tab id -> tab with a view, least recently used first
+        self.tab_list = QListView()
+        self.tab_list.setModel(self.tab_model)
+        self.tab_list.setUniformItemSizes(True)
+        self.tab_list.setDragDropMode(QAbstractItemView.DragDrop)
+        self.tab_list.setDefaultDropAction(Qt.MoveAction)
+        self.tab_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.tab_list.customContextMenuRequested.connect(self.show_tab_menu)
+        # doubleClicked only reports items; a double-click on the empty part is caught in eventFilter
+        self.tab_list.viewport().installEventFilter(self)
+        self.tab_list.selectionModel().currentChanged.connect(
+            lambda index, _: self.activate_tab(self.tab_model.tab_at(index.row()))
+        )
+        self.view_stack = QStackedWidget()
+
+        splitter = QSplitter()
+        splitter.addWidget(self.tab_list)
+        splitter.addWidget(self.view_stack)
+        splitter.setStretchFactor(1, 1)
+        splitter.setSizes([220, 1000])
+        self.setCentralWidget(splitter)
+
+        switcher_action = QAction('Switch to Tab or Page', self)
+        switcher_action.setShortcut(QKeySequence('Ctrl+K'))
+        switcher_action.triggered.connect(self.show_quick_switcher)
+        self.addAction(switcher_action)
+
+        # Free memory as the system runs short of it
+        self.http_cache_size = self.profile.httpCacheMaximumSize()
+        self.memory_monitor = None
+        self.set_memory_monitor(self.settings.get('memory_monitor_enabled'))
+
+        close_tab_action = QAction('Close Tab', self)
+        close_tab_action.setShortcut(QKeySequence('Ctrl+W'))
+        close_tab_action.triggered.connect(lambda: self.close_tab(self.current_tab))
+        self.addAction(close_tab_action)
         self.showMaximized()
 
         # Set window icon
-        self.setWindowIcon(QIcon('images/icon.png'))
+        self.setWindowIcon(get_icon('icon'))
 
         # Navigation bar
         navbar = QToolBar()
         self.addToolBar(navbar)
 
-        back_btn = QAction(QIcon('images/back.png'), 'Back', self)
-        back_btn.triggered.connect(lambda: self.tabs.currentWidget().back())
+        back_btn = QAction(get_icon('back'), 'Back', self)
+        back_btn.triggered.connect(lambda: self.current_view().back())
         navbar.addAction(back_btn)
 
-        forward_btn = QAction(QIcon('images/forward.png'), 'Forward', self)
-        forward_btn.triggered.connect(lambda: self.tabs.currentWidget().forward())
+        forward_btn = QAction(get_icon('forward'), 'Forward', self)
+        forward_btn.triggered.connect(lambda: self.current_view().forward())
         navbar.addAction(forward_btn)
 
-        reload_btn = QAction(QIcon('images/reload.png'), 'Reload', self)
-        reload_btn.triggered.connect(lambda: self.tabs.currentWidget().reload())
+        reload_btn = QAction(get_icon('reload'), 'Reload', self)
+        reload_btn.triggered.connect(lambda: self.loads.request(self.current_view(), 'foreground'))
         navbar.addAction(reload_btn)
 
-        home_btn = QAction(QIcon('images/home.png'), 'Home', self)
+        home_btn = QAction(get_icon('home'), 'Home', self)
         home_btn.triggered.connect(self.navigate_home)
         navbar.addAction(home_btn)
 
-        new_tab_btn = QAction(QIcon('images/newtab.png'), 'New Tab', self)
+        new_tab_btn = QAction(get_icon('newtab'), 'New Tab', self)
         new_tab_btn.triggered.connect(self.add_new_tab)
         navbar.addAction(new_tab_btn)
 
-        history_btn = QAction(QIcon('images/history.png'), 'History', self)
+        history_btn = QAction(get_icon('history'), 'History', self)
         history_btn.triggered.connect(self.show_history)
         navbar.addAction(history_btn)
 
+        tab_switcher_btn = QAction(get_icon('tabs'), 'Tab Overview', self)
+        tab_switcher_btn.setShortcut(QKeySequence('Ctrl+Shift+A'))
+        tab_switcher_btn.triggered.connect(self.show_tab_switcher)
+        navbar.addAction(tab_switcher_btn)
+
+        search_everything_btn = QAction(get_icon('search'), 'Search Everything', self)
+        search_everything_btn.setShortcut(QKeySequence('Ctrl+Shift+F'))
+        search_everything_btn.triggered.connect(self.show_search_everything)
+        navbar.addAction(search_everything_btn)
+
         self.url_bar = QLineEdit()
         self.url_bar.returnPressed.connect(self.navigate_to_url)
         navbar.addWidget(self.url_bar)
 
         # Settings menu
         settings_btn = QToolButton()
-        settings_btn.setIcon(QIcon('images/setting.png'))
+        settings_btn.setIcon(get_icon('setting'))
         settings_btn.setPopupMode(QToolButton.InstantPopup)
         settings_menu = QMenu()
 
-        settings_action = QAction(QIcon('images/settings.png'), 'Settings', self)
+        settings_action = QAction(get_icon('settings'), 'Settings', self)
         settings_action.triggered.connect(self.show_settings)
         settings_menu.addAction(settings_action)
 
-        downloads_action = QAction(QIcon('images/downloads.png'), 'Downloads', self)
+        downloads_action = QAction(get_icon('downloads'), 'Downloads', self)
         downloads_action.triggered.connect(self.show_downloads)
         settings_menu.addAction(downloads_action)
 
-        delete_history_action = QAction(QIcon('images/delete.png'), 'Delete History', self)
+        delete_history_action = QAction(get_icon('delete'), 'Delete History', self)
         delete_history_action.triggered.connect(self.delete_history)
         settings_menu.addAction(delete_history_action)
 
-        about_action = QAction(QIcon('images/about.png'), 'About', self)
+        about_action = QAction(get_icon('about'), 'About', self)
         about_action.triggered.connect(self.show_about)
         settings_menu.addAction(about_action)
 
-        private_window_action = QAction(QIcon('images/private.png'), 'New Private Window', self)
+        private_window_action = QAction(get_icon('private'), 'New Private Window', self)
         private_window_action.triggered.connect(self.open_private_window)
         settings_menu.addAction(private_window_action)
 
-        bookmark_action = QAction(QIcon('images/bookmark.png'), 'Add Bookmark', self)
+        bookmark_action = QAction(get_icon('bookmark'), 'Add Bookmark', self)
         bookmark_action.triggered.connect(self.add_bookmark)
         settings_menu.addAction(bookmark_action)
 
-        show_bookmarks_action = QAction(QIcon('images/bookmarks.png'), 'Show Bookmarks', self)
+        show_bookmarks_action = QAction(get_icon('bookmarks'), 'Show Bookmarks', self)
         show_bookmarks_action.triggered.connect(self.show_bookmarks)
         settings_menu.addAction(show_bookmarks_action)
 
-        dark_mode_action = QAction(QIcon('images/dark-mode.png'), 'Toggle Dark Mode', self)
+        open_bookmarks_action = QAction(get_icon('bookmarks'), 'Open All Bookmarks', self)
+        open_bookmarks_action.triggered.connect(self.open_all_bookmarks)
+        settings_menu.addAction(open_bookmarks_action)
+
+        save_offline_action = QAction(get_icon('save'), 'Save for Offline', self)
+        save_offline_action.setShortcut(QKeySequence('Ctrl+S'))
+        save_offline_action.triggered.connect(self.save_for_offline)
+        settings_menu.addAction(save_offline_action)
+
+        offline_pages_action = QAction(get_icon('offline'), 'Offline Pages', self)
+        offline_pages_action.triggered.connect(self.show_offline_pages)
+        settings_menu.addAction(offline_pages_action)
+
+        offline_stats_action = QAction(get_icon('offline'), 'Offline Archive', self)
+        offline_stats_action.triggered.connect(self.show_offline_stats)
+        settings_menu.addAction(offline_stats_action)
+
+        dark_mode_action = QAction(get_icon('dark-mode'), 'Toggle Dark Mode', self)
         dark_mode_action.triggered.connect(self.toggle_dark_mode)
         settings_menu.addAction(dark_mode_action)
 
-        memory_manager_action = QAction(QIcon('images/memory.png'), 'Memory Manager', self)
+        memory_manager_action = QAction(get_icon('memory'), 'Memory Manager', self)
         memory_manager_action.triggered.connect(self.show_memory_manager)
         settings_menu.addAction(memory_manager_action)
 
-        search_engine_settings_action = QAction(QIcon('images/search.png'), 'Search Engine Settings', self)
+        search_engine_settings_action = QAction(get_icon('search'), 'Search Engine Settings', self)
         search_engine_settings_action.triggered.connect(self.show_search_engine_settings)
         settings_menu.addAction(search_engine_settings_action)
 
-        test_bridge_action = QAction(QIcon('images/test.png'), 'Test JS Bridge', self)
+        test_bridge_action = QAction(get_icon('test'), 'Test JS Bridge', self)
         test_bridge_action.triggered.connect(self.test_python_js_bridge)
         settings_menu.addAction(test_bridge_action)
 
+        developer_panel_action = QAction(get_icon('developer'), 'Developer Panel', self)
+        developer_panel_action.setShortcut(QKeySequence('Ctrl+Shift+J'))
+        developer_panel_action.triggered.connect(self.show_developer_panel)
+        settings_menu.addAction(developer_panel_action)
+
+        speculation_action = QAction(get_icon('speculation'), 'Speculative Loading', self)
+        speculation_action.triggered.connect(self.show_speculation_stats)
+        settings_menu.addAction(speculation_action)
+
+        load_scheduler_action = QAction(get_icon('reload'), 'Load Scheduler', self)
+        load_scheduler_action.triggered.connect(self.show_load_scheduler_stats)
+        settings_menu.addAction(load_scheduler_action)
+
+        https_action = QAction(get_icon('https'), 'HTTPS Upgrades', self)
+        https_action.triggered.connect(self.show_https_stats)
+        settings_menu.addAction(https_action)
+
+        tracking_action = QAction(get_icon('https'), 'Tracking Parameters', self)
+        tracking_action.triggered.connect(self.show_tracking_param_stats)
+        settings_menu.addAction(tracking_action)
+
+        warmup_action = QAction(get_icon('speculation'), 'Startup Warmup', self)
+        warmup_action.triggered.connect(self.show_startup_warmup)
+        settings_menu.addAction(warmup_action)
+
+        blockers_action = QAction(get_icon('jank'), 'Main-Thread Blockers', self)
+        blockers_action.triggered.connect(self.show_main_thread_blockers)
+        settings_menu.addAction(blockers_action)
+
+        jank_report_action = QAction(get_icon('jank'), 'Jank Report', self)
+        jank_report_action.triggered.connect(self.show_jank_report)
+        settings_menu.addAction(jank_report_action)
+
+        job_metrics_action = QAction(get_icon('jobs'), 'Bridge Jobs', self)
+        job_metrics_action.triggered.connect(self.show_job_metrics)
+        settings_menu.addAction(job_metrics_action)
+
+        self.trace_action = QAction(get_icon('trace'), 'Record Trace', self)
+        self.trace_action.setCheckable(True)
+        self.trace_action.setChecked(TRACER.enabled)
+        self.trace_action.toggled.connect(self.toggle_tracing)
+        settings_menu.addAction(self.trace_action)
+
         settings_btn.setMenu(settings_menu)
         navbar.addWidget(settings_btn)
 
         # Load search engine settings
-        self.settings = QSettings('ZiBrowser', 'Settings')
-        self.current_search_engine = self.settings.value('search_engine', 'Google')
-        self.search_engines = self.settings.value('search_engines', DEFAULT_SEARCH_ENGINES)
-        
+        self.current_search_engine = self.settings.get('search_engine')
+        self.search_engines = self.settings.get('search_engines')
+
         # Add search engine selector to navbar
         self.search_engine_selector = QComboBox()
         self.search_engine_selector.addItems(self.search_engines.keys())
@@ -235,12 +4729,15 @@ class Browser(QMainWindow):
         self.search_engine_selector.currentTextChanged.connect(self.change_search_engine)
         navbar.addWidget(self.search_engine_selector)
 
-        self.add_new_tab(self.get_search_engine_url(), self.current_search_engine)
+        if self.settings.get('caching_proxy_enabled'):
+            self.use_caching_proxy(True)
+
+        first_tab = self.add_new_tab(self.get_search_engine_url(), self.current_search_engine)
+        if self.settings.get('startup_warmup_enabled') and not self.profile.isOffTheRecord():
+            first_tab.loadFinished.connect(self.schedule_startup_warmup)
 
-        # Download manager
-        self.downloads_list = QListWidget()
-        self.downloads_list.setWindowTitle("Downloads")
-        self.downloads_list.setFixedSize(400, 300)
+        # Downloads of this window, shown at zi://downloads
+        self.downloads = []
 
         # Setup tab suspender
         self.setup_tab_suspender()
@@ -256,44 +4753,132 @@ class Browser(QMainWindow):
         self.add_video_controls()
 
         # Add video storage support
-        self.setup_video_storage(self.tabs.currentWidget())
+        self.setup_video_storage(self.current_view())
         self.add_video_controls()
         
         # Create videos directory
-        self.tabs.currentWidget().page().runJavaScript("""
+        self.run_js(self.current_view(), 'create videos directory', """
             videoHandler.store.getDir('videos', { create: true }, () => {
                 console.log('Videos directory created');
             });
         """)
 
-    def add_new_tab(self, qurl=None, label="New Tab"):
+    def add_new_tab(self, qurl=None, label="New Tab", background=False):
+        """Open a tab after the current one and switch to it; returns its view.
+
+        A background tab is appended instead. It loads at background
+        priority while there is room under max_live_tabs, and otherwise
+        stays unloaded until shown.
+        """
         if qurl is None or not isinstance(qurl, QUrl):
-            qurl = self.get_search_engine_url()
-        
+            qurl = QUrl('zi://newtab')
+
+        tab = Tab(next(self.tab_ids), qurl, label)
+        TRACER.set_thread_name(tab_trace_tid(tab), f"Tab {tab.tab_id}")
+        TRACER.instant('created', 'tab', tab_trace_tid(tab), url=qurl.toString())
+        row = self.tab_model.row(self.current_tab) + 1 if self.current_tab is not None and not background else None
+        self.tab_model.add(tab, row)
+        self.tab_index.set(tab.tab_id, 'unloaded', label, qurl.toString())
+        if not background:
+            self.activate_tab(tab)
+        elif len(self.live_tabs) < self.settings.get('max_live_tabs'):
+            self.load_tab_view(tab, 'background')
+            # Never used yet, so first in line to be unloaded
+            self.live_tabs[tab.tab_id] = tab
+            self.live_tabs.move_to_end(tab.tab_id, last=False)
+        return tab.view
+
+    def open_all_bookmarks(self):
+        for title, url in self.settings.get('bookmarks').items():
+            self.add_new_tab(QUrl(url), title, background=True)
+
+    def reload_all_tabs(self):
+        """Reload the visible tab now and the other loaded tabs through the background queue"""
+        for browser in self.tab_views.values():
+            self.loads.request(browser, 'background')
+
+    def current_view(self):
+        return self.current_tab.view if self.current_tab is not None else None
+
+    def activate_tab(self, tab):
+        """Show a tab, creating its view if it has none, and unload views beyond the limit"""
+        if tab is None or tab is self.current_tab:
+            return
+        # Snapshot the tab being left while it is still visible
+        self.capture_thumbnail(self.current_view())
+        previous = self.current_tab
+        if previous is not None:
+            previous.last_used = time.monotonic()
+        self.current_tab = tab
+        tab.last_used = time.monotonic()
+        if tab.view is None:
+            self.load_tab_view(tab)
+        else:
+            self.set_tab_lifecycle(tab, 'Active')
+        self.live_tabs[tab.tab_id] = tab
+        self.live_tabs.move_to_end(tab.tab_id)
+        self.view_stack.setCurrentWidget(tab.view)
+        self.loads.set_foreground(self, tab.view)
+        index = self.tab_model.index(self.tab_model.row(tab))
+        if self.tab_list.currentIndex() != index:
+            self.tab_list.setCurrentIndex(index)
+        TRACER.instant('activated', 'tab', tab_trace_tid(tab), live=len(self.live_tabs))
+        self.update_url(tab.view.url() if not tab.view.url().isEmpty() else tab.url)
+        self.update_title(tab.view)
+        self.trim_live_tabs()
+        # Under memory pressure the tab being left is frozen or discarded straight away
+        level = self.memory_monitor.level if self.memory_monitor is not None else 'normal'
+        if previous is not None and previous.view is not None and level == 'moderate':
+            self.set_tab_lifecycle(previous, 'Frozen')
+        elif previous is not None and level == 'critical':
+            self.unload_tab(previous)
+
+    def trim_live_tabs(self, max_idle=None):
+        """Unload the least recently used views over max_live_tabs, or idle longer than max_idle seconds"""
+        limit = self.settings.get('max_live_tabs')
+        now = time.monotonic()
+        for tab in list(self.live_tabs.values()):
+            over_limit = len(self.live_tabs) > limit
+            idle = max_idle is not None and now - tab.last_used > max_idle
+            if not (over_limit or idle):
+                break
+            if tab is not self.current_tab:
+                self.unload_tab(tab)
+
+    def load_tab_view(self, tab, priority='foreground'):
         browser = QWebEngineView()
-        
+        browser.tab_id = tab.tab_id
+        tab.view = browser
+        self.tab_views[tab.tab_id] = browser
+        trace_tid = tab_trace_tid(browser)
+
         # Configure page settings for video
-        page = QWebEnginePage(self.profile, browser)
+        page = BrowserPage(self.profile, browser)
         browser.setPage(page)
-        
-        # Enable video fullscreen
-        page.fullScreenRequested.connect(lambda request: request.accept())
-        
-        browser.setUrl(qurl)
-        i = self.tabs.addTab(browser, label)
-        self.tabs.setCurrentIndex(i)
+        self.setup_page(browser, page)
+        self.js_bridge.register_tab(tab.tab_id, page)
+        self.watchdog.watch(browser)
+
+        self.loads.attach(browser)
+        self.loads.request(browser, priority, tab.url)
+        self.view_stack.addWidget(browser)
+        self.tab_updated(tab)
 
         browser.urlChanged.connect(lambda qurl, browser=browser: self.update_urlbar(qurl, browser))
-        browser.loadFinished.connect(lambda _, i=i, browser=browser: self.tabs.setTabText(i, browser.page().title()))
+        browser.urlChanged.connect(lambda qurl, browser=browser: self.apply_origin_profile(browser))
+        browser.urlChanged.connect(lambda qurl, tab=tab: self.set_tab_url(tab, qurl))
+        browser.titleChanged.connect(lambda title, tab=tab: self.set_tab_title(tab, title))
+        browser.loadFinished.connect(lambda ok, browser=browser: ok and self.index_page(browser))
+        browser.loadFinished.connect(lambda ok, browser=browser: ok and self.record_visit(browser))
+        browser.loadFinished.connect(lambda ok, browser=browser: ok and QTimer.singleShot(1000, lambda: self.capture_thumbnail(browser)))
 
-        # Connect the downloadRequested signal
-        browser.page().profile().downloadRequested.connect(self.handle_download)
+        TRACER.instant('view created', 'tab', trace_tid, url=tab.url.toString())
 
         # Inject compatibility polyfills
         self.inject_compatibility_polyfills(browser)
         
         # Inject JavaScript polyfill for replaceAll
-        browser.page().runJavaScript("""
+        self.run_js(browser, 'replaceAll polyfill', """
             if (!String.prototype.replaceAll) {
                 String.prototype.replaceAll = function(search, replacement) {
                     try {
@@ -306,10 +4891,6 @@ class Browser(QMainWindow):
             }
         """)
 
-        # Create and set the ad blocker
-        ad_blocker = AdBlocker()
-        browser.page().profile().setUrlRequestInterceptor(ad_blocker)
-
         # Inject video compatibility fixes
         self.inject_video_compatibility_fixes(browser)
 
@@ -322,61 +4903,17 @@ class Browser(QMainWindow):
         # Enable IndexedDB with fallback
         self.enable_indexed_db(browser)
 
-        # Initialize QWebChannel properly
-        channel = QWebChannel(browser.page())
-        browser.page().setWebChannel(channel)
-        
-        # Add JavaScript bridge
-        self.js_bridge = JavaScriptBridge()
-        channel.registerObject('python', self.js_bridge)
-        
-        # Inject required QWebChannel.js first
-        browser.page().runJavaScript("""
-            if (!window.qt) {
-                window.qt = { webChannelTransport: null };
-            }
-            
-            window.onload = function() {
-                new QWebChannel(qt.webChannelTransport, function(channel) {
-                    window.python = channel.objects.python;
-                    
-                    // Define global functions after bridge is established
-                    window.logToPython = function(message) {
-                        python.log(message);
-                    };
-                    
-                    window.processPythonData = function(data) {
-                        return python.processPythonData(data);
-                    };
-                    
-                    window.saveToPython = function(content) {
-                        python.saveToFile(content);
-                    };
-                    
-                    // Signal that bridge is ready
-                    console.log('Python bridge initialized');
-                });
-            };
-        """)
-
         # Inject interaction examples
         self.inject_interaction_examples(browser)
 
-        # Inject error handlers
-        self.inject_error_handlers(browser)
-
         # Setup video storage
         self.setup_video_storage(browser)
 
         # Inject video handler
         self.inject_video_handler(browser)
 
-        # Inject bridge
-        self.inject_bridge(browser)
-
         # Initialize components in correct order
         self.enable_indexed_db(browser)
-        self.inject_bridge(browser)
         self.setup_video_storage(browser)
         self.inject_video_handler(browser)
         
@@ -384,9 +4921,154 @@ class Browser(QMainWindow):
         self.configure_video_settings(browser)
         self.inject_compatibility_polyfills(browser)
 
-        return browser
+    def unload_tab(self, tab):
+        """Destroy a background tab's view; the tab keeps its URL and title and reloads when shown"""
+        browser = tab.view
+        if browser is None or tab is self.current_tab:
+            return
+        if not browser.url().isEmpty():
+            tab.url = browser.url()
+        TRACER.instant('unloaded', 'tab', tab_trace_tid(tab), url=tab.url.toString())
+        self.release_view(tab)
+        tab.status = None
+        self.tab_updated(tab)
+
+    def release_view(self, tab):
+        browser = tab.view
+        self.js_bridge.unregister_tab(tab.tab_id)
+        self.watchdog.unwatch(browser)
+        self.loads.forget(browser)
+        self.speculation.discard_tab(tab.tab_id)
+        del self.tab_views[tab.tab_id]
+        self.live_tabs.pop(tab.tab_id, None)
+        self.view_stack.removeWidget(browser)
+        tab.view = None
+        browser.deleteLater()
+
+    def set_tab_url(self, tab, qurl):
+        if not qurl.isEmpty():
+            tab.url = qurl
+            self.tab_updated(tab)
+
+    def set_tab_title(self, tab, title):
+        tab.title = title
+        self.tab_updated(tab)
+
+    def tab_updated(self, tab):
+        self.tab_model.tab_changed(tab)
+        self.tab_index.set(tab.tab_id, 'tab' if tab.view is not None else 'unloaded', tab.title, tab.url.toString())
+
+    def run_js(self, browser, label, script):
+        """Run an injected script in a tab, timing it when tracing is on"""
+        if not TRACER.enabled:
+            browser.page().runJavaScript(script)
+            return
+
+        tid = tab_trace_tid(browser)
+        start = TRACER.now()
+        browser.page().runJavaScript(
+            script,
+            lambda _, start=start: TRACER.complete('runJavaScript', 'inject', start, tid, label=label, bytes=len(script))
+        )
+
+    def toggle_tracing(self, enabled):
+        """Start recording a trace, or stop and save it as Chrome Trace Event JSON"""
+        if enabled:
+            TRACER.start()
+            return
+
+        TRACER.stop()
+        default_path = os.path.join(os.path.expanduser("~"), f"zibrowser-trace-{int(time.time())}.json")
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Trace", default_path, "Trace Files (*.json)")
+        if file_path:
+            try:
+                TRACER.dump(file_path)
+                QMessageBox.information(self, "Trace Saved", f"Open {file_path} in chrome://tracing or Perfetto")
+            except OSError as e:
+                QMessageBox.warning(self, "Error", f"Could not save trace: {e}")
+
+    def setup_page(self, browser, page, tab_id=None):
+        """Connect a page to its tab: signals, web channel and persistent scripts.
+
+        A hidden page passes its own tab_id, so the bridge does not credit
+        its messages to the visible tab.
+        """
+        tab_id = browser.tab_id if tab_id is None else tab_id
+        trace_tid = tab_trace_tid(browser)
+        page.navigation_hook = lambda url, nav_type, is_main_frame, browser=browser, page=page: \
+            self.on_navigation_request(browser, page, url, nav_type, is_main_frame)
+
+        # Enable video fullscreen
+        page.fullScreenRequested.connect(lambda request: request.accept())
+
+        # Navigation timeline for the trace recorder
+        page.loadStarted.connect(lambda tid=trace_tid, page=page: TRACER.begin('navigation', 'navigation', tid, url=page.requestedUrl().toString()))
+        page.urlChanged.connect(lambda qurl, tid=trace_tid: TRACER.instant('commit', 'navigation', tid, url=qurl.toString()))
+        page.loadFinished.connect(lambda ok, tid=trace_tid: TRACER.end('navigation', 'navigation', tid, ok=ok))
+        page.loadFinished.connect(lambda ok, page=page: ok or self.https_fallback(page))
+
+        # Each page needs its own channel and its own end of the bridge
+        channel = QWebChannel(page)
+        page.page_bridge = PageBridge(self.js_bridge, tab_id, page)
+        channel.registerObject('python', page.page_bridge)
+        page.setWebChannel(channel)
+
+        # Scripts that run in every document the page loads
+        self.inject_bridge(page, tab_id)
+        self.inject_error_handlers(page, tab_id)
+        self.install_script(page, tab_id, 'zibrowser-longtasks', LONG_TASK_OBSERVER_JS)
+        self.install_script(page, tab_id, 'zibrowser-speculation', SPECULATION_JS)
+        self.install_script(page, tab_id, 'zibrowser-navtiming', NAVIGATION_TIMING_JS)
+
+    def on_navigation_request(self, browser, page, url, nav_type, is_main_frame):
+        """Swap in a prerendered page when the user clicks a link that was speculated"""
+        if not is_main_frame or nav_type != QWebEnginePage.NavigationTypeLinkClicked or sip.isdeleted(browser):
+            return True
+        if page is not browser.page():
+            return True
+        prerendered = self.speculation.take(browser.tab_id, url.toString())
+        if prerendered is None:
+            return True
+        QTimer.singleShot(0, lambda: self.swap_in_page(browser, prerendered))
+        return False
+
+    def swap_in_page(self, browser, page):
+        if sip.isdeleted(browser) or self.tab_views.get(browser.tab_id) is not browser:
+            page.deleteLater()
+            return
+        TRACER.instant('prerender swap', 'speculation', tab_trace_tid(browser), url=page.url().toString())
+        # The view owns its pages, so the old one is deleted by setPage
+        page.setParent(browser)
+        browser.setPage(page)
+        page.page_bridge.tab_id = browser.tab_id
+        self.js_bridge.register_tab(browser.tab_id, page)
+        self.watchdog.watch(browser)
+        self.update_urlbar(page.url(), browser)
+        tab = self.tab_model.get(browser.tab_id)
+        self.set_tab_url(tab, page.url())
+        if page.title():
+            self.set_tab_title(tab, page.title())
+
+    def create_speculative_page(self, tab_id):
+        """Hidden page, set up for the given tab, for prerendering a likely next navigation"""
+        browser = self.tab_views.get(tab_id)
+        if browser is None or sip.isdeleted(browser):
+            return None
+        page = BrowserPage(self.profile)
+        # Until it is swapped in, the page speaks for itself, not for the tab
+        self.setup_page(browser, page, next(self.tab_ids))
+        return page
+
+    def handle_download(self, download):
+        pending = self.offline_saves.pop(download.path(), None) if download.isSavePageDownload() else None
+        if pending is not None:
+            if download.state() == QWebEngineDownloadItem.DownloadRequested:
+                download.accept()
+            path = download.path()
+            download.finished.connect(lambda download=download, path=path, pending=pending:
+                                      self.offline_capture_finished(download, path, *pending))
+            return
 
-    def handle_download(self, download):
         # Ask the user where to save the file
         options = QFileDialog.Options()
         options |= QFileDialog.DontUseNativeDialog
@@ -396,8 +5078,8 @@ class Browser(QMainWindow):
             download.accept()
 
             # Add download item to the downloads list
-            item = QListWidgetItem(f"Downloading {os.path.basename(file_path)}")
-            self.downloads_list.addItem(item)
+            item = {'url': QUrl.fromLocalFile(file_path).toString(), 'title': os.path.basename(file_path), 'detail': 'Downloading'}
+            self.downloads.append(item)
 
             # Connect signals to update the download item
             download.downloadProgress.connect(lambda received, total, item=item: self.update_download_progress(received, total, item))
@@ -406,36 +5088,57 @@ class Browser(QMainWindow):
     def update_download_progress(self, received, total, item):
         if total > 0:
             progress = int(received / total * 100)
-            item.setText(f"Downloading {item.text().split(' ')[1]} - {progress}%")
+            item['detail'] = f"Downloading - {progress}%"
 
     def download_finished(self, item):
-        item.setText(f"Downloaded {item.text().split(' ')[1]}")
+        item['detail'] = 'Downloaded'
 
-    def tab_open_doubleclick(self, i):
-        if i == -1:
-            # Open Google in new tab when double-clicking
-            self.add_new_tab(QUrl('https://www.google.com'), 'Google')
+    def eventFilter(self, watched, event):
+        if watched is self.tab_list.viewport() and event.type() == QEvent.MouseButtonDblClick \
+                and not self.tab_list.indexAt(event.pos()).isValid():
+            self.tab_open_doubleclick()
+            return True
+        return super().eventFilter(watched, event)
 
-    def current_tab_changed(self, i):
-        qurl = self.tabs.currentWidget().url()
-        self.update_url(qurl)
-        self.update_title(self.tabs.currentWidget())
+    def tab_open_doubleclick(self):
+        # Open Google in new tab when double-clicking the empty tab list
+        self.add_new_tab(QUrl('https://www.google.com'), 'Google')
 
-    def close_current_tab(self, i):
-        if self.tabs.count() < 2:
+    def close_tab(self, tab):
+        if tab is None or len(self.tab_model) < 2:
             return
 
-        self.tabs.removeTab(i)
+        TRACER.instant('closed', 'tab', tab_trace_tid(tab), url=tab.url.toString())
+        if tab is self.current_tab:
+            # Show the tab that takes its place, or the one before it at the end
+            row = self.tab_model.row(tab)
+            self.activate_tab(self.tab_model.tab_at(row + 1) or self.tab_model.tab_at(row - 1))
+        if tab.view is not None:
+            self.release_view(tab)
+        self.errors.clear(tab.tab_id)
+        self.tab_model.remove(tab)
+        self.tab_index.remove(tab.tab_id)
+
+    def show_tab_menu(self, pos):
+        tab = self.tab_model.tab_at(self.tab_list.indexAt(pos).row())
+        if tab is None:
+            return
+        menu = QMenu(self)
+        menu.addAction('Unpin Tab' if tab.pinned else 'Pin Tab', lambda: self.pin_tab(tab))
+        unload = menu.addAction('Unload Tab', lambda: self.unload_tab(tab))
+        unload.setEnabled(tab.view is not None and tab is not self.current_tab)
+        menu.addAction('Close Tab', lambda: self.close_tab(tab))
+        menu.exec_(self.tab_list.viewport().mapToGlobal(pos))
 
     def navigate_home(self):
         # Update home button to use https
-        self.tabs.currentWidget().setUrl(QUrl("https://www.google.com"))
+        self.loads.request(self.current_view(), 'foreground', QUrl("https://www.google.com"))
 
     def navigate_to_url(self):
         url = self.url_bar.text()
         
         # Check if the input is a URL or search term
-        if not url.startswith(('http://', 'https://', 'file://')):
+        if not url.startswith(('http://', 'https://', 'file://', 'zi://')):
             # Check if it's a domain name
             if '.' in url and ' ' not in url:
                 url = 'http://' + url
@@ -444,48 +5147,313 @@ class Browser(QMainWindow):
                 search_template = self.search_engines[self.current_search_engine]
                 url = search_template.format(QUrl.toPercentEncoding(url).data().decode())
         
-        self.tabs.currentWidget().setUrl(QUrl(url))
+        self.loads.request(self.current_view(), 'foreground', QUrl(url))
 
     def update_url(self, q):
         self.url_bar.setText(q.toString())
 
     def update_urlbar(self, q, browser=None):
-        if browser != self.tabs.currentWidget():
+        if browser != self.current_view():
             return
 
         self.url_bar.setText(q.toString())
         self.url_bar.setCursorPosition(0)
 
     def update_title(self, browser):
-        if browser != self.tabs.currentWidget():
+        if browser != self.current_view():
             return
 
-        title = self.tabs.currentWidget().page().title()
+        title = browser.page().title()
         self.setWindowTitle(f"{title} - ZiBrowser")
 
-    def show_history(self):
-        history = self.tabs.currentWidget().history()
-        history_list = history.items()
-        history_dialog = QDialog(self)
-        history_dialog.setWindowTitle("History")
-        history_dialog.setFixedSize(800, 600)  # Set the size of the history dialog
+    def record_visit(self, browser):
+        page = browser.page()
+        if page.profile().isOffTheRecord() or page.url().scheme() not in ('http', 'https'):
+            return
+        try:
+            get_history_store().add(page.url().toString(), page.title())
+        except sqlite3.Error as e:
+            logging.getLogger('ZiBrowser').warning(f"Could not record visit: {e}")
+        if HISTORY_INDEX is not None:
+            HISTORY_INDEX.add(page.url().toString(), page.title())
+
+    def internal_page_html(self, name):
+        if name == 'newtab':
+            return self.new_tab_page_html()
+        title, refresh_ms = INTERNAL_LIST_PAGES[name]
+        return internal_list_page_html(name, title, refresh_ms)
+
+    def open_internal_page(self, name):
+        """Switch to the tab showing zi://name, or open one"""
+        url = QUrl(f'zi://{name}')
+        for tab in self.tab_model:
+            if tab.url == url:
+                self.activate_tab(tab)
+                return
+        self.add_new_tab(url, INTERNAL_LIST_PAGES[name][0])
+
+    def query_history(self, params):
+        if self.profile.isOffTheRecord():
+            return {'total': 0, 'rows': []}
+        return get_history_store().page(params.get('offset', 0), params.get('limit', 100), str(params.get('q', '')))
+
+    def query_bookmarks(self, params):
+        bookmarks = self.settings.get('bookmarks')
+        items = [{'url': url, 'title': title, 'detail': ''} for title, url in bookmarks.items()]
+        return page_rows(items, params)
+
+    def query_downloads(self, params):
+        return page_rows(list(reversed(self.downloads)), params)
+
+    def query_offline(self, params):
+        return get_offline_archive().page(params.get('offset', 0), params.get('limit', 100), str(params.get('q', '')))
+
+    def save_for_offline(self):
+        """Capture the current page as MHTML and add it to the offline archive"""
+        page = self.current_view().page()
+        if page.url().scheme() not in ('http', 'https'):
+            QMessageBox.information(self, "Save for Offline", "Only web pages can be saved for offline reading.")
+            return
+        archive = get_offline_archive()
+        if not self.offline_archive_connected:
+            archive.saved.connect(self.offline_page_saved)
+            archive.failed.connect(self.offline_page_failed)
+            self.offline_archive_connected = True
+        url, title, path = page.url().toString(), page.title(), archive.incoming_path()
+
+        def save(text):
+            if sip.isdeleted(page):
+                return
+            # Completion arrives through the profile's downloadRequested signal
+            self.offline_saves[path] = (url, title, text[:200000])
+            page.save(path, QWebEngineDownloadItem.MimeHtmlSaveFormat)
+
+        page.toPlainText(save)
+
+    def offline_capture_finished(self, download, path, url, title, text):
+        if download.state() == QWebEngineDownloadItem.DownloadCompleted:
+            get_offline_archive().add(path, url, title, text, discard=True)
+            return
+        if os.path.exists(path):
+            os.remove(path)
+        self.offline_page_failed(url, download.interruptReasonString() or 'capture cancelled')
+
+    def offline_page_saved(self, page_id, title):
+        if self.isActiveWindow():
+            QMessageBox.information(self, "Saved for Offline", f"'{title}' is now available at zi://offline/page/{page_id}")
+
+    def offline_page_failed(self, url, error):
+        if self.isActiveWindow():
+            QMessageBox.warning(self, "Save for Offline", f"Could not save {url}: {error}")
+
+    def show_offline_pages(self):
+        self.open_internal_page('offline')
+
+    def show_offline_stats(self):
+        stats = get_offline_archive().stats()
+        QMessageBox.information(self, "Offline Archive", "\n".join(
+            f"{name.replace('_', ' ').capitalize()}: {value}" for name, value in stats.items()
+        ))
+
+    def index_page(self, browser):
+        """Queue a loaded page's text for the full-text index"""
+        page = browser.page()
+        if page.profile().isOffTheRecord() or page.url().scheme() not in ('http', 'https'):
+            return
+        url = page.url().toString()
+        title = page.title()
+
+        def submit(text):
+            if text.strip():
+                get_page_indexer().submit(url, title, text[:200000])
+
+        page.toPlainText(submit)
 
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_content = QWidget()
-        scroll_layout = QVBoxLayout(scroll_content)
+    def capture_thumbnail(self, browser):
+        """Snapshot a tab into the thumbnail cache if it is showing a web page"""
+        if browser is None or sip.isdeleted(browser) or browser is not self.current_view():
+            return
+        if browser.page().profile().isOffTheRecord() or browser.url().scheme() not in ('http', 'https'):
+            return
+        pixmap = browser.grab()
+        if not pixmap.isNull():
+            get_thumbnail_cache().store(browser.url().toString(), browser.page().title(), pixmap)
+
+    def show_tab_switcher(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Tabs")
+        dialog.resize(1100, 700)
+        layout = QVBoxLayout()
+
+        cache = get_thumbnail_cache()
+        grid = QListWidget()
+        grid.setViewMode(QListView.IconMode)
+        grid.setIconSize(cache.size)
+        grid.setResizeMode(QListView.Adjust)
+        grid.setMovement(QListView.Static)
+        grid.setSpacing(12)
+        grid.setWordWrap(True)
+
+        placeholder = QPixmap(cache.size)
+        placeholder.fill(Qt.lightGray)
+        for tab in self.tab_model:
+            pixmap = cache.get(tab.url.toString()) or placeholder
+            item = QListWidgetItem(QIcon(pixmap), tab.label())
+            item.setData(Qt.UserRole, tab.tab_id)
+            grid.addItem(item)
+        grid.setCurrentRow(self.tab_model.row(self.current_tab))
+
+        def activate(item):
+            self.activate_tab(self.tab_model.get(item.data(Qt.UserRole)))
+            dialog.accept()
+
+        grid.itemActivated.connect(activate)
+        layout.addWidget(grid)
+        dialog.setLayout(layout)
+        dialog.exec_()
 
-        for item in history_list:
-            btn = QPushButton(item.url().toString())
-            btn.clicked.connect(lambda checked, url=item.url(): self.tabs.currentWidget().setUrl(url))
-            scroll_layout.addWidget(btn)
+    def new_tab_page_html(self):
+        """Local new-tab page built from the thumbnail cache"""
+        cache = get_thumbnail_cache()
+        cards = []
+        shown = set()
+
+        def card(url, title, file_name):
+            image = f'<img src="zi://thumbnails/{html.escape(file_name)}">' if file_name else '<div class="blank"></div>'
+            return (f'<a class="card" href="{html.escape(url)}">{image}'
+                    f'<span>{html.escape(title or url)}</span></a>')
+
+        for tab in self.tab_model:
+            url = tab.url.toString()
+            if url.startswith(('http://', 'https://')) and url not in shown:
+                shown.add(url)
+                file_name = cache.file_name(cache.key(url)) if cache.has(url) else None
+                cards.append(card(url, tab.title, file_name))
+        for url, title, file_name in cache.recent():
+            if url not in shown and len(cards) < 24:
+                shown.add(url)
+                cards.append(card(url, title, file_name))
+
+        search_template = self.search_engines.get(self.current_search_engine, DEFAULT_SEARCH_ENGINES['Google'])
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>New Tab</title><style>
+body {{ font-family: sans-serif; background: #f4f4f6; margin: 0; padding: 40px; }}
+form {{ text-align: center; margin-bottom: 32px; }}
+input {{ width: 50%; padding: 10px 14px; font-size: 16px; border: 1px solid #ccc; border-radius: 20px; }}
+.grid {{ display: grid; grid-template-columns: repeat(auto-fill, 240px); gap: 20px; justify-content: center; }}
+.card {{ background: white; border-radius: 8px; overflow: hidden; text-decoration: none; color: #222;
+         box-shadow: 0 1px 3px rgba(0,0,0,.2); }}
+.card img, .card .blank {{ width: 240px; height: 150px; object-fit: cover; display: block; background: #ddd; }}
+.card span {{ display: block; padding: 8px; font-size: 13px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }}
+</style></head><body>
+<form id="search"><input id="q" placeholder="Search with {html.escape(self.current_search_engine)}" autofocus></form>
+<div class="grid">{''.join(cards)}</div>
+<script>
+document.getElementById('search').addEventListener('submit', function(event) {{
+    event.preventDefault();
+    const template = {json.dumps(search_template)};
+    location.href = template.replace('{{}}', encodeURIComponent(document.getElementById('q').value));
+}});
+</script>
+</body></html>"""
+
+    def show_search_everything(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Search Everything")
+        dialog.resize(800, 600)
+        layout = QVBoxLayout()
 
-        scroll_area.setWidget(scroll_content)
+        query = QLineEdit()
+        query.setPlaceholderText("Search pages you have read")
+        layout.addWidget(query)
+
+        results = QListWidget()
+        results.setWordWrap(True)
+        layout.addWidget(results)
+
+        def run_search():
+            results.clear()
+            try:
+                matches = get_page_indexer().search(query.text())
+            except sqlite3.Error:
+                return
+            for url, title, snippet in matches:
+                item = QListWidgetItem(f"{title or url}\n{url}\n{snippet}")
+                item.setData(Qt.UserRole, url)
+                results.addItem(item)
+
+        # Search once typing pauses rather than on every keystroke
+        debounce = QTimer(dialog)
+        debounce.setSingleShot(True)
+        debounce.setInterval(150)
+        debounce.timeout.connect(run_search)
+        query.textChanged.connect(debounce.start)
+
+        def open_result(item):
+            self.add_new_tab(QUrl(item.data(Qt.UserRole)))
+            dialog.accept()
+
+        results.itemActivated.connect(open_result)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
 
+    def show_quick_switcher(self):
+        """Fuzzy search over this window's tabs and recent history, as you type"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Switch to Tab or Page")
+        dialog.resize(700, 450)
         layout = QVBoxLayout()
-        layout.addWidget(scroll_area)
-        history_dialog.setLayout(layout)
-        history_dialog.exec_()
+
+        query = QLineEdit()
+        query.setPlaceholderText("Tab title, page or address")
+        layout.addWidget(query)
+
+        results = QListWidget()
+        layout.addWidget(results)
+        status = QLabel()
+        layout.addWidget(status)
+
+        # Private windows search their own tabs only, as zi://history shows nothing there
+        history = None if self.profile.isOffTheRecord() else get_history_index()
+        icons = {'tab': get_icon('tabs'), 'unloaded': get_icon('suspended'), 'history': get_icon('history')}
+
+        def run_search():
+            results.clear()
+            index = history.ready() if history is not None else None
+            started = time.perf_counter()
+            matches = search_switcher([self.tab_index] + ([index] if index is not None else []), query.text())
+            elapsed = (time.perf_counter() - started) * 1000
+            for _, kind, ref, title, url in matches:
+                item = QListWidgetItem(icons[kind], f"{title or url}\n{url}")
+                item.setData(Qt.UserRole, (kind, ref))
+                results.addItem(item)
+            results.setCurrentRow(0)
+            note = '' if history is None or index is not None else '  (still indexing history)'
+            status.setText(f"{len(matches)} results in {elapsed:.1f} ms{note}")
+
+        def open_result(item):
+            kind, ref = item.data(Qt.UserRole)
+            if kind == 'history':
+                self.add_new_tab(QUrl(ref))
+            else:
+                self.activate_tab(self.tab_model.get(ref))
+            dialog.accept()
+
+        def step(delta):
+            results.setCurrentRow(max(0, min(results.currentRow() + delta, results.count() - 1)))
+
+        query.textChanged.connect(run_search)
+        query.returnPressed.connect(lambda: results.currentItem() and open_result(results.currentItem()))
+        results.itemActivated.connect(open_result)
+        QShortcut(QKeySequence(Qt.Key_Down), dialog, lambda: step(1))
+        QShortcut(QKeySequence(Qt.Key_Up), dialog, lambda: step(-1))
+
+        dialog.setLayout(layout)
+        dialog.exec_()
+
+    def show_history(self):
+        self.open_internal_page('history')
 
     def show_settings(self):
         settings_dialog = QDialog(self)
@@ -502,6 +5470,10 @@ class Browser(QMainWindow):
         proxy_settings_btn.clicked.connect(self.show_proxy_settings)
         layout.addWidget(proxy_settings_btn)
 
+        request_policy_btn = QPushButton("Request Policy")
+        request_policy_btn.clicked.connect(self.show_request_policy)
+        layout.addWidget(request_policy_btn)
+
         memory_manager_btn = QPushButton("Memory Manager")
         memory_manager_btn.clicked.connect(self.show_memory_manager)
         layout.addWidget(memory_manager_btn)
@@ -509,10 +5481,90 @@ class Browser(QMainWindow):
         settings_dialog.setLayout(layout)
         settings_dialog.exec_()
 
+    def show_request_policy(self):
+        """Edit resource-type rules; they apply to the next request, no reload needed"""
+        policy = self.ad_blocker.policy
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Request Policy")
+        dialog.resize(500, 550)
+        layout = QVBoxLayout()
+
+        current_host = self.current_view().url().host() if self.current_view() else ''
+        scope_selector = QComboBox()
+        scope_selector.addItem("All sites", None)
+        sites = sorted(policy.site_rules)
+        if current_host and registrable_domain(current_host) not in sites:
+            sites.insert(0, registrable_domain(current_host))
+        for site in sites:
+            scope_selector.addItem(site, site)
+        if current_host:
+            scope_selector.setCurrentIndex(scope_selector.findData(registrable_domain(current_host)))
+        layout.addWidget(scope_selector)
+
+        rules_table = QTableWidget(len(POLICY_RESOURCE_TYPES), 2)
+        rules_table.setHorizontalHeaderLabels(['Resource type', 'Action'])
+        selectors = {}
+        for row, name in enumerate(POLICY_RESOURCE_TYPES):
+            rules_table.setItem(row, 0, QTableWidgetItem(name.replace('_', '-')))
+            selector = QComboBox()
+            selector.addItem("Same as all sites", POLICY_INHERIT)
+            for action, label in POLICY_ACTIONS.items():
+                selector.addItem(label, action)
+            rules_table.setCellWidget(row, 1, selector)
+            selectors[name] = selector
+        rules_table.resizeColumnsToContents()
+        layout.addWidget(rules_table)
+
+        def show_rules():
+            site = scope_selector.currentData()
+            rules = policy.rules_for(site)
+            for name, selector in selectors.items():
+                # Only a site can defer to the global rules
+                selector.model().item(0).setEnabled(site is not None)
+                selector.setCurrentIndex(selector.findData(rules.get(name, 'allow' if site is None else POLICY_INHERIT)))
+
+        def apply_preset(preset):
+            for name, selector in selectors.items():
+                selector.setCurrentIndex(selector.findData(REQUEST_POLICY_PRESETS[preset].get(name, 'allow')))
+
+        scope_selector.currentIndexChanged.connect(show_rules)
+        show_rules()
+
+        presets = QHBoxLayout()
+        for preset in REQUEST_POLICY_PRESETS:
+            preset_btn = QPushButton(preset.replace('_', ' ').capitalize())
+            preset_btn.clicked.connect(lambda _, preset=preset: apply_preset(preset))
+            presets.addWidget(preset_btn)
+        layout.addLayout(presets)
+
+        metered = QCheckBox("Metered connection (apply data saver everywhere)")
+        metered.setChecked(policy.metered)
+        metered.toggled.connect(policy.set_metered)
+        layout.addWidget(metered)
+
+        save_btn = QPushButton("Apply")
+        save_btn.clicked.connect(lambda: policy.set_rules(
+            scope_selector.currentData(),
+            {name: selector.currentData() for name, selector in selectors.items()}
+        ))
+        layout.addWidget(save_btn)
+
+        report = policy.report()
+        counts_table = QTableWidget(len(report), 4)
+        counts_table.setHorizontalHeaderLabels(['Scope', 'Type', 'Action', 'Blocked'])
+        for row, values in enumerate(report):
+            for column, key in enumerate(['scope', 'type', 'action', 'blocked']):
+                counts_table.setItem(row, column, QTableWidgetItem(str(values[key])))
+        layout.addWidget(QLabel("Requests blocked this session"))
+        layout.addWidget(counts_table)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
+
     def show_proxy_settings(self):
         proxy_dialog = QDialog(self)
         proxy_dialog.setWindowTitle("Proxy Settings")
-        proxy_dialog.setFixedSize(300, 200)
+        proxy_dialog.setFixedSize(300, 260)
 
         layout = QVBoxLayout()
 
@@ -528,6 +5580,15 @@ class Browser(QMainWindow):
         set_proxy_btn.clicked.connect(self.set_proxy)
         layout.addWidget(set_proxy_btn)
 
+        caching_proxy = QCheckBox("Use built-in caching proxy")
+        caching_proxy.setChecked(CACHING_PROXY is not None and CACHING_PROXY.in_use)
+        caching_proxy.toggled.connect(self.use_caching_proxy)
+        layout.addWidget(caching_proxy)
+
+        proxy_stats_btn = QPushButton("Caching Proxy Statistics")
+        proxy_stats_btn.clicked.connect(self.show_caching_proxy_stats)
+        layout.addWidget(proxy_stats_btn)
+
         proxy_dialog.setLayout(layout)
         proxy_dialog.exec_()
 
@@ -545,11 +5606,39 @@ class Browser(QMainWindow):
         else:
             QMessageBox.warning(self, "Input Error", "Please enter both proxy address and port")
 
+    def use_caching_proxy(self, enabled):
+        """Route every window and profile through the built-in caching proxy, or stop doing so"""
+        self.settings.set('caching_proxy_enabled', bool(enabled))
+        if not enabled:
+            if CACHING_PROXY is not None:
+                CACHING_PROXY.in_use = False
+            QNetworkProxy.setApplicationProxy(QNetworkProxy())
+            return
+        try:
+            proxy = get_caching_proxy()
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not start the caching proxy: {e}")
+            return
+        proxy.in_use = True
+        QNetworkProxy.setApplicationProxy(QNetworkProxy(QNetworkProxy.HttpProxy, '127.0.0.1', proxy.port))
+
+    def show_caching_proxy_stats(self):
+        if CACHING_PROXY is None:
+            QMessageBox.information(self, "Caching Proxy", "The caching proxy is not running")
+            return
+        stats = CACHING_PROXY.stats()
+        QMessageBox.information(self, "Caching Proxy", "\n".join(
+            f"{name.replace('_', ' ').capitalize()}: {value}" for name, value in stats.items()
+        ))
+
     def show_downloads(self):
-        self.downloads_list.show()
+        self.open_internal_page('downloads')
 
     def delete_history(self):
-        self.tabs.currentWidget().history().clear()
+        self.current_view().history().clear()
+        get_history_store().clear()
+        if HISTORY_INDEX is not None:
+            HISTORY_INDEX.clear()
 
     def delete_all_cookies(self):
         self.profile.cookieStore().deleteAllCookies()
@@ -574,32 +5663,17 @@ class Browser(QMainWindow):
         about_dialog.exec_()
 
     def add_bookmark(self):
-        current_url = self.tabs.currentWidget().url().toString()
-        current_title = self.tabs.currentWidget().page().title()
+        current_url = self.current_view().url().toString()
+        current_title = self.current_view().page().title()
         
-        settings = QSettings('ZiBrowser', 'Bookmarks')
-        bookmarks = settings.value('bookmarks', {})
+        bookmarks = dict(self.settings.get('bookmarks'))
         bookmarks[current_title] = current_url
-        settings.setValue('bookmarks', bookmarks)
+        self.settings.set('bookmarks', bookmarks)
         
         QMessageBox.information(self, "Bookmark Added", f"'{current_title}' has been bookmarked!")
 
     def show_bookmarks(self):
-        settings = QSettings('ZiBrowser', 'Bookmarks')
-        bookmarks = settings.value('bookmarks', {})
-        
-        bookmark_dialog = QDialog(self)
-        bookmark_dialog.setWindowTitle("Bookmarks")
-        bookmark_dialog.setFixedSize(600, 400)
-        
-        layout = QVBoxLayout()
-        for title, url in bookmarks.items():
-            bookmark_btn = QPushButton(f"{title}\n{url}")
-            bookmark_btn.clicked.connect(lambda _, u=url: self.tabs.currentWidget().setUrl(QUrl(u)))
-            layout.addWidget(bookmark_btn)
-        
-        bookmark_dialog.setLayout(layout)
-        bookmark_dialog.exec_()
+        self.open_internal_page('bookmarks')
 
     def toggle_dark_mode(self):
         dark_css = """
@@ -627,32 +5701,24 @@ class Browser(QMainWindow):
         else:
             self.setStyleSheet("")
 
-    def pin_tab(self, index):
-        if not hasattr(self.tabs, 'pinned_tabs'):
-            self.tabs.pinned_tabs = set()
-        
-        if index in self.tabs.pinned_tabs:
-            self.tabs.pinned_tabs.remove(index)
-            self.tabs.setTabIcon(index, QIcon())
-        else:
-            self.tabs.pinned_tabs.add(index)
-            self.tabs.setTabIcon(index, QIcon('images/pin.png'))
-            self.tabs.tabBar().moveTab(index, 0)
+    def pin_tab(self, tab):
+        """Pin a tab after the other pinned tabs at the top of the list, or unpin it"""
+        tab.pinned = not tab.pinned
+        if tab.pinned:
+            self.tab_model.move(tab, sum(1 for other in self.tab_model if other.pinned and other is not tab))
+        self.tab_updated(tab)
 
     def open_private_window(self):
         # Create a new private profile
         private_profile = QWebEngineProfile(None)  # Pass None to create a non-persistent profile
+        configure_profile(private_profile)
+        private_profile.setPersistentCookiesPolicy(QWebEngineProfile.NoPersistentCookies)
+        private_profile.setHttpUserAgent(self.profile.httpUserAgent())
         
-        # Create new browser window
-        private_window = Browser()
+        # Create new browser window; its tabs use the private profile
+        private_window = Browser(private_profile)
         private_window.setWindowTitle("ZiBrowser (Private Mode)")
         
-        # Set up the private profile
-        private_window.profile = private_profile
-        private_window.profile.setPersistentCookiesPolicy(QWebEngineProfile.NoPersistentCookies)
-        private_window.profile.setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
-        private_window.profile.setHttpUserAgent(self.profile.httpUserAgent())
-        
         # Set a different color scheme for private windows
         private_window.setStyleSheet("""
             QMainWindow { 
@@ -661,38 +5727,45 @@ class Browser(QMainWindow):
             QToolBar {
                 background-color: #3b1b4f;
             }
-            QTabWidget::pane {
-                border-top: 2px solid #4b2b5f;
-            }
-            QTabBar::tab {
+            QListView {
                 background-color: #3b1b4f;
                 color: white;
+                border-right: 2px solid #4b2b5f;
             }
-            QTabBar::tab:selected {
+            QListView::item:selected {
                 background-color: #4b2b5f;
             }
         """)
         
-        # Show the private window
+        # Show the private window; its data is cleared in its closeEvent
         private_window.show()
-        
-        # Clear data when window is closed
-        private_window.destroyed.connect(lambda: self.cleanup_private_profile(private_profile))
 
-    def cleanup_private_profile(self, profile):
+    def cleanup_private_profile(self, profile, namespace=None):
         """Clean up the private profile when window is closed"""
+        if namespace and CACHING_PROXY is not None:
+            CACHING_PROXY.drop_namespace(namespace)
         profile.clearAllVisitedLinks()
         profile.clearHttpCache()
         profile.cookieStore().deleteAllCookies()
 
+    def closeEvent(self, event):
+        # The scheduler outlives this window: drop its queued loads and its visible tab
+        for tab in self.live_tabs.values():
+            self.loads.forget(tab.view)
+        # Nothing deletes a closed window, so a private window cleans up here rather than on destroyed
+        if self.profile.isOffTheRecord():
+            self.cleanup_private_profile(self.profile, self.ad_blocker.cache_namespace)
+        super().closeEvent(event)
+
     def handle_fullscreen(self, request):
         request.accept()
         if request.toggleOn():
-            self.tabs.currentWidget().setParent(None)
-            self.tabs.currentWidget().showFullScreen()
+            self.current_view().setParent(None)
+            self.current_view().showFullScreen()
         else:
-            self.tabs.currentWidget().setParent(self.tabs)
-            self.tabs.currentWidget().showNormal()
+            self.view_stack.addWidget(self.current_view())
+            self.view_stack.setCurrentWidget(self.current_view())
+            self.current_view().showNormal()
 
     def show_memory_manager(self):
         dialog = QDialog(self)
@@ -709,17 +5782,25 @@ class Browser(QMainWindow):
         clear_mem_btn.clicked.connect(self.clear_memory)
         layout.addWidget(clear_mem_btn)
 
+        # Automatic response to memory pressure
+        auto_free = QCheckBox("Free Memory Automatically Under Pressure")
+        auto_free.setChecked(self.settings.get('memory_monitor_enabled'))
+        auto_free.toggled.connect(lambda checked: self.settings.set('memory_monitor_enabled', checked))
+        layout.addWidget(auto_free)
+
+        pressure_btn = QPushButton("Memory Pressure Log")
+        pressure_btn.clicked.connect(self.show_memory_pressure)
+        layout.addWidget(pressure_btn)
+
         # Performance mode toggle
         perf_mode = QCheckBox("Performance Mode (Reduces Memory Usage)")
-        # Fix: Use QWebEngineSettings instead of QSettings
-        perf_mode.setChecked(not QWebEngineSettings.defaultSettings().testAttribute(QWebEngineSettings.WebGLEnabled))
+        perf_mode.setChecked(self.settings.get('performance_mode'))
         perf_mode.stateChanged.connect(self.toggle_performance_mode)
         layout.addWidget(perf_mode)
 
         # Image loading toggle
         img_load = QCheckBox("Load Images (Disable to save memory)")
-        # Fix: Use QWebEngineSettings instead of QSettings
-        img_load.setChecked(QWebEngineSettings.defaultSettings().testAttribute(QWebEngineSettings.AutoLoadImages))
+        img_load.setChecked(self.settings.get('load_images'))
         img_load.stateChanged.connect(self.toggle_image_loading)
         layout.addWidget(img_load)
 
@@ -727,65 +5808,189 @@ class Browser(QMainWindow):
         dialog.exec_()
 
     def clear_memory(self):
+        # Cookies are left alone: deleting them would sign the user out of every site
         self.profile.clearHttpCache()
         self.profile.clearAllVisitedLinks()
-        self.profile.cookieStore().deleteAllCookies()
         QWebEngineProfile.defaultProfile().clearAllVisitedLinks()
-        
-        for i in range(self.tabs.count()):
-            self.tabs.widget(i).page().profile().clearHttpCache()
+        get_thumbnail_cache().drop_memory()
         
         QMessageBox.information(self, "Memory Cleared", "Browser memory has been cleared!")
 
+    def set_memory_monitor(self, enabled):
+        if enabled and self.memory_monitor is None:
+            self.memory_monitor = get_memory_monitor()
+            self.memory_monitor.level_changed.connect(self.on_memory_pressure)
+            if self.memory_monitor.level != 'normal':
+                self.on_memory_pressure(self.memory_monitor.level)
+        elif not enabled and self.memory_monitor is not None:
+            self.memory_monitor.level_changed.disconnect(self.on_memory_pressure)
+            self.memory_monitor = None
+            self.restore_after_pressure()
+
+    def on_memory_pressure(self, level):
+        """Free memory in this window as pressure rises; undo what can be undone once it is back to normal"""
+        log = self.memory_monitor.log_action
+        if level == 'normal':
+            thawed = self.restore_after_pressure()
+            log('restore', f"cache limit {self.http_cache_size // 2**20} MB, {thawed} tabs thawed, speculation resumed")
+            return
+        cache_size = self.http_cache_size // (4 if level == 'moderate' else 16)
+        self.profile.setHttpCacheMaximumSize(cache_size)
+        log('trim http cache', f"limit {cache_size // 2**20} MB")
+        log('drop thumbnails', f"{get_thumbnail_cache().drop_memory()} decoded")
+        self.speculation.pause()
+        log('pause speculation')
+        background = [tab for tab in self.live_tabs.values() if tab is not self.current_tab]
+        if level == 'moderate':
+            frozen = sum(1 for tab in background if self.set_tab_lifecycle(tab, 'Frozen'))
+            log('freeze tabs', f"{frozen} of {len(background)} background tabs")
+        else:
+            for tab in background:
+                self.unload_tab(tab)
+            log('discard tabs', f"{len(background)} background tabs")
+
+    def restore_after_pressure(self):
+        self.profile.setHttpCacheMaximumSize(self.http_cache_size)
+        self.speculation.resume()
+        return sum(1 for tab in list(self.live_tabs.values()) if self.set_tab_lifecycle(tab, 'Active'))
+
+    def set_tab_lifecycle(self, tab, state):
+        """Move a live tab's page to 'Active' or 'Frozen'; False if it is already there or Qt is too old"""
+        lifecycle = getattr(QWebEnginePage, 'LifecycleState', None)  # Qt 5.14+
+        if lifecycle is None or tab.view is None:
+            return False
+        page = tab.view.page()
+        if page.lifecycleState() == getattr(lifecycle, state):
+            return False
+        page.setLifecycleState(getattr(lifecycle, state))
+        TRACER.instant(state.lower(), 'tab', tab_trace_tid(tab))
+        return True
+
+    def show_memory_pressure(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Memory Pressure")
+        dialog.resize(800, 450)
+        layout = QVBoxLayout()
+
+        monitor = self.memory_monitor or get_memory_monitor()
+        sample = monitor.sample
+        shown = lambda value: '-' if value is None else f"{value:.0f}"
+        layout.addWidget(QLabel(
+            f"Level: {monitor.level}    Available: {shown(sample['available_mb'])} of {shown(sample['total_mb'])} MB    "
+            f"PSI some/full avg10: {sample['psi_some_avg10']}/{sample['psi_full_avg10']}    "
+            f"cgroup: {shown(sample['cgroup_current_mb'])} of {shown(sample['cgroup_max_mb'])} MB"
+        ))
+
+        actions = list(reversed(monitor.actions))
+        table = QTableWidget(len(actions), 5)
+        table.setHorizontalHeaderLabels(['Time', 'Level', 'Action', 'Detail', 'Freed MB'])
+        for row, entry in enumerate(actions):
+            freed = monitor.freed_mb(entry)
+            values = [time.strftime('%H:%M:%S', time.localtime(entry['time'])), entry['level'], entry['action'],
+                      entry['detail'], 'measuring' if entry['after'] is None else shown(freed)]
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
+
     def toggle_performance_mode(self, state):
-        self.settings.setAttribute(QWebEngineSettings.WebGLEnabled, not state)
-        self.settings.setAttribute(QWebEngineSettings.JavascriptCanOpenWindows, not state)
-        self.settings.setAttribute(QWebEngineSettings.ScrollAnimatorEnabled, not state)
-        
-        for i in range(self.tabs.count()):
-            self.tabs.widget(i).reload()
+        self.settings.set('performance_mode', bool(state))
 
     def toggle_image_loading(self, state):
-        self.settings.setAttribute(QWebEngineSettings.AutoLoadImages, state)
-        for i in range(self.tabs.count()):
-            self.tabs.widget(i).reload()
+        self.settings.set('load_images', bool(state))
+
+    def apply_performance_mode(self, enabled):
+        self.web_settings.setAttribute(QWebEngineSettings.WebGLEnabled, not enabled)
+        self.web_settings.setAttribute(QWebEngineSettings.JavascriptCanOpenWindows, not enabled)
+        self.web_settings.setAttribute(QWebEngineSettings.ScrollAnimatorEnabled, not enabled)
+
+    def apply_setting(self, key, value):
+        """Apply a setting changed in any window to this one"""
+        if key == 'performance_mode':
+            self.apply_performance_mode(value)
+        elif key == 'load_images':
+            self.web_settings.setAttribute(QWebEngineSettings.AutoLoadImages, value)
+        elif key == 'search_engine':
+            self.current_search_engine = value
+            self.search_engine_selector.setCurrentText(value)
+        elif key == 'search_engines':
+            self.search_engines = value
+            self.search_engine_selector.blockSignals(True)
+            self.search_engine_selector.clear()
+            self.search_engine_selector.addItems(value.keys())
+            self.search_engine_selector.setCurrentText(self.current_search_engine)
+            self.search_engine_selector.blockSignals(False)
+        elif key == 'origin_profiles':
+            self.origin_profiles = value
+        elif key == 'prerender_enabled':
+            self.speculation.prerender = value
+        elif key == 'watchdog_auto_reload':
+            self.watchdog.auto_reload = value
+        elif key == 'strip_tracking_params':
+            self.ad_blocker.normalizer.enabled = value
+        elif key == 'max_live_tabs':
+            self.trim_live_tabs()
+        elif key == 'memory_monitor_enabled':
+            self.set_memory_monitor(value)
+        elif key == 'max_background_loads':
+            self.loads.max_background = value
+            self.loads.pump()
+        if key in ('performance_mode', 'load_images'):
+            self.reload_all_tabs()
 
     def setup_tab_suspender(self):
         self.suspend_timer = QTimer(self)
-        self.suspend_timer.timeout.connect(self.check_inactive_tabs)
+        self.suspend_timer.timeout.connect(lambda: self.trim_live_tabs(max_idle=1800))  # 30 minutes
         self.suspend_timer.start(60000)  # Check every minute
-        self.tab_last_used = {}
 
-    def check_inactive_tabs(self):
-        current_tab = self.tabs.currentWidget()
-        current_time = QDateTime.currentDateTime()
-        
-        for i in range(self.tabs.count()):
-            tab = self.tabs.widget(i)
-            if tab != current_tab:
-                if tab not in self.tab_last_used:
-                    self.tab_last_used[tab] = current_time
-                elif self.tab_last_used[tab].secsTo(current_time) > 1800:  # 30 minutes
-                    self.suspend_tab(tab, i)
-
-    def suspend_tab(self, tab, index):
-        if not hasattr(tab, 'suspended'):
-            url = tab.url()
-            tab.suspended = True
-            tab.suspended_url = url
-            blank_page = QUrl('about:blank')
-            tab.setUrl(blank_page)
-            self.tabs.setTabIcon(index, QIcon('images/suspended.png'))
-            self.tabs.setTabText(index, "[Suspended] " + self.tabs.tabText(index))
-
-    def resume_tab(self, tab, index):
-        if hasattr(tab, 'suspended') and tab.suspended:
-            tab.setUrl(tab.suspended_url)
-            tab.suspended = False
-            del tab.suspended_url
-            self.tabs.setTabIcon(index, QIcon())
-            text = self.tabs.tabText(index)
-            self.tabs.setTabText(index, text.replace("[Suspended] ", ""))
+    def update_tab_health(self, browser, status):
+        """Mark hung or crashed tabs in the tab list"""
+        tab = self.tab_model.get(getattr(browser, 'tab_id', None))
+        if tab is None or tab.view is not browser:
+            return
+        tab.status = status
+        self.tab_updated(tab)
+
+    def show_jank_report(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Jank Report")
+        dialog.resize(700, 400)
+        layout = QVBoxLayout()
+
+        rows = self.watchdog.report()
+        columns = ['origin', 'samples', 'p50_ms', 'p95_ms', 'max_ms', 'hangs', 'crashes']
+        table = QTableWidget(len(rows), len(columns))
+        table.setHorizontalHeaderLabels(['Origin', 'Samples', 'p50 ms', 'p95 ms', 'Max ms', 'Hangs', 'Crashes'])
+        for row, values in enumerate(rows):
+            for column, key in enumerate(columns):
+                table.setItem(row, column, QTableWidgetItem(str(values[key])))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
+
+    def show_job_metrics(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Bridge Jobs")
+        dialog.setFixedSize(600, 300)
+        layout = QVBoxLayout()
+
+        metrics = self.job_runner.metrics()
+        table = QTableWidget(len(metrics), 8)
+        table.setHorizontalHeaderLabels(['Job', 'Done', 'Failed', 'Cancelled', 'Rejected', 'p50 ms', 'p95 ms', 'Max ms'])
+        for row, (name, stats) in enumerate(metrics.items()):
+            values = [name, stats['completed'], stats['failed'], stats['cancelled'], stats['rejected'],
+                      stats['p50_ms'], stats['p95_ms'], stats['max_ms']]
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+        layout.addWidget(table)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
 
     def show_resource_monitor(self):
         dialog = QDialog(self)
@@ -802,7 +6007,7 @@ class Browser(QMainWindow):
         info_label = QLabel(f"""
         Memory Usage: {mem_usage:.1f} MB
         CPU Usage: {cpu_usage}%
-        Active Tabs: {self.tabs.count()}
+        Active Tabs: {len(self.tab_model)} ({len(self.tab_views)} loaded)
         Cache Size: {self.profile.httpCacheMaximumSize() / 1024 / 1024:.1f} MB
         """)
         layout.addWidget(info_label)
@@ -835,17 +6040,225 @@ class Browser(QMainWindow):
     def apply_performance_profile(self, profile_name):
         if profile_name in self.performance_profiles:
             profile = self.performance_profiles[profile_name]
-            self.settings.setAttribute(QWebEngineSettings.WebGLEnabled, profile['webgl'])
-            self.settings.setAttribute(QWebEngineSettings.JavascriptEnabled, profile['javascript'])
-            self.settings.setAttribute(QWebEngineSettings.AutoLoadImages, profile['images'])
-            self.settings.setAttribute(QWebEngineSettings.ScrollAnimatorEnabled, profile['animations'])
-            
-            for i in range(self.tabs.count()):
-                self.tabs.widget(i).reload()
+            self.web_settings.setAttribute(QWebEngineSettings.WebGLEnabled, profile['webgl'])
+            self.web_settings.setAttribute(QWebEngineSettings.JavascriptEnabled, profile['javascript'])
+            self.web_settings.setAttribute(QWebEngineSettings.AutoLoadImages, profile['images'])
+            self.web_settings.setAttribute(QWebEngineSettings.ScrollAnimatorEnabled, profile['animations'])
+            self.reload_all_tabs()
+
+    def apply_origin_profile(self, browser):
+        """Apply the performance profile assigned to the page's origin, or go back to the global settings"""
+        profile_name = self.origin_profiles.get(page_origin(browser.page()))
+        # Only this page's settings change; they outlive the navigation, so an origin without a profile resets them
+        settings = browser.page().settings()
+        attributes = {
+            QWebEngineSettings.WebGLEnabled: 'webgl',
+            QWebEngineSettings.JavascriptEnabled: 'javascript',
+            QWebEngineSettings.AutoLoadImages: 'images',
+            QWebEngineSettings.ScrollAnimatorEnabled: 'animations',
+        }
+        profile = self.performance_profiles.get(profile_name)
+        for attribute, key in attributes.items():
+            if profile is None:
+                settings.resetAttribute(attribute)
+            else:
+                settings.setAttribute(attribute, profile[key])
+
+    def handle_long_tasks(self, tab_id, data):
+        try:
+            self.long_tasks.ingest(data['url'], data['rows'])
+        except (KeyError, TypeError, ValueError):
+            return
+
+    def show_developer_panel(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Developer Panel - Errors")
+        dialog.resize(900, 450)
+        layout = QVBoxLayout()
+
+        tab_id = self.current_tab.tab_id
+        table = QTableWidget(0, 5)
+        table.setHorizontalHeaderLabels(['Count', 'Kind', 'Message', 'Source', 'Last Seen'])
+        table.horizontalHeader().setStretchLastSection(True)
+
+        def refresh():
+            entries = self.errors.entries(tab_id)
+            table.setRowCount(len(entries))
+            for row, entry in enumerate(entries):
+                cells = [entry.count, entry.kind, entry.message, f"{entry.source}:{entry.line}",
+                         time.strftime('%H:%M:%S', time.localtime(entry.last_seen))]
+                for column, value in enumerate(cells):
+                    table.setItem(row, column, QTableWidgetItem(str(value)))
+            table.resizeColumnsToContents()
+
+        refresh()
+        layout.addWidget(table)
+
+        buttons = QHBoxLayout()
+        refresh_btn = QPushButton("Refresh")
+        refresh_btn.clicked.connect(refresh)
+        buttons.addWidget(refresh_btn)
+        clear_btn = QPushButton("Clear")
+
+        def clear():
+            self.errors.clear(tab_id)
+            refresh()
+
+        clear_btn.clicked.connect(clear)
+        buttons.addWidget(clear_btn)
+        layout.addLayout(buttons)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
+
+    def schedule_startup_warmup(self):
+        """Warm learned origins shortly after first paint, once the first page has its connections"""
+        self.sender().loadFinished.disconnect(self.schedule_startup_warmup)
+        QTimer.singleShot(1500, self.startup_warmup)
+
+    def startup_warmup(self):
+        first_origin = QUrl(self.get_search_engine_url()).adjusted(QUrl.RemovePath | QUrl.RemoveQuery).toString()
+        origins = self.startup_learner.plan_warmup(exclude={first_origin})
+        if not origins:
+            return
+        TRACER.instant('startup warmup', 'speculation', TRACE_TID_BROWSER, origins=origins)
+        # A hidden page carrying only resource hints; dropped once the sockets are up
+        self.warmup_page = QWebEnginePage(self.profile, self)
+        self.warmup_page.setHtml(warmup_html(origins), QUrl('about:blank'))
+        QTimer.singleShot(30000, self.drop_warmup_page)
+
+    def drop_warmup_page(self):
+        if self.warmup_page is not None:
+            self.warmup_page.deleteLater()
+            self.warmup_page = None
+
+    def show_startup_warmup(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Startup Warmup")
+        dialog.resize(650, 300)
+        layout = QVBoxLayout()
+
+        rows = self.startup_learner.report()
+        columns = ['origin', 'warm_samples', 'warm_ms', 'cold_samples', 'cold_ms', 'saved_ms']
+        table = QTableWidget(len(rows), len(columns))
+        table.setHorizontalHeaderLabels(['Origin', 'Warm', 'Warm TTFB ms', 'Cold', 'Cold TTFB ms', 'Saved ms'])
+        for row, values in enumerate(rows):
+            for column, key in enumerate(columns):
+                value = values[key]
+                table.setItem(row, column, QTableWidgetItem('-' if value is None else str(value)))
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
+
+    def https_fallback(self, page):
+        """Retry over plain HTTP when a load we upgraded to HTTPS failed at the TLS or connection level"""
+        url = page.url()
+        if url.scheme() != 'https' or not self.ad_blocker.https.was_upgraded(url.host()):
+            return
+
+        # Stopped loads, replaced navigations and downloads fail too, but leave no error page behind
+        def check(text):
+            if sip.isdeleted(page) or page.url() != url or not HTTPS_FALLBACK_ERRORS.search(text or ''):
+                return
+            self.ad_blocker.https_fall_back(url.host())
+            TRACER.instant('https fallback', 'navigation', TRACE_TID_BROWSER, url=url.toString())
+            insecure = QUrl(url)
+            insecure.setScheme('http')
+            page.setUrl(insecure)
+
+        page.toPlainText(check)
+
+    def show_tracking_param_stats(self):
+        stats = self.ad_blocker.normalizer.stats()
+        QMessageBox.information(self, "Tracking Parameters", "\n".join(
+            f"{name.replace('_', ' ').capitalize()}: {value}" for name, value in stats.items()
+        ))
+
+    def show_https_stats(self):
+        stats = self.ad_blocker.https.stats()
+        QMessageBox.information(self, "HTTPS Upgrades", "\n".join(
+            f"{name.replace('_', ' ').capitalize()}: {value}" for name, value in stats.items()
+        ))
+
+    def show_load_scheduler_stats(self):
+        stats = self.loads.stats()
+        QMessageBox.information(self, "Load Scheduler", "\n".join(
+            f"{name.replace('_', ' ').capitalize()}: {value}" for name, value in stats.items()
+        ))
+
+    def show_speculation_stats(self):
+        stats = self.speculation.stats()
+        QMessageBox.information(self, "Speculative Loading", "\n".join(
+            f"{name.replace('_', ' ').capitalize()}: {value}" for name, value in stats.items()
+        ))
+
+    def show_main_thread_blockers(self):
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Main-Thread Blockers")
+        dialog.resize(800, 450)
+        layout = QVBoxLayout()
+
+        rows = self.long_tasks.by_origin()
+        candidates = set(self.long_tasks.blocklist_candidates())
+        table = QTableWidget(len(rows), 5)
+        table.setHorizontalHeaderLabels(['Script Origin', 'Blocking ms', 'Long Tasks', 'Sites', 'Third Party'])
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setSelectionMode(QAbstractItemView.MultiSelection)
+        for row, values in enumerate(rows):
+            cells = [values['origin'], f"{values['blocking_ms']:.0f}", values['count'], len(values['sites']),
+                     'yes' if values['third_party'] else 'no']
+            for column, value in enumerate(cells):
+                table.setItem(row, column, QTableWidgetItem(str(value)))
+            table.item(row, 0).setData(Qt.UserRole, values['host'])
+            if values['host'] in candidates:
+                table.selectRow(row)
+        table.resizeColumnsToContents()
+        layout.addWidget(table)
+
+        block_btn = QPushButton("Block Selected Origins")
+
+        def block_selected():
+            hosts = {table.item(index.row(), 0).data(Qt.UserRole) for index in table.selectionModel().selectedRows()}
+            hosts.discard('')
+            if hosts:
+                self.ad_blocker.block_hosts(hosts)
+                QMessageBox.information(dialog, "Blocked", "Blocked: " + ", ".join(sorted(hosts)))
+
+        block_btn.clicked.connect(block_selected)
+        layout.addWidget(block_btn)
+
+        # Sites that keep blocking the main thread are only suggested for the performance profile
+        heavy = [site for site in self.long_tasks.heavy_sites() if site not in self.origin_profiles]
+        if heavy:
+            layout.addWidget(QLabel("Sites with heavy main-thread blocking (suggested for the performance profile):"))
+            sites = QListWidget()
+            for site in heavy:
+                item = QListWidgetItem(site)
+                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                item.setCheckState(Qt.Unchecked)
+                sites.addItem(item)
+            layout.addWidget(sites)
+            profile_btn = QPushButton("Use Performance Profile for Checked Sites")
+
+            def profile_checked():
+                checked = [sites.item(row).text() for row in range(sites.count())
+                           if sites.item(row).checkState() == Qt.Checked]
+                if checked:
+                    origin_profiles = dict(self.origin_profiles)
+                    origin_profiles.update((site, 'performance') for site in checked)
+                    self.settings.set('origin_profiles', origin_profiles)
+                    QMessageBox.information(dialog, "Performance Profile", "Applied to: " + ", ".join(checked))
+
+            profile_btn.clicked.connect(profile_checked)
+            layout.addWidget(profile_btn)
+
+        dialog.setLayout(layout)
+        dialog.exec_()
 
     def change_search_engine(self, engine_name):
-        self.current_search_engine = engine_name
-        self.settings.setValue('search_engine', engine_name)
+        self.settings.set('search_engine', engine_name)
 
     def show_search_engine_settings(self):
         dialog = QDialog(self)
@@ -884,9 +6297,7 @@ class Browser(QMainWindow):
 
     def add_search_engine(self, name, url_template):
         if name and url_template and '{}' in url_template:
-            self.search_engines[name] = url_template
-            self.settings.setValue('search_engines', self.search_engines)
-            self.search_engine_selector.addItem(name)
+            self.settings.set('search_engines', dict(self.search_engines, **{name: url_template}))
             QMessageBox.information(self, "Success", f"Added search engine: {name}")
         else:
             QMessageBox.warning(self, "Error", "Please enter valid name and URL template")
@@ -918,13 +6329,9 @@ class Browser(QMainWindow):
             console.warn('Unhandled promise rejection:', event.reason);
         });
 
-        // General error handler
-        window.onerror = function(msg, url, line, col, error) {
-            console.warn('Caught error:', msg);
-            return false;
-        };
+        // Uncaught errors are reported by the error aggregator script
         """
-        browser.page().runJavaScript(polyfills)
+        self.run_js(browser, 'compatibility polyfills', polyfills)
 
     def inject_video_compatibility_fixes(self, browser):
         fixes = """
@@ -978,7 +6385,7 @@ class Browser(QMainWindow):
         };
         window.Promise.prototype = originalPromise.prototype;
         """
-        browser.page().runJavaScript(fixes)
+        self.run_js(browser, 'video compatibility fixes', fixes)
 
     def inject_media_error_handler(self, browser):
         """Add better media error handling"""
@@ -1013,7 +6420,7 @@ class Browser(QMainWindow):
             }
         });
         """
-        browser.page().runJavaScript(handler)
+        self.run_js(browser, 'media error handler', handler)
 
     def enable_indexed_db(self, browser):
         fix = """
@@ -1043,7 +6450,7 @@ class Browser(QMainWindow):
         window.storage = storage;
         storage.init();
         """
-        browser.page().runJavaScript(fix)
+        self.run_js(browser, 'indexed db', fix)
 
     def handle_js_console(self, level, message, line, source_id):
         """Handle JavaScript console messages"""
@@ -1095,7 +6502,7 @@ class Browser(QMainWindow):
         )
         
         # Enable modern video codecs
-        browser.page().runJavaScript("""
+        self.run_js(browser, 'video codec support', """
             function enhanceVideoSupport() {
                 // Enable MSE & EME
                 window.MediaSource = window.MediaSource || window.WebKitMediaSource;
@@ -1176,11 +6583,11 @@ class Browser(QMainWindow):
             console.log(result);  // Will show "Processed by Python: HELLO"
         }
         """
-        browser.page().runJavaScript(examples)
+        self.run_js(browser, 'interaction examples', examples)
 
     # Add a test method
     def test_python_js_bridge(self):
-        self.tabs.currentWidget().page().runJavaScript("""
+        self.run_js(self.current_view(), 'bridge test', """
             // Test JavaScript-Python communication
             sendToPython();
             getFromPython();
@@ -1188,34 +6595,9 @@ class Browser(QMainWindow):
             twoWayExample();
         """)
 
-    def inject_error_handlers(self, browser):
+    def inject_error_handlers(self, page, tab_id):
         """Add comprehensive error handling"""
-        handlers = """
-        // Global error handler
-        window.onerror = function(msg, url, line, col, error) {
-            if (window.python) {
-                python.log(`Error: ${msg} at ${url}:${line}`);
-            }
-            return false;
-        };
-
-        // Promise rejection handler
-        window.onunhandledrejection = function(event) {
-            if (window.python) {
-                python.log(`Unhandled Promise rejection: ${event.reason}`);
-            }
-        };
-
-        // Console error handler
-        const originalError = console.error;
-        console.error = function() {
-            if (window.python) {
-                window.python.log('Console error: ' + Array.from(arguments).join(' '));
-            }
-            originalError.apply(console, arguments);
-        };
-        """
-        browser.page().runJavaScript(handlers)
+        self.install_script(page, tab_id, 'zibrowser-errors', ERROR_AGGREGATOR_JS)
 
     def setup_video_storage(self, browser):
         video_handler = """
@@ -1247,30 +6629,30 @@ class Browser(QMainWindow):
             window.videoHandler = new VideoHandler();
         }
         """
-        browser.page().runJavaScript(video_handler)
+        self.run_js(browser, 'video storage', video_handler)
 
     def add_video_controls(self):
         # Add download video button
-        download_video_btn = QAction(QIcon('images/download-video.png'), 'Download Video', self)
+        download_video_btn = QAction(get_icon('download-video'), 'Download Video', self)
         download_video_btn.triggered.connect(self.download_current_video)
         # Use self.toolbar instead of navbar
         self.toolbar.addAction(download_video_btn)
 
         # Add video control buttons
-        volume_up_btn = QAction(QIcon('images/volume-up.png'), 'Volume Up', self)
+        volume_up_btn = QAction(get_icon('volume-up'), 'Volume Up', self)
         volume_up_btn.triggered.connect(self.volume_up)
         self.toolbar.addAction(volume_up_btn)
 
-        volume_down_btn = QAction(QIcon('images/volume-down.png'), 'Volume Down', self)
+        volume_down_btn = QAction(get_icon('volume-down'), 'Volume Down', self)
         volume_down_btn.triggered.connect(self.volume_down)
         self.toolbar.addAction(volume_down_btn)
 
-        mute_btn = QAction(QIcon('images/mute.png'), 'Mute', self)
+        mute_btn = QAction(get_icon('mute'), 'Mute', self)
         mute_btn.triggered.connect(self.toggle_mute)
         self.toolbar.addAction(mute_btn)
 
     def download_current_video(self):
-        self.tabs.currentWidget().page().runJavaScript("""
+        self.run_js(self.current_view(), 'download video', """
             // Find video element on page
             const video = document.querySelector('video');
             if (video && video.src) {
@@ -1287,7 +6669,7 @@ class Browser(QMainWindow):
 
     def volume_up(self):
         """Increase video volume"""
-        self.tabs.currentWidget().page().runJavaScript("""
+        self.run_js(self.current_view(), 'volume up', """
             const videos = document.getElementsByTagName('video');
             for(var i = 0; i < videos.length; i++) {
                 videos[i].volume = Math.min(videos[i].volume + 0.1, 1.0);
@@ -1296,7 +6678,7 @@ class Browser(QMainWindow):
 
     def volume_down(self):
         """Decrease video volume"""
-        self.tabs.currentWidget().page().runJavaScript("""
+        self.run_js(self.current_view(), 'volume down', """
             const videos = document.getElementsByTagName('video');
             for(var i = 0; i < videos.length; i++) {
                 videos[i].volume = Math.max(videos[i].volume - 0.1, 0.0);
@@ -1305,7 +6687,7 @@ class Browser(QMainWindow):
 
     def toggle_mute(self):
         """Toggle video mute state"""
-        self.tabs.currentWidget().page().runJavaScript("""
+        self.run_js(self.current_view(), 'toggle mute', """
             const videos = document.getElementsByTagName('video');
             for(var i = 0; i < videos.length; i++) {
                 videos[i].muted = !videos[i].muted;
@@ -1415,50 +6797,1299 @@ class Browser(QMainWindow):
             enhanceVideoPlayback();
         }
         """
-        browser.page().runJavaScript(video_handler)
+        self.run_js(browser, 'video handler', video_handler)
 
-    def inject_bridge(self, browser):
-        bridge_init = """
-        window.pythonBridge = {
-            async processPythonData(data) {
+    def inject_bridge(self, page, tab_id):
+        """Install the bridge client, which persists across navigations"""
+        if not page.scripts().findScript('zibrowser-bridge').isNull():
+            return
+
+        bridge_init = load_qwebchannel_js() + """
+        (function() {
+            if (window.ziBridge) {
+                return;
+            }
+            const tabId = %d;
+
+            // Messages are queued and sent as one batch per animation frame
+            const queue = [];
+            let scheduled = false;
+            const onReady = [];
+
+            function flush() {
+                scheduled = false;
+                if (!queue.length) {
+                    return;
+                }
                 if (!window.python) {
-                    console.error('Python bridge not initialized');
-                    return null;
+                    schedule();
+                    return;
                 }
-                return await window.python.processPythonData(data);
-            },
-            
-            log(message) {
-                if (window.python) {
-                    window.python.log(message);
+                window.python.post(JSON.stringify(queue.splice(0, queue.length)));
+            }
+
+            function schedule() {
+                if (scheduled) {
+                    return;
                 }
-            },
-            
-            saveToFile(content) {
-                if (window.python) {
-                    window.python.saveToFile(content);
+                scheduled = true;
+                // Hidden tabs get no animation frames
+                if (document.hidden || !window.requestAnimationFrame) {
+                    setTimeout(flush, 50);
+                } else {
+                    requestAnimationFrame(flush);
                 }
             }
-        };
 
-        // Provide global functions
-        window.processPythonData = (data) => window.pythonBridge.processPythonData(data);
-        window.logToPython = (msg) => window.pythonBridge.log(msg);
-        window.saveToPython = (content) => window.pythonBridge.saveToFile(content);
-        """
-        browser.page().runJavaScript(bridge_init)
+            window.ziBridge = {
+                tabId: tabId,
+                post(type, data) {
+                    if (queue.length >= 1000) {
+                        queue.shift();
+                    }
+                    queue.push([type, data]);
+                    schedule();
+                },
+                flush: flush,
+
+                // Internal pages only: resolves with one page of rows from Python
+                query(source, params) {
+                    return new Promise((resolve, reject) => {
+                        const send = () => window.python.query(source, JSON.stringify(params || {}), reply => {
+                            const result = JSON.parse(reply);
+                            if (result.ok) {
+                                resolve(result.result);
+                            } else {
+                                reject(new Error(result.error));
+                            }
+                        });
+                        if (window.python) {
+                            send();
+                        } else {
+                            onReady.push(send);
+                        }
+                    });
+                }
+            };
+
+            if (window.QWebChannel && window.qt && qt.webChannelTransport) {
+                new QWebChannel(qt.webChannelTransport, function(channel) {
+                    window.python = channel.objects.python;
+                    schedule();
+                    onReady.splice(0, onReady.length).forEach(send => send());
+
+                    // Signal that bridge is ready
+                    console.log('Python bridge initialized');
+                });
+            }
+
+            window.pythonBridge = {
+                async processPythonData(data) {
+                    if (!window.python) {
+                        console.error('Python bridge not initialized');
+                        return null;
+                    }
+                    return await window.python.processPythonData(data);
+                },
+
+                log(message) {
+                    window.ziBridge.post('log', String(message));
+                },
+
+                saveToFile(content) {
+                    window.ziBridge.post('save', String(content));
+                }
+            };
+
+            // Asynchronous jobs: pythonJobs.submit(name, payload) returns a promise
+            // with a cancel() method; Python resolves it through jobFinished
+            window.pythonJobs = {
+                nextId: 0,
+                waiting: new Map(),
+                connected: false,
+
+                connect() {
+                    if (this.connected || !window.python) {
+                        return this.connected;
+                    }
+                    window.python.jobFinished.connect((jobId, reply) => {
+                        const job = this.waiting.get(jobId);
+                        if (!job) {
+                            return;
+                        }
+                        this.waiting.delete(jobId);
+                        const result = JSON.parse(reply);
+                        if (result.ok) {
+                            job.resolve(result.result);
+                        } else {
+                            job.reject(new Error(result.error));
+                        }
+                    });
+                    this.connected = true;
+                    return true;
+                },
+
+                submit(name, payload) {
+                    const jobId = `${Date.now().toString(36)}-${(this.nextId++).toString(36)}`;
+                    const promise = new Promise((resolve, reject) => {
+                        if (!this.connect()) {
+                            reject(new Error('Python bridge not initialized'));
+                            return;
+                        }
+                        this.waiting.set(jobId, { resolve, reject });
+                        const data = JSON.stringify(payload === undefined ? null : payload);
+                        window.python.submitJob(jobId, name, data, status => {
+                            if (status !== 'queued') {
+                                this.waiting.delete(jobId);
+                                reject(new Error(status));
+                            }
+                        });
+                    });
+                    promise.jobId = jobId;
+                    promise.cancel = () => window.python && window.python.cancelJob(jobId);
+                    return promise;
+                }
+            };
+
+            // Provide global functions
+            window.processPythonData = (data) => window.pythonBridge.processPythonData(data);
+            window.logToPython = (msg) => window.pythonBridge.log(msg);
+            window.saveToPython = (content) => window.pythonBridge.saveToFile(content);
+        })();
+        """ % tab_id
+
+        self.install_script(page, tab_id, 'zibrowser-bridge', bridge_init)
+
+    def install_script(self, page, tab_id, name, source, injection_point=QWebEngineScript.DocumentCreation):
+        """Add a script that runs in every document the page loads"""
+        scripts = page.scripts()
+        if not scripts.findScript(name).isNull():
+            return
+        script = QWebEngineScript()
+        script.setName(name)
+        script.setSourceCode(source)
+        script.setInjectionPoint(injection_point)
+        script.setWorldId(QWebEngineScript.MainWorld)
+        script.setRunsOnSubFrames(False)
+        scripts.insert(script)
+        TRACER.instant('install script', 'inject', 1000 + tab_id, label=name, bytes=len(source))
+
+RENDER_FORMATS = ('png', 'pdf', 'mhtml', 'text')
+RENDER_EXTENSIONS = {'png': 'png', 'pdf': 'pdf', 'mhtml': 'mhtml', 'text': 'txt'}
+
+class RenderJob:
+    def __init__(self, index, url):
+        self.index = index
+        self.url = url
+        self.attempts = 0
+
+    def output_name(self, fmt):
+        """File name for one capture of this job, unique per input line"""
+        qurl = QUrl(self.url)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', qurl.host() + qurl.path()).strip('-')[:60] or 'page'
+        return f"{self.index:05d}-{slug}.{RENDER_EXTENSIONS[fmt]}"
+
+class RenderWorker(QObject):
+    """Loads one URL at a time in a windowless view and captures it"""
+    finished = pyqtSignal(object, object)  # worker, result dict
+
+    def __init__(self, profile, out_dir, formats, timeout, size, settle_ms=500):
+        super().__init__()
+        self.out_dir = out_dir
+        self.formats = formats
+        self.timeout = timeout
+        self.settle_ms = settle_ms
+        self.job = None
+        self.generation = 0
+
+        # The view is never shown on screen but still renders, so it can be grabbed
+        self.view = QWebEngineView()
+        self.view.setAttribute(Qt.WA_DontShowOnScreen)
+        self.view.resize(size)
+        self.page = QWebEnginePage(profile, self.view)
+        self.view.setPage(self.page)
+        self.view.show()
+        self.page.loadFinished.connect(self.on_load_finished)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.on_timeout)
+
+    def start(self, job):
+        self.generation += 1
+        self.job = job
+        self.pending = list(self.formats)
+        self.capturing = False
+        self.outputs = {}
+        self.started = time.perf_counter()
+        job.attempts += 1
+        self.timer.start(int(self.timeout * 1000))
+        self.page.load(QUrl(job.url))
+
+    def on_load_finished(self, ok):
+        # Later loadFinished signals (e.g. client-side redirects) are ignored once capturing
+        if self.job is None or self.capturing:
+            return
+        if not ok:
+            self.finish('load failed')
+            return
+        self.capturing = True
+        generation = self.generation
+        QTimer.singleShot(self.settle_ms, lambda: self.capture_next(generation))
+
+    def on_timeout(self):
+        self.page.triggerAction(QWebEnginePage.Stop)
+        self.finish('timeout')
+
+    def capture_next(self, generation):
+        # Ignore callbacks that arrive after a timeout moved on to another job
+        if generation != self.generation or self.job is None:
+            return
+        if not self.pending:
+            self.finish()
+            return
+
+        fmt = self.pending.pop(0)
+        path = os.path.join(self.out_dir, self.job.output_name(fmt))
+        self.outputs[fmt] = path
+
+        def done(*_):
+            self.capture_next(generation)
+
+        def write_and_continue(data):
+            try:
+                with open(path, 'wb') as f:
+                    f.write(data)
+            except OSError as e:
+                self.finish(f"{fmt} capture failed: {e}")
+                return
+            done()
+
+        try:
+            if fmt == 'png':
+                if not self.view.grab().save(path):
+                    raise OSError(f"could not write {path}")
+                done()
+            elif fmt == 'pdf':
+                self.page.printToPdf(lambda data: write_and_continue(bytes(data)))
+            elif fmt == 'mhtml':
+                # Completion arrives through the profile's downloadRequested signal
+                self.save_done = done
+                self.page.save(path, QWebEngineDownloadItem.MimeHtmlSaveFormat)
+            elif fmt == 'text':
+                self.page.toPlainText(lambda text: write_and_continue(text.encode('utf-8')))
+        except Exception as e:
+            self.finish(f"{fmt} capture failed: {e}")
+
+    def handle_save(self, download):
+        if download.state() == QWebEngineDownloadItem.DownloadRequested:
+            download.accept()
+        download.finished.connect(self.save_done)
+
+    def finish(self, error=None):
+        if self.job is None:
+            return
+        self.timer.stop()
+        job, self.job = self.job, None
+        self.generation += 1
+        self.finished.emit(self, {
+            'index': job.index,
+            'url': job.url,
+            'ok': error is None,
+            'attempts': job.attempts,
+            'elapsed_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'outputs': self.outputs if error is None else {},
+            'error': error,
+        })
+
+class RenderPool(QObject):
+    """Renders URLs with a pool of workers sharing one profile and ad blocker.
+
+    URLs can be submitted up front or streamed in while rendering; done is
+    emitted once input is closed and every worker is idle.
+    """
+    done = pyqtSignal()
+
+    def __init__(self, out_dir, results, formats=('png',), concurrency=4, timeout=30,
+                 retries=1, profile_dir=None, size=QSize(1280, 800)):
+        super().__init__()
+        if profile_dir:
+            self.profile = QWebEngineProfile('ZiBrowserRender', self)
+        else:
+            self.profile = QWebEngineProfile(self)
+        configure_profile(self.profile, profile_dir)
+        self.ad_blocker = AdBlocker()
+        self.profile.setUrlRequestInterceptor(self.ad_blocker)
+        self.profile.downloadRequested.connect(self.route_download)
+
+        if not os.path.exists(out_dir):
+            os.makedirs(out_dir)
+        self.results = results
+        self.queue = deque()
+        self.submitted = 0
+        self.input_closed = False
+        self.retries = retries
+        self.succeeded = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+
+        self.workers = []
+        for _ in range(max(1, concurrency)):
+            worker = RenderWorker(self.profile, out_dir, formats, timeout, size)
+            worker.finished.connect(self.on_worker_finished)
+            self.workers.append(worker)
+        self.idle = set(self.workers)
+
+    def submit(self, url, index=None):
+        self.queue.append(RenderJob(self.submitted if index is None else index, url))
+        self.submitted += 1
+        if self.idle:
+            self.dispatch(self.idle.pop())
+
+    def close_input(self):
+        self.input_closed = True
+        self.check_done()
+
+    def dispatch(self, worker):
+        if self.queue:
+            self.idle.discard(worker)
+            worker.start(self.queue.popleft())
+            return
+        self.idle.add(worker)
+        self.check_done()
+
+    def check_done(self):
+        if self.input_closed and not self.queue and len(self.idle) == len(self.workers):
+            self.done.emit()
+
+    def route_download(self, download):
+        for worker in self.workers:
+            if download.page() is worker.page:
+                worker.handle_save(download)
+                return
+
+    def on_worker_finished(self, worker, result):
+        if not result['ok'] and result['attempts'] <= self.retries:
+            self.queue.append(self.job_for_retry(result))
+        else:
+            if result['ok']:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            # Stream each result as soon as it is known
+            self.results.write(json.dumps(result) + '\n')
+            self.results.flush()
+        self.dispatch(worker)
+
+    def job_for_retry(self, result):
+        job = RenderJob(result['index'], result['url'])
+        job.attempts = result['attempts']
+        return job
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'pages': self.submitted,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'workers': len(self.workers),
+            'seconds': round(elapsed, 2),
+            'pages_per_second': round(self.submitted / elapsed, 2) if elapsed else 0,
+        }
+
+class LineReader(QThread):
+    """Reads lines from a stream on a background thread"""
+    line_read = pyqtSignal(str)
+    closed = pyqtSignal()
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+
+    def run(self):
+        for line in self.stream:
+            if line.strip():
+                self.line_read.emit(line)
+        self.closed.emit()
+
+class ShardWorker:
+    """One render-worker child process and the jobs currently sent to it"""
+    def __init__(self, worker_id, command, events):
+        self.worker_id = worker_id
+        self.inflight = {}  # index -> url
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True, encoding='utf-8', bufsize=1,
+        )
+        self.reader = threading.Thread(target=self.read_results, args=(events,), daemon=True)
+        self.reader.start()
+
+    def read_results(self, events):
+        for line in self.process.stdout:
+            try:
+                events.put(('result', self, json.loads(line)))
+            except ValueError:
+                continue
+        self.process.wait()
+        events.put(('exit', self, self.process.returncode))
+
+    def send(self, index, url):
+        self.inflight[index] = url
+        self.process.stdin.write(json.dumps({'index': index, 'url': url}) + '\n')
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+class ShardRunner:
+    """Distributes URLs over several render-worker processes.
+
+    Each worker process runs its own QApplication and RenderPool. Only a
+    bounded number of jobs is in flight per worker, and dispatch never runs
+    more than a window ahead of the oldest unwritten result, so the reorder
+    buffer that keeps the results log in input order stays bounded too. If a
+    worker dies, its in-flight jobs are re-queued on a replacement process.
+    """
+    def __init__(self, urls, out_dir, results, workers=None, pages_per_worker=2,
+                 max_inflight=None, formats=('text',), timeout=30, retries=1,
+                 isolate_profiles=False, max_crashes_per_url=2, max_restarts=None):
+        self.urls = iter(urls)
+        self.out_dir = out_dir
+        self.results = results
+        self.worker_count = workers or os.cpu_count() or 1
+        self.pages_per_worker = pages_per_worker
+        self.max_inflight = max_inflight or pages_per_worker * 2
+        self.window = self.worker_count * self.max_inflight * 4
+        self.formats = formats
+        self.timeout = timeout
+        self.retries = retries
+        self.isolate_profiles = isolate_profiles
+        self.max_crashes_per_url = max_crashes_per_url
+        self.max_restarts = self.worker_count * 4 if max_restarts is None else max_restarts
+
+        self.events = queue.Queue()
+        self.retry_queue = deque()
+        self.crashes = {}  # index -> number of worker deaths while in flight
+        self.pending_results = {}  # reorder buffer, index -> result
+        self.next_index = 0
+        self.next_to_write = 0
+        self.input_exhausted = False
+        self.restarts = 0
+        self.written = 0
+        self.failed = 0
+        self.spawned = 0
+        self.workers = []
+
+    def worker_command(self):
+        command = [
+            sys.executable, os.path.abspath(__file__), 'render-worker',
+            '--out', self.out_dir,
+            '--concurrency', str(self.pages_per_worker),
+            '--timeout', str(self.timeout),
+            '--retries', str(self.retries),
+        ]
+        for fmt in self.formats:
+            command += ['--format', fmt]
+        if self.isolate_profiles:
+            command += ['--profile-dir', os.path.join(self.out_dir, 'profiles', f"worker-{self.spawned}")]
+        return command
+
+    def spawn(self):
+        worker = ShardWorker(self.spawned, self.worker_command(), self.events)
+        self.spawned += 1
+        self.workers.append(worker)
+        return worker
+
+    def next_job(self):
+        if self.retry_queue:
+            return self.retry_queue.popleft()
+        # Backpressure: do not read further ahead than the reorder window
+        if self.input_exhausted or self.next_index - self.next_to_write >= self.window:
+            return None
+        try:
+            url = next(self.urls)
+        except StopIteration:
+            self.input_exhausted = True
+            return None
+        job = (self.next_index, url)
+        self.next_index += 1
+        return job
+
+    def fill(self, worker):
+        while len(worker.inflight) < self.max_inflight:
+            job = self.next_job()
+            if job is None:
+                break
+            try:
+                worker.send(*job)
+            except OSError:
+                # The worker is dying; its exit event will re-queue this job
+                break
+
+    def is_finished(self):
+        return self.input_exhausted and not self.retry_queue and self.next_to_write == self.next_index
+
+    def record(self, result):
+        self.pending_results[result['index']] = result
+        while self.next_to_write in self.pending_results:
+            result = self.pending_results.pop(self.next_to_write)
+            if not result['ok']:
+                self.failed += 1
+            self.results.write(json.dumps(result) + '\n')
+            self.results.flush()
+            self.written += 1
+            self.next_to_write += 1
+
+    def handle_exit(self, worker):
+        self.workers.remove(worker)
+        for index, url in sorted(worker.inflight.items()):
+            self.crashes[index] = self.crashes.get(index, 0) + 1
+            if self.crashes[index] >= self.max_crashes_per_url:
+                self.record({
+                    'index': index, 'url': url, 'ok': False, 'attempts': self.crashes[index],
+                    'elapsed_ms': None, 'outputs': {}, 'error': 'worker crashed',
+                })
+            else:
+                self.retry_queue.append((index, url))
+        worker.inflight.clear()
+
+        if not self.is_finished() and self.restarts < self.max_restarts:
+            self.restarts += 1
+            self.fill(self.spawn())
+
+    def run(self):
+        self.started = time.perf_counter()
+        for _ in range(self.worker_count):
+            self.fill(self.spawn())
+
+        while self.workers:
+            # Workers are told to exit once there is nothing left to give them
+            if self.is_finished():
+                for worker in self.workers:
+                    worker.close()
+
+            kind, worker, payload = self.events.get()
+            if kind == 'result':
+                worker.inflight.pop(payload['index'], None)
+                self.record(payload)
+                if not self.is_finished():
+                    for other in self.workers:
+                        self.fill(other)
+            elif kind == 'exit':
+                self.handle_exit(worker)
+
+        # Out of restarts: anything still unwritten had no worker left to run it
+        while not self.is_finished():
+            job = self.next_job()
+            if job is None:
+                break
+            self.record({
+                'index': job[0], 'url': job[1], 'ok': False, 'attempts': 0,
+                'elapsed_ms': None, 'outputs': {}, 'error': 'no workers available',
+            })
+        return self.summary()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            'pages': self.written,
+            'failed': self.failed,
+            'workers': self.worker_count,
+            'restarts': self.restarts,
+            'seconds': round(elapsed, 2),
+            'pages_per_second': round(self.written / elapsed, 2) if elapsed else 0,
+        }
+
+def read_url_list(path):
+    """Read one URL per line, skipping blank lines and # comments"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+def iter_url_list(path):
+    """Like read_url_list, but streams the file instead of loading it"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip() and not line.lstrip().startswith('#'):
+                yield line.strip()
+
+def create_application(qt_args):
+    register_internal_scheme()
+
+    # Set High DPI attributes BEFORE creating QApplication
+    QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
+
+    # Create QApplication after setting attributes
+    app = QApplication(sys.argv[:1] + qt_args)
+    app.setApplicationName("ZiBrowser")
+    app.setOrganizationName("ZiBrowser")
+    app.setOrganizationDomain("zibrowser.com")
+    return app
+
+def render_main(args, qt_args):
+    """Batch-render URLs without opening a browser window"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = create_application(qt_args)
+
+    urls = read_url_list(args.urls)
+    if not urls:
+        print("No URLs to render", file=sys.stderr)
+        return 1
+
+    results = open(args.results or os.path.join(args.out, 'results.jsonl'), 'a', encoding='utf-8')
+    pool = RenderPool(
+        args.out, results,
+        formats=args.format or ['png'],
+        concurrency=min(args.concurrency, len(urls)),
+        timeout=args.timeout,
+        retries=args.retries,
+        profile_dir=args.profile_dir,
+        size=QSize(args.width, args.height),
+    )
+    pool.done.connect(app.quit)
+    for url in urls:
+        pool.submit(url)
+    pool.close_input()
+    app.exec_()
+    results.close()
+
+    print(json.dumps(pool.summary()), file=sys.stderr)
+    return 0 if pool.failed == 0 else 1
+
+def render_worker_main(args, qt_args):
+    """Render jobs read as JSON lines from stdin, writing results to stdout"""
+    # Keep stdout for results only; anything Qt or Chromium prints goes to stderr
+    results = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    os.dup2(2, 1)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = create_application(qt_args)
+    pool = RenderPool(
+        args.out, results,
+        formats=args.format or ['text'],
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        retries=args.retries,
+        profile_dir=args.profile_dir,
+    )
+    pool.done.connect(app.quit)
+
+    def submit(line):
+        try:
+            job = json.loads(line)
+            pool.submit(job['url'], job['index'])
+        except (ValueError, KeyError):
+            print(f"Ignoring malformed job: {line!r}", file=sys.stderr)
+
+    reader = LineReader(sys.stdin)
+    reader.line_read.connect(submit)
+    reader.closed.connect(pool.close_input)
+    reader.start()
+    app.exec_()
+    reader.wait()
+    results.close()
+    return 0
+
+def shard_main(args, qt_args):
+    """Batch-render URLs across several worker processes"""
+    if not os.path.exists(args.out):
+        os.makedirs(args.out)
+    with open(args.results or os.path.join(args.out, 'results.jsonl'), 'a', encoding='utf-8') as results:
+        runner = ShardRunner(
+            iter_url_list(args.urls), args.out, results,
+            workers=args.workers,
+            pages_per_worker=args.concurrency,
+            max_inflight=args.max_inflight,
+            formats=args.format or ['png'],
+            timeout=args.timeout,
+            retries=args.retries,
+            isolate_profiles=args.isolate_profiles,
+        )
+        summary = runner.run()
+    print(json.dumps(summary), file=sys.stderr)
+    return 0 if summary['failed'] == 0 else 1
+
+FIXTURE_STYLESHEET = """
+body { font-family: sans-serif; margin: 2em; }
+.card { border: 1px solid #ccc; border-radius: 4px; margin: 0.5em 0; padding: 0.5em; }
+"""
+
+FIXTURE_SCRIPT = """
+// A little main-thread work, so pages are not free to render
+let total = 0;
+for (let i = 0; i < 200000; i++) { total += Math.sqrt(i); }
+document.getElementById('out').textContent = total.toFixed(0);
+"""
+
+def write_fixture_site(directory, pages=100, tracking=False):
+    """Write a small static site for benchmarks and offline render runs.
+
+    With tracking set, every page links its assets with its own campaign
+    parameters, as pages reached from different campaigns do.
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(os.path.join(directory, 'style.css'), 'w', encoding='utf-8') as f:
+        f.write(FIXTURE_STYLESHEET)
+    with open(os.path.join(directory, 'script.js'), 'w', encoding='utf-8') as f:
+        f.write(FIXTURE_SCRIPT)
+    for n in range(pages):
+        query = f'?v=1&utm_source=page-{n}&utm_medium=bench' if tracking else ''
+        cards = '\n'.join(
+            f'<div class="card"><h3>Item {n}.{i}</h3><p>{"Lorem ipsum dolor sit amet. " * 8}</p>'
+            f'<a href="page-{(n + i + 1) % pages}.html">next</a></div>'
+            for i in range(20)
+        )
+        with open(os.path.join(directory, f'page-{n}.html'), 'w', encoding='utf-8') as f:
+            f.write(
+                f'<!DOCTYPE html><html><head><title>Fixture page {n}</title>'
+                f'<link rel="stylesheet" href="style.css{query}"></head>'
+                f'<body><h1>Fixture page {n}</h1><p id="out"></p>{cards}'
+                f'<script src="script.js{query}"></script></body></html>'
+            )
+    return [f'page-{n}.html' for n in range(pages)]
+
+class QuietRequestHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+class CountingRequestHandler(QuietRequestHandler):
+    """Lets clients cache everything and counts the requests that still arrive"""
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, keep-alive responses stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, counts=None, **kwargs):
+        self.counts = counts
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        self.counts[path] = self.counts.get(path, 0) + 1
+        super().do_GET()
+
+    def end_headers(self):
+        self.send_header('Cache-Control', 'max-age=3600')
+        super().end_headers()
+
+def serve_directory(directory, handler_class=QuietRequestHandler, **handler_options):
+    """Serve a directory over HTTP on a free local port from a background thread"""
+    handler = functools.partial(handler_class, directory=directory, **handler_options)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+def bench_shard(args):
+    """Throughput of the sharded renderer on a local fixture site, by worker count"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pages = write_fixture_site(os.path.join(tmp, 'site'), args.pages)
+        server, base_url = serve_directory(os.path.join(tmp, 'site'))
+        urls = [base_url + page for page in pages]
+
+        counts = sorted({1, 2, 4, os.cpu_count() or 1})
+        baseline = None
+        try:
+            for workers in counts:
+                out_dir = os.path.join(tmp, f'out-{workers}')
+                os.makedirs(out_dir)
+                with open(os.path.join(out_dir, 'results.jsonl'), 'w', encoding='utf-8') as results:
+                    summary = ShardRunner(urls, out_dir, results, workers=workers,
+                                          pages_per_worker=2, formats=['text']).run()
+                rate = summary['pages_per_second']
+                baseline = baseline or rate
+                print(f"{workers:>3} workers: {rate:8.2f} pages/s  speedup {rate / baseline if baseline else 0:5.2f}x  "
+                      f"failed {summary['failed']}")
+        finally:
+            server.shutdown()
+    return 0
+
+def bench_index(args):
+    """Indexing throughput and query latency of the page index"""
+    import random
+    rng = random.Random(42)
+    vocabulary = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 9)))
+                  for _ in range(20000)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        indexer = PageIndexer(os.path.join(tmp, 'index.sqlite3'), max_queue=4096)
+        started = time.perf_counter()
+        for n in range(args.docs):
+            words = rng.choices(vocabulary, k=300)
+            indexer.submit(f"https://example.test/{n}", ' '.join(words[:6]), ' '.join(words), block=True)
+        indexer.close()
+        elapsed = time.perf_counter() - started
+        print(f"indexed {args.docs} documents in {elapsed:.1f}s ({args.docs / elapsed:.0f} docs/s)")
+
+        latencies = []
+        for _ in range(200):
+            terms = ' '.join(rng.choices(vocabulary, k=rng.randint(1, 3)))
+            started = time.perf_counter()
+            indexer.search(terms)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        print(f"query latency: p50 {latencies[len(latencies) // 2]:.2f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms, max {latencies[-1]:.2f} ms")
+    return 0
+
+def bench_params(args):
+    """HTTP cache hit rate on assets linked with tracking parameters, with and without stripping"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = create_application([])
+    with tempfile.TemporaryDirectory() as tmp:
+        site = os.path.join(tmp, 'site')
+        pages = write_fixture_site(site, args.pages, tracking=True)
+        counts = {}
+        server, base_url = serve_directory(site, CountingRequestHandler, counts=counts)
+        urls = [f"{base_url}{page}?utm_source=bench&fbclid=run-{n}" for n, page in enumerate(pages)]
+        try:
+            for strip in (False, True):
+                counts.clear()
+                out_dir = os.path.join(tmp, f'out-{strip}')
+                os.makedirs(out_dir)
+                with open(os.path.join(out_dir, 'results.jsonl'), 'w', encoding='utf-8') as results:
+                    # A fresh off-the-record profile per run, so each starts with an empty cache
+                    pool = RenderPool(out_dir, results, formats=['text'], concurrency=2)
+                    pool.ad_blocker.normalizer.enabled = strip
+                    loop = QEventLoop()
+                    pool.done.connect(loop.quit)
+                    for url in urls:
+                        pool.submit(url)
+                    pool.close_input()
+                    loop.exec_()
+                asset_requests = 2 * len(pages)
+                fetched = counts.get('/style.css', 0) + counts.get('/script.js', 0)
+                summary = pool.summary()
+                print(f"{'strip' if strip else 'keep '}: asset cache hit rate {1 - fetched / asset_requests:6.1%}  "
+                      f"({fetched} of {asset_requests} fetched)  {summary['pages_per_second']:.2f} pages/s  "
+                      f"rewritten {pool.ad_blocker.normalizer.counters['rewritten']}")
+        finally:
+            server.shutdown()
+    app.quit()
+    return 0
+
+def bench_proxy(args):
+    """Hit rate and latency of the caching proxy against a local origin server"""
+    with tempfile.TemporaryDirectory() as tmp:
+        site = os.path.join(tmp, 'site')
+        pages = write_fixture_site(site, args.pages)
+        counts = {}
+        server, base_url = serve_directory(site, CountingRequestHandler, counts=counts)
+        urls = [base_url + path for page in pages for path in (page, 'style.css', 'script.js')]
+        proxy = CachingProxy(os.path.join(tmp, 'cache'))
+        port = proxy.start()
+        local = threading.local()
+
+        def fetch(url):
+            if not hasattr(local, 'connection'):
+                local.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            started = time.perf_counter()
+            local.connection.request('GET', url)
+            response = local.connection.getresponse()
+            response.read()
+            return (time.perf_counter() - started) * 1000, response.status
+
+        try:
+            for run in ('cold', 'warm'):
+                counts.clear()
+                with concurrent.futures.ThreadPoolExecutor(max_workers=8) as clients:
+                    started = time.perf_counter()
+                    results = list(clients.map(fetch, urls))
+                    elapsed = time.perf_counter() - started
+                latencies = sorted(latency for latency, _ in results)
+                served = sum(counts.values())
+                print(f"{run}: {len(urls) / elapsed:8.0f} requests/s  origin served {served} of {len(urls)}  "
+                      f"p50 {latencies[len(latencies) // 2]:.2f} ms  p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms  "
+                      f"errors {sum(1 for _, status in results if status != 200)}")
+            print(json.dumps(proxy.stats()))
+        finally:
+            proxy.close()
+            server.shutdown()
+    return 0
+
+def bench_startup(args):
+    """File-system lookups and time to build the window's icons, from loose files and from the bundle"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = create_application([])
+    images = os.path.join(APP_DIR, 'images')
+    names = sorted(set(ICON_FALLBACKS) | {name[:-4] for name in os.listdir(images) if name.endswith('.png')})
+
+    def read_syscalls():
+        try:
+            with open('/proc/self/io', encoding='ascii') as f:
+                return int(dict(line.split(': ') for line in f.read().splitlines())['syscr'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def measure(label, build):
+        before = read_syscalls()
+        started = time.perf_counter()
+        lookups = build()
+        elapsed = (time.perf_counter() - started) * 1000
+        after = read_syscalls()
+        syscalls = f"  read syscalls {after - before}" if before is not None else ''
+        print(f"{label}: {len(names)} icons in {elapsed:7.2f} ms  file lookups {lookups}{syscalls}")
+
+    def loose_files():
+        # What Browser.__init__ used to do: one path per icon, found or not
+        for name in names:
+            QIcon(os.path.join(images, f'{name}.png')).pixmap(24, 24)
+        return len(names)
+
+    def bundled():
+        registry = IconRegistry(AssetBundle(bundle_path))
+        for name in names:
+            registry.icon(name).pixmap(24, 24)
+        return registry.bundle.lookups
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bundle_path = os.path.join(tmp, 'assets.zip')
+        build_asset_bundle(bundle_path)
+        measure('loose files', loose_files)
+        measure('bundle     ', bundled)
+    app.quit()
+    return 0
+
+def bench_settings(args):
+    """Hot-path reads and a burst of writes, through QSettings as the code used to and through the settings store"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = create_application([])
+    keys = ['search_engine', 'prerender_enabled', 'caching_proxy_max_mb', 'origin_profiles']
+    writes = 200
+
+    def report(label, elapsed, count, extra=''):
+        print(f"{label}: {count} in {elapsed * 1000:8.2f} ms  {elapsed / count * 1e6:7.2f} us each{extra}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ini_path = os.path.join(tmp, 'settings.ini')
+        for key in keys:
+            QSettings(ini_path, QSettings.IniFormat).setValue(key, SETTINGS_SCHEMA[key][1])
+        store = SettingsStore(os.path.join(tmp, 'settings.json'))
+
+        started = time.perf_counter()
+        for i in range(args.reads):
+            key = keys[i % len(keys)]
+            kind, default = SETTINGS_SCHEMA[key]
+            # One QSettings per access, with type= where the old call sites passed it
+            if kind is dict:
+                QSettings(ini_path, QSettings.IniFormat).value(key, default)
+            else:
+                QSettings(ini_path, QSettings.IniFormat).value(key, default, type=kind)
+        report('QSettings reads', time.perf_counter() - started, args.reads)
+
+        started = time.perf_counter()
+        for i in range(args.reads):
+            store.get(keys[i % len(keys)])
+        report('store reads    ', time.perf_counter() - started, args.reads)
+
+        started = time.perf_counter()
+        for i in range(writes):
+            QSettings(ini_path, QSettings.IniFormat).setValue('prerender_enabled', i % 2 == 0)
+        report('QSettings writes', time.perf_counter() - started, writes, f"  file writes {writes}")
+
+        started = time.perf_counter()
+        for i in range(writes):
+            store.set('prerender_enabled', i % 2 == 0)
+        store.flush()
+        report('store writes    ', time.perf_counter() - started, writes, f"  file writes {store.counters['writes']}")
+    app.quit()
+    return 0
+
+def bench_tabs(args):
+    """Cost of opening, moving and closing a tab with 10 to --tabs tabs open, in a QTabWidget and in the tab model"""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    app = create_application([])
+    rng = random.Random(0)
+    ops = 100
+
+    def timed(operation):
+        started = time.perf_counter()
+        for _ in range(ops):
+            operation()
+            app.processEvents()
+        return (time.perf_counter() - started) / ops * 1e6
+
+    def tab_widget(count):
+        # Empty widgets stand in for views, which would only add to its side
+        tabs = QTabWidget()
+        tabs.resize(1200, 800)
+        tabs.show()
+        for n in range(count):
+            tabs.addTab(QWidget(), f"Tab {n}")
+        app.processEvents()
+
+        def open_tab():
+            tabs.setCurrentIndex(tabs.addTab(QWidget(), "New Tab"))
+
+        def move_tab():
+            tabs.tabBar().moveTab(rng.randrange(tabs.count()), rng.randrange(tabs.count()))
+
+        def close_tab():
+            tabs.removeTab(rng.randrange(tabs.count()))
+
+        result = [timed(open_tab), timed(move_tab), timed(close_tab)]
+        tabs.close()
+        return result
+
+    def tab_model(count):
+        model = TabModel()
+        tab_list = QListView()
+        tab_list.setModel(model)
+        tab_list.setUniformItemSizes(True)
+        tab_list.resize(220, 800)
+        tab_list.show()
+        tab_ids = itertools.count(1)
+        for n in range(count):
+            model.add(Tab(next(tab_ids), QUrl(f'https://example.com/{n}'), f"Tab {n}"))
+        app.processEvents()
+
+        def open_tab():
+            tab = Tab(next(tab_ids), QUrl('zi://newtab'), "New Tab")
+            model.add(tab)
+            tab_list.setCurrentIndex(model.index(model.row(tab)))
+
+        def move_tab():
+            model.move(model.tab_at(rng.randrange(len(model))), rng.randrange(len(model)))
+
+        def close_tab():
+            model.remove(model.tab_at(rng.randrange(len(model))))
+
+        result = [timed(open_tab), timed(move_tab), timed(close_tab)]
+        tab_list.close()
+        return result
+
+    for count in sorted({10, 100, args.tabs}):
+        for label, run in (('QTabWidget', tab_widget), ('tab model ', tab_model)):
+            open_us, move_us, close_us = run(count)
+            print(f"{count:5} tabs  {label}: open {open_us:8.1f} us  move {move_us:8.1f} us  close {close_us:8.1f} us")
+    app.quit()
+    return 0
+
+def bench_switcher(args):
+    """Quick switcher latency over --tabs tabs and --history history entries of synthetic pages"""
+    rng = random.Random(0)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz'
+    words = [''.join(rng.choice(alphabet) for _ in range(rng.randint(3, 9))) for _ in range(3000)]
+    hosts = [f"{rng.choice(words)}.{rng.choice(['com', 'org', 'net', 'io'])}" for _ in range(5000)]
+
+    def page():
+        title = ' '.join(rng.choice(words) for _ in range(rng.randint(2, 7))).title()
+        path = '/'.join(rng.choice(words) for _ in range(rng.randint(0, 3)))
+        return title, f"https://www.{rng.choice(hosts)}/{path}"
+
+    started = time.perf_counter()
+    history = SwitcherIndex()
+    for _ in range(args.history):
+        title, url = page()
+        history.set(url, 'history', title, url)
+    tabs = SwitcherIndex()
+    for tab_id in range(args.tabs):
+        title, url = page()
+        tabs.set(tab_id, 'tab' if tab_id % 4 else 'unloaded', title, url)
+    print(f"build: {len(history)} history entries and {len(tabs)} tabs in {time.perf_counter() - started:.2f} s  "
+          f"({history.size + tabs.size} postings)")
+
+    # Every tab navigates once, as urlChanged and titleChanged would report it
+    started = time.perf_counter()
+    for tab_id in range(args.tabs):
+        title, url = page()
+        tabs.set(tab_id, 'tab', title, url)
+    print(f"update: {(time.perf_counter() - started) / args.tabs * 1e6:.1f} us per tab navigation")
+
+    queries = []
+    for _ in range(500):
+        title, url = page()
+        word = title.split()[0].lower()
+        if len(word) >= SwitcherIndex.FUZZY_LENGTH:
+            at = rng.randrange(1, len(word) - 2)
+            typo = rng.choice([word[:at] + 'q' + word[at + 1:], word[:at] + word[at + 1] + word[at] + word[at + 2:]])
+        else:
+            typo = word
+        host = url.split('/')[2][4:]
+        queries.append(rng.choice([word[:3], word, typo, ' '.join(title.lower().split()[:2]), host[:5], word[:1]]))
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        search_switcher([tabs, history], query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    under = sum(1 for latency in latencies if latency < 5) / len(latencies)
+    print(f"search: {len(queries)} queries  p50 {statistics.median(latencies):.2f} ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms  max {latencies[-1]:.2f} ms  under 5 ms {under:.1%}")
+    return 0
+
+def bench_offline(args):
+    """Offline archive save rate, deduplication, listing and search over --pages synthetic MHTML captures"""
+    import quopri
+    rng = random.Random(0)
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 9))) for _ in range(3000)]
+    # Resources shared across sites, as CDN-hosted stylesheets, scripts and logos are
+    shared = [(f"https://cdn.test/{n}.css", 'text/css', f".c{n} {{ background: url(https://cdn.test/{n}.png) }}".encode() * 200)
+              for n in range(40)]
+    shared += [(f"https://cdn.test/{n}.js", 'text/javascript', rng.randbytes(30000)) for n in range(40)]
+    shared += [(f"https://cdn.test/{n}.png", 'image/png', rng.randbytes(20000)) for n in range(40)]
+    boundary = '----MultipartBoundary--bench'
+
+    def capture(n):
+        url = f"https://site{n % 50}.test/{'/'.join(rng.choices(words, k=3))}"
+        resources = rng.sample(shared, 12) + [(f"https://site{n % 50}.test/photo{n}.jpg", 'image/jpeg', rng.randbytes(40000))]
+        body = ' '.join(rng.choices(words, k=1500))
+        links = ''.join(f'<link rel="stylesheet" href="{location}">' if mime == 'text/css' else f'<img src="{location}">'
+                        for location, mime, _ in resources)
+        html_part = f"<!DOCTYPE html><html><head><title>{' '.join(rng.choices(words, k=5))}</title>{links}</head><body>{body}</body></html>"
+        out = [f'MIME-Version: 1.0\r\nContent-Type: multipart/related; type="text/html"; boundary="{boundary}"\r\n\r\n']
+        for location, mime, data in [(url, 'text/html', html_part.encode())] + resources:
+            if mime.startswith('text/'):
+                encoding, data = 'quoted-printable', quopri.encodestring(data)
+            else:
+                encoding, data = 'base64', base64.encodebytes(data)
+            out.append(f"--{boundary}\r\nContent-Type: {mime}\r\nContent-Transfer-Encoding: {encoding}\r\n"
+                       f"Content-Location: {location}\r\n\r\n{data.decode('ascii')}\r\n")
+        out.append(f"--{boundary}--\r\n")
+        return url, html_part[html_part.index('<title>') + 7:html_part.index('</title>')], body, ''.join(out).encode('ascii')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = OfflineArchive(os.path.join(tmp, 'offline'))
+        captures = os.path.join(tmp, 'captures')
+        os.makedirs(captures)
+        jobs, capture_bytes = [], 0
+        for n in range(args.pages):
+            url, title, text, data = capture(n)
+            path = os.path.join(captures, f"{n}.mhtml")
+            with open(path, 'wb') as f:
+                f.write(data)
+            capture_bytes += len(data)
+            jobs.append((path, url, title, text))
+
+        started = time.perf_counter()
+        futures = [archive.add(path, url, title, text, discard=True) for path, url, title, text in jobs]
+        saved = sum(1 for future in futures if future.result() is not None)
+        elapsed = time.perf_counter() - started
+        stats = archive.stats()
+        print(f"save: {saved} pages in {elapsed:.1f} s ({saved / elapsed:.0f} pages/s)  "
+              f"captures {capture_bytes / 2 ** 20:.1f} MiB")
+        print(f"storage: {stats['page_bytes'] / 2 ** 20:.1f} MiB of parts stored as {stats['stored_bytes'] / 2 ** 20:.1f} MiB "
+              f"in {stats['parts']} files ({stats['deduplication']} deduplication)")
+
+        def timed(function, runs):
+            latencies = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                function()
+                latencies.append((time.perf_counter() - started) * 1000)
+            latencies.sort()
+            return f"p50 {statistics.median(latencies):.2f} ms  p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms"
+
+        print(f"list: {timed(lambda: archive.page(rng.randrange(max(1, saved)), 100), 200)}")
+        print(f"search: {timed(lambda: archive.page(0, 100, ' '.join(rng.choices(words, k=rng.randint(1, 2)))), 200)}")
+
+        def read_page():
+            mime, path = archive.open(f"/page/{rng.randint(1, saved)}")
+            with open(path, 'rb') as f:
+                while f.read(65536):
+                    pass
+
+        print(f"open page: {timed(read_page, 200)}")
+        archive.close()
+    return 0
+
+BENCHMARKS = {
+    'shard': bench_shard,
+    'index': bench_index,
+    'params': bench_params,
+    'proxy': bench_proxy,
+    'startup': bench_startup,
+    'settings': bench_settings,
+    'tabs': bench_tabs,
+    'switcher': bench_switcher,
+    'offline': bench_offline,
+}
+
+def bench_main(args, qt_args):
+    return BENCHMARKS[args.name](args)
+
+def parse_args(argv):
+    """Parse ZiBrowser options, leaving Qt's own options in place"""
+    parser = argparse.ArgumentParser(prog='ZiBrowser')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='record a trace from startup and write it to PATH on exit')
+    commands = parser.add_subparsers(dest='command')
+
+    render = commands.add_parser('render', help='capture pages without opening a window')
+    render.add_argument('--urls', required=True, help='file with one URL per line')
+    render.add_argument('--out', required=True, help='directory for captures')
+    render.add_argument('--format', action='append', choices=RENDER_FORMATS,
+                        help='capture format, may be repeated (default: png)')
+    render.add_argument('--concurrency', type=int, default=4, help='number of page workers')
+    render.add_argument('--timeout', type=float, default=30, help='seconds allowed per page')
+    render.add_argument('--retries', type=int, default=1, help='retries for failed pages')
+    render.add_argument('--results', help='JSONL results log (default: OUT/results.jsonl)')
+    render.add_argument('--profile-dir', help='persistent profile directory (default: off the record)')
+    render.add_argument('--width', type=int, default=1280)
+    render.add_argument('--height', type=int, default=800)
+
+    # Used by the shard runner; reads JSON jobs from stdin
+    worker = commands.add_parser('render-worker')
+    worker.add_argument('--out', required=True)
+    worker.add_argument('--format', action='append', choices=RENDER_FORMATS)
+    worker.add_argument('--concurrency', type=int, default=2)
+    worker.add_argument('--timeout', type=float, default=30)
+    worker.add_argument('--retries', type=int, default=1)
+    worker.add_argument('--profile-dir')
+
+    shard = commands.add_parser('shard', help='capture pages across several worker processes')
+    shard.add_argument('--urls', required=True, help='file with one URL per line')
+    shard.add_argument('--out', required=True, help='directory for captures')
+    shard.add_argument('--format', action='append', choices=RENDER_FORMATS,
+                       help='capture format, may be repeated (default: png)')
+    shard.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    shard.add_argument('--concurrency', type=int, default=2, help='page workers per process')
+    shard.add_argument('--max-inflight', type=int, help='jobs queued per process (default: 2 x concurrency)')
+    shard.add_argument('--timeout', type=float, default=30, help='seconds allowed per page')
+    shard.add_argument('--retries', type=int, default=1, help='retries for failed pages')
+    shard.add_argument('--results', help='JSONL results log in input order (default: OUT/results.jsonl)')
+    shard.add_argument('--isolate-profiles', action='store_true',
+                       help='give every worker process its own profile directory')
+
+    build_assets = commands.add_parser('build-assets', help='pack images into assets.zip')
+    build_assets.add_argument('--out', default=ASSET_BUNDLE_PATH, help='bundle path (default: next to ZiBrowser.py)')
+
+    bench = commands.add_parser('bench', help='run a benchmark')
+    bench.add_argument('name', choices=sorted(BENCHMARKS))
+    bench.add_argument('--pages', type=int, default=200, help='fixture pages to generate')
+    bench.add_argument('--docs', type=int, default=100000, help='documents to index')
+    bench.add_argument('--reads', type=int, default=100000, help='settings reads to time')
+    bench.add_argument('--tabs', type=int, default=2000, help='open tabs')
+    bench.add_argument('--history', type=int, default=100000, help='history entries to index')
+
+    return parser.parse_known_args(argv[1:])
+
+def build_assets_main(args, qt_args):
+    """Pack images/ into assets.zip for faster startup"""
+    count = build_asset_bundle(args.out)
+    print(f"Packed {count} files into {args.out} ({os.path.getsize(args.out) // 1024} KiB)")
+    return 0
+
+COMMANDS = {
+    'render': render_main,
+    'render-worker': render_worker_main,
+    'shard': shard_main,
+    'bench': bench_main,
+    'build-assets': build_assets_main,
+}
 
 def main():
     try:
-        # Set High DPI attributes BEFORE creating QApplication
-        QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
-        QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
-        
-        # Create QApplication after setting attributes
-        app = QApplication(sys.argv)
-        app.setApplicationName("ZiBrowser")
-        app.setOrganizationName("ZiBrowser")
-        app.setOrganizationDomain("zibrowser.com")
+        args, qt_args = parse_args(sys.argv)
+        if args.command in COMMANDS:
+            return COMMANDS[args.command](args, qt_args)
+
+        app = create_application(qt_args)
+
+        if args.trace:
+            TRACER.start()
+            app.aboutToQuit.connect(lambda: TRACER.dump(args.trace))
         
         # Initialize browser window with error handling
         try: